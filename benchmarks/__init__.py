@@ -0,0 +1,7 @@
+"""
+Ytelsesmålinger for PAD Framework.
+
+Hvert skript i denne pakken kan kjøres direkte, for eksempel::
+
+    python -m benchmarks.bench_lint
+"""
@@ -0,0 +1,46 @@
+"""
+Kommandolinje for ytelsessuiten, se ``benchmarks/suite.py``.
+"""
+import argparse
+import sys
+
+from benchmarks.suite import compare, format_results, load_json, run_suite, save_json
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="kjør suiten")
+    run.add_argument("--output", help="lagre resultatet som JSON")
+    run.add_argument("--baseline", help="sammenlign med lagret baseline")
+    run.add_argument("--threshold", type=float, default=0.2)
+    run.add_argument("--quick", action="store_true", help="færre iterasjoner")
+
+    cmp = commands.add_parser("compare", help="sammenlign to lagrede resultater")
+    cmp.add_argument("current")
+    cmp.add_argument("baseline")
+    cmp.add_argument("--threshold", type=float, default=0.2)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        current = run_suite(quick=args.quick)
+        print(format_results(current))
+        if args.output:
+            save_json(current, args.output)
+        if not args.baseline:
+            return 0
+        baseline = load_json(args.baseline)
+    else:
+        current, baseline = load_json(args.current), load_json(args.baseline)
+
+    regressions = compare(current, baseline, args.threshold)
+    for line in regressions:
+        print(f"REGRESJON {line}")
+    if not regressions:
+        print(f"Ingen regresjoner over {args.threshold:.0%}.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
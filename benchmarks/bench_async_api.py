@@ -0,0 +1,107 @@
+"""
+bench_async_api.py
+Måler samtidig gjennomstrømning for ``/generate`` før og etter async-stien.
+
+``before`` gjenskaper det gamle synkrone endepunktet (plan → kodegenerering →
+QA i én Starlette-tråd), ``after`` bruker ``pad.api.app`` med
+``process_request_async``. QA forsinkes kunstig (``--qa-ms``) for å modellere
+en treg analyse, og hver runde sender ``--requests`` forespørsler med
+``--concurrency`` samtidige klienter via en in-process ASGI-klient.
+
+Samtidig måles ventetiden for et lite synkront kall (``/validate/batch``)
+for å vise om ``/generate``-lasten sulter ut Starlettes tråd-pool.
+
+Kjøres med::
+
+    python -m benchmarks.bench_async_api --requests 400 --concurrency 64
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any, List, Optional, Tuple
+
+import httpx
+from fastapi import FastAPI
+
+from pad import api
+from pad.deadline import Deadline
+from pad.orchestrator import OrchestratorAgent
+
+
+def slow_qa(orchestrator: OrchestratorAgent, delay: float) -> None:
+    validate = orchestrator.qa_agent.validate_code
+
+    def delayed(code: str, tests: Optional[str] = None,
+                deadline: Optional[Deadline] = None, run_tests: bool = False) -> str:
+        time.sleep(delay)
+        return validate(code, tests, deadline, run_tests)
+
+    orchestrator.qa_agent.validate_code = delayed  # type: ignore[method-assign]
+
+
+def build_before_app(orchestrator: OrchestratorAgent) -> FastAPI:
+    before = FastAPI()
+
+    before.post("/validate/batch")(api.validate_batch)
+
+    @before.post("/generate")
+    def generate_code(request: api.UserRequest) -> api.CodeResponse:
+        plan = orchestrator.plan(request.prompt)
+        code = orchestrator.codegen_agent.generate_code(plan, orchestrator.context_agent)
+        feedback = orchestrator.qa_agent.validate_code(code)
+        return api.CodeResponse(code=code, feedback=feedback)
+
+    return before
+
+
+async def run_load(app: FastAPI, requests: int,
+                   concurrency: int) -> Tuple[List[float], List[float]]:
+    latencies: List[float] = []
+    probes: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i: int) -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/generate", json={"prompt": f"oppgave {i}"})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        async def probe(load: "asyncio.Future[Any]") -> None:
+            while not load.done():
+                start = time.perf_counter()
+                await client.post("/validate/batch", json={"codes": ["x = 1"]})
+                probes.append(time.perf_counter() - start)
+
+        load = asyncio.ensure_future(asyncio.gather(*(one(i) for i in range(requests))))
+        await asyncio.gather(load, probe(load))
+    return latencies, probes
+
+
+def report(name: str, latencies: List[float], probes: List[float], elapsed: float) -> None:
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{name:<7} {len(latencies) / elapsed:8.1f} req/s  "
+          f"p50 {statistics.median(ordered) * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms  "
+          f"sync-probe p50 {statistics.median(probes) * 1000:7.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--qa-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    for name, app in (("before", build_before_app(api.orchestrator)), ("after", api.app)):
+        slow_qa(api.orchestrator, args.qa_ms / 1000)
+        start = time.perf_counter()
+        latencies, probes = asyncio.run(run_load(app, args.requests, args.concurrency))
+        report(name, latencies, probes, time.perf_counter() - start)
+        del api.orchestrator.qa_agent.validate_code
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+bench_batch.py
+Måler batch-kjøringen (``pad.batch``): gjennomstrømning gjennom hele
+pipelinen og at minnebruken i runneren er flat i antall forespørsler.
+
+- ``pipeline``: forespørsler per sekund med ``OrchestratorAgent.run_batch``
+- ``runner``: tracemalloc-topp for runneren alene (med en triviell
+  ``process``) ved N og 10 N forespørsler; toppene skal være like
+
+Kjøres med::
+
+    python -m benchmarks.bench_batch --prompts 2000 --workers 8
+"""
+import argparse
+import io
+import logging
+import time
+import tracemalloc
+from typing import Dict, Iterator
+
+from pad.batch import read_prompts, run_batch
+from pad.orchestrator import OrchestratorAgent
+
+
+class NullWriter(io.StringIO):
+    """Forkaster utdata, slik at bare runneren måles."""
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+def lines(count: int) -> Iterator[str]:
+    for i in range(count):
+        yield f"lag en funksjon som beregner rabatt nummer {i}\n"
+
+
+def echo(prompt: str) -> Dict[str, str]:
+    return {"code": prompt, "feedback": "OK"}
+
+
+def runner_peak(count: int, workers: int) -> int:
+    tracemalloc.start()
+    run_batch(echo, read_prompts(lines(count)), NullWriter(), workers=workers)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prompts", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    orchestrator = OrchestratorAgent()
+    try:
+        start = time.perf_counter()
+        stats = orchestrator.run_batch(lines(args.prompts), NullWriter(), workers=args.workers)
+        elapsed = time.perf_counter() - start
+    finally:
+        orchestrator.close()
+    print(f"pipeline  {stats['processed'] / elapsed:9.1f} forespørsler/s  ({stats})")
+
+    for count in (args.prompts, args.prompts * 10):
+        peak = runner_peak(count, args.workers)
+        print(f"runner    {count:7d} forespørsler  topp {peak / 1e3:7.1f} kB")
+
+
+if __name__ == "__main__":
+    main()
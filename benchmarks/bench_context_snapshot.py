@@ -0,0 +1,77 @@
+"""
+bench_context_snapshot.py
+Sammenligner copy-on-write-lesing i ContextAgent med en grov lås.
+
+``snapshot`` er dagens ContextAgent, der lesere henter et uforanderlig
+øyeblikksbilde uten lås. ``coarse-lock`` pakker både lesing og skriving i
+én felles lås, slik en naiv trådsikker versjon ville gjort. Målingen kjører
+``--readers`` lesetråder og én skrivetråd i ``--seconds`` sekunder.
+
+Kjøres med::
+
+    python -m benchmarks.bench_context_snapshot --readers 8 --seconds 2
+"""
+import argparse
+import threading
+import time
+from typing import Callable, List, Optional
+
+from pad.context_agent import ContextAgent
+
+
+class CoarseLockContextAgent(ContextAgent):
+    """ContextAgent der alle lesinger og skrivinger deler én lås."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._coarse = threading.Lock()
+
+    def get_context(self, query: Optional[str] = None, budget: Optional[int] = None,
+                    top_k: int = 10) -> str:
+        with self._coarse:
+            return super().get_context(query, budget, top_k)
+
+    def update_context_from_code(self, code: str) -> None:
+        with self._coarse:
+            super().update_context_from_code(code)
+
+
+def run(agent: ContextAgent, readers: int, seconds: float) -> List[int]:
+    stop = threading.Event()
+    counts = [0] * (readers + 1)
+
+    def loop(index: int, work: Callable[[int], object]) -> None:
+        n = 0
+        while not stop.is_set():
+            work(n)
+            n += 1
+        counts[index] = n
+
+    threads = [threading.Thread(target=loop, args=(i, lambda n: agent.get_context()))
+               for i in range(readers)]
+    threads.append(threading.Thread(
+        target=loop, args=(readers, lambda n: agent.update_context_from_code(f"x = {n}"))))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    for name, agent in (("snapshot", ContextAgent()), ("coarse-lock", CoarseLockContextAgent())):
+        counts = run(agent, args.readers, args.seconds)
+        reads = sum(counts[:-1]) / args.seconds
+        writes = counts[-1] / args.seconds
+        print(f"{name:<12} {reads:12.0f} lesinger/s  {writes:10.0f} skrivinger/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+bench_indexer.py
+Måler full indeksering og inkrementell re-indeksering med CodebaseIndexer.
+
+Lager et syntetisk tre med ``--files`` Python-filer, indekserer det én gang,
+endrer én fil og måler re-indekseringen (både i samme prosess og fra
+lagret indeks, som ved en ny kjøring).
+
+Kjøres med::
+
+    python -m benchmarks.bench_indexer --files 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from pad.indexer import CodebaseIndexer
+
+TEMPLATE = '''import os
+
+
+class Tjeneste{i}:
+    def kjor(self):
+        return os.getcwd()
+
+
+def hjelper_{i}(x):
+    return x * {i}
+'''
+
+
+def build_tree(root: str, files: int) -> None:
+    for i in range(files):
+        package = os.path.join(root, f"pakke_{i // 100}")
+        os.makedirs(package, exist_ok=True)
+        with open(os.path.join(package, f"modul_{i}.py"), "w") as fh:
+            fh.write(TEMPLATE.format(i=i))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "kode")
+        index_path = os.path.join(tmp, "index.sqlite")
+        build_tree(root, args.files)
+
+        indexer = CodebaseIndexer(root, index_path)
+        stats = indexer.update()
+        print(f"full indeksering:     {stats['seconds'] * 1000:9.1f} ms "
+              f"({stats['parsed']:.0f} filer parset)")
+
+        edited = os.path.join("pakke_0", "modul_0.py")
+        with open(os.path.join(root, edited), "a") as fh:
+            fh.write("\n\ndef ny_funksjon():\n    return 1\n")
+        stats = indexer.update()
+        print(f"re-indeksering:       {stats['seconds'] * 1000:9.1f} ms "
+              f"({stats['parsed']:.0f} fil parset)")
+
+        with open(os.path.join(root, edited), "a") as fh:
+            fh.write("\n\ndef enda_en():\n    return 2\n")
+        stats = indexer.update(changed_paths=[edited])
+        print(f"re-indeksering (sti): {stats['seconds'] * 1000:9.1f} ms "
+              f"({stats['parsed']:.0f} fil parset)")
+
+        start = time.perf_counter()
+        reloaded = CodebaseIndexer(root, index_path)
+        load_seconds = time.perf_counter() - start
+        stats = reloaded.update()
+        print(f"last indeks + update: {(load_seconds + stats['seconds']) * 1000:9.1f} ms "
+              f"({stats['parsed']:.0f} filer parset)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+bench_lint.py
+Sammenligner in-process linting med den gamle flake8-subprosessen.
+
+Måler gjennomsnittlig tid per ``validate_code``-lignende kall for:
+
+- ``subprocess``: midlertidig fil + ``flake8 <fil>`` per kall (gammel sti)
+- ``in-process``: LintEngine direkte på strengen
+- ``pool``: LintWorkerPool med varme arbeiderprosesser
+
+Kjøres med::
+
+    python -m benchmarks.bench_lint --iterations 50
+"""
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+from typing import Callable, List
+
+from pad.lint_engine import LintEngine, LintWorkerPool
+
+SAMPLE = '''import os
+
+
+def add(a, b):
+    """Legger sammen to tall."""
+    unused = 1
+    return a+b
+
+
+def greet(name):
+    print("Hei, " + name)
+'''
+
+
+def flake8_subprocess(code: str) -> List[str]:
+    """Den opprinnelige stien: skriv til temp-fil og kjør flake8."""
+    with tempfile.NamedTemporaryFile(suffix=".py", delete=False) as tmp:
+        tmp.write(code.encode("utf-8"))
+    try:
+        result = subprocess.run(
+            ["flake8", tmp.name], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=5
+        )
+        return result.stdout.decode().splitlines()
+    finally:
+        os.unlink(tmp.name)
+
+
+def measure(name: str, func: Callable[[str], List[str]], iterations: int) -> float:
+    func(SAMPLE)  # oppvarming
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(SAMPLE)
+    per_call = (time.perf_counter() - start) / iterations
+    print(f"{name:<12} {per_call * 1000:9.3f} ms/kall")
+    return per_call
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    engine = LintEngine()
+    baseline = measure("subprocess", flake8_subprocess, args.iterations)
+    in_process = measure("in-process", engine.check, args.iterations)
+    with LintWorkerPool(args.workers) as pool:
+        pooled = measure("pool", pool.check, args.iterations)
+
+    print(f"in-process er {baseline / in_process:.1f}x raskere enn subprocess")
+    print(f"pool er {baseline / pooled:.1f}x raskere enn subprocess")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+bench_model_backend.py
+Måler gjennomstrømning for HTTPModelBackend mot den lokale mock-tjeneren.
+
+Sammenligner tre oppsett med samme antall samtidige klienter:
+
+- uten pool: ny TCP-tilkobling per kall
+- med pool: keep-alive-tilkoblinger gjenbrukes
+- med pool og mikro-batching: samtidige prompter sendes i batch-kall
+
+Kjøres med::
+
+    python -m benchmarks.bench_model_backend --requests 400 --clients 32 --latency 0.02
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pad.mock_model_server import MockModelServer
+from pad.model_backend import HTTPModelBackend
+
+
+def measure(name: str, backend: HTTPModelBackend, server: MockModelServer,
+            requests: int, clients: int) -> float:
+    before = dict(server.counters)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        list(pool.map(lambda i: backend.generate(f"oppgave {i}", "ctx"), range(requests)))
+    elapsed = time.perf_counter() - start
+    backend.close()
+    calls = server.counters["requests"] - before["requests"]
+    connections = server.counters["connections"] - before["connections"]
+    print(f"{name:<16} {requests / elapsed:9.1f} req/s  "
+          f"{calls:5d} HTTP-kall  {connections:5d} tilkoblinger")
+    return requests / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    with MockModelServer(latency=args.latency) as server:
+        url, limit = server.url, args.concurrency
+        unpooled = measure("uten pool", HTTPModelBackend(url, limit, pooled=False),
+                           server, args.requests, args.clients)
+        pooled = measure("med pool", HTTPModelBackend(url, limit),
+                         server, args.requests, args.clients)
+        batched = measure("pool + batching", HTTPModelBackend(url, limit, batching=True),
+                          server, args.requests, args.clients)
+
+    print(f"pool er {pooled / unpooled:.1f}x, pool + batching {batched / unpooled:.1f}x "
+          f"raskere enn uten pool")
+
+
+if __name__ == "__main__":
+    main()
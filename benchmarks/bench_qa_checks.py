@@ -0,0 +1,69 @@
+"""
+bench_qa_checks.py
+Viser at kostnaden for QA-sjekkene holder seg nesten flat når sjekker legges til.
+
+Sammenligner for 1, 2, 4, 8 og 16 sjekker:
+
+- ``separate``: hver sjekk parser koden og går gjennom hele treet selv
+  (slik det blir med ett verktøy eller én ``ast.NodeVisitor`` per sjekk)
+- ``shared``: CheckRunner parser én gang og kjører alle sjekkene i én
+  gjennomgang av treet
+
+Sjekkene er kopier av DangerousCallCheck, som ser på alle ``ast.Call``.
+
+Kjøres med::
+
+    python -m benchmarks.bench_qa_checks --iterations 200
+"""
+import argparse
+import ast
+import time
+from typing import Callable, List, Type
+
+from pad.qa_checks import Analysis, Check, CheckRunner, DangerousCallCheck
+
+SAMPLE = "\n\n".join(
+    f"def funksjon_{i}(a, b):\n"
+    f"    resultat = min(a, b) + max(a, b) * {i}\n"
+    f"    print(resultat, sorted([a, b]))\n"
+    f"    return abs(resultat)" for i in range(100)
+) + "\n"
+
+
+def make_checks(count: int) -> List[Type[Check]]:
+    return [type(f"Check{i}", (DangerousCallCheck,), {}) for i in range(count)]
+
+
+def separate(checks: List[Type[Check]]) -> None:
+    for check in checks:
+        analysis = Analysis(ast.parse(SAMPLE))
+        instance = check(analysis)
+        for node in ast.walk(analysis.tree):  # type: ignore[arg-type]
+            if isinstance(node, instance.node_types):
+                instance.visit(node)
+
+
+def time_per_call(func: Callable[[], object], iterations: int) -> float:
+    func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'sjekker':>7} {'separate':>12} {'shared':>12}")
+    for count in (1, 2, 4, 8, 16):
+        checks = make_checks(count)
+        runner = CheckRunner(checks)
+        separate_ms = time_per_call(lambda: separate(checks), args.iterations) * 1000
+        shared_ms = time_per_call(lambda: runner.run(SAMPLE), args.iterations) * 1000
+        print(f"{count:>7} {separate_ms:>9.2f} ms {shared_ms:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
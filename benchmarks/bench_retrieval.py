@@ -0,0 +1,61 @@
+"""
+bench_retrieval.py
+Måler innsetting og søk i vektorindeksen som rangerer konteksten i
+ContextAgent.get_context.
+
+- ``add``: tid per ny kodebit, inkludert tokenisering
+- ``search``: p50/p99 for et søk med topp-10 over hele indeksen
+
+Kjøres med::
+
+    python -m benchmarks.bench_retrieval --entries 100000 --queries 200
+"""
+import argparse
+import random
+import statistics
+import time
+
+from pad.retrieval import VectorIndex
+
+WORDS = ["hent", "lagre", "slett", "bruker", "ordre", "faktura", "pris", "rabatt", "fil",
+         "sti", "kø", "jobb", "sesjon", "kontekst", "indeks", "cache", "token", "svar",
+         "foresporsel", "logg", "konfig", "tilkobling", "tabell", "rad", "kolonne"]
+
+
+def snippet(rng: random.Random, i: int) -> str:
+    name = "_".join(rng.sample(WORDS, 2)) + f"_{i}"
+    args = ", ".join(rng.sample(WORDS, 2))
+    body = " + ".join(rng.sample(WORDS, 3))
+    return f"def {name}({args}):\n    return {body}\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    snippets = [snippet(rng, i) for i in range(args.entries)]
+    index: VectorIndex[int] = VectorIndex()
+    start = time.perf_counter()
+    for i, text in enumerate(snippets):
+        index.add(i, text, i)
+    index.search("oppvarming")
+    elapsed = time.perf_counter() - start
+    print(f"add     {elapsed / args.entries * 1e6:7.2f} µs per kodebit  "
+          f"({args.entries} kodebiter, {index.nbytes / 1e6:.1f} MB)")
+
+    samples = []
+    for _ in range(args.queries):
+        query = " ".join(rng.sample(WORDS, 3))
+        start = time.perf_counter()
+        index.search(query, k=10)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    print(f"search  p50 {statistics.median(samples) * 1000:6.2f} ms  "
+          f"p99 {samples[int(len(samples) * 0.99) - 1] * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+bench_sandbox.py
+Sammenligner testkjøring i en ny Python-tolk med varme fork-servere.
+
+- ``fresh``: midlertidig katalog + ``python -c`` som importerer og kjører
+  testene, én ny tolk per kjøring
+- ``fork-server``: SandboxPool, der en forhåndsstartet server forker et
+  barn med rlimits per kjøring
+
+Kjøres med::
+
+    python -m benchmarks.bench_sandbox --iterations 50
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+from pad.sandbox import SandboxPool
+
+CODE = '''import unittest
+
+
+def add(a, b):
+    return a + b
+'''
+
+TESTS = '''from solution import add
+
+
+def test_add():
+    assert add(1, 2) == 3
+
+
+def test_negative():
+    assert add(-1, -1) == -2
+'''
+
+RUNNER = (
+    "import inspect, test_solution\n"
+    "for name, obj in vars(test_solution).items():\n"
+    "    if inspect.isfunction(obj) and name.startswith('test'):\n"
+    "        obj()\n"
+)
+
+
+def fresh_interpreter() -> None:
+    with tempfile.TemporaryDirectory(prefix="pad-bench-") as directory:
+        for name, text in (("solution.py", CODE), ("test_solution.py", TESTS)):
+            with open(os.path.join(directory, name), "w", encoding="utf-8") as fh:
+                fh.write(text)
+        subprocess.run([sys.executable, "-c", RUNNER], cwd=directory, check=True)
+
+
+def measure(func: Callable[[], object], iterations: int) -> List[float]:
+    func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    with SandboxPool(workers=1) as pool:
+        for name, func in (("fresh", fresh_interpreter),
+                           ("fork-server", lambda: pool.run(CODE, TESTS))):
+            samples = measure(func, args.iterations)
+            print(f"{name:<12} p50 {statistics.median(samples) * 1000:7.2f} ms  "
+                  f"maks {max(samples) * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+bench_snapshot.py
+Måler varm start fra et øyeblikksbilde mot å bygge ContextAgent opp igjen.
+
+- ``rebuild``: legger alle kodebitene inn på nytt (det en kald prosess
+  måtte gjort for å få samme kontekst)
+- ``save``: ``save_snapshot``, inkludert fsync
+- ``load``: ``load_snapshot`` av et minnekartlagt bilde
+- ``first query``: første ``get_context`` etter lasting, der postinglistene
+  leses inn fra kartet
+
+Kjøres med::
+
+    python -m benchmarks.bench_snapshot --entries 20000 --snapshot /tmp/pad_bench.snap
+"""
+import argparse
+import os
+import time
+
+from pad.context_agent import ContextAgent
+
+WORDS = ["hent", "lagre", "slett", "bruker", "ordre", "faktura", "pris", "rabatt", "fil", "sti"]
+
+
+def snippet(i: int) -> str:
+    first, second = WORDS[i % len(WORDS)], WORDS[(i // len(WORDS)) % len(WORDS)]
+    return f"def {first}_{second}_{i}({second}):\n    return {first}({second}, {i})\n"
+
+
+def build(entries: int) -> ContextAgent:
+    agent = ContextAgent(history_bytes=1 << 30)
+    for i in range(entries):
+        agent.update_context_from_code(snippet(i))
+    return agent
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--snapshot", default="pad_bench.snap")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    agent = build(args.entries)
+    agent.get_context("hent bruker")
+    print(f"rebuild      {(time.perf_counter() - start) * 1000:9.2f} ms")
+
+    start = time.perf_counter()
+    size = agent.save_snapshot(args.snapshot)
+    print(f"save         {(time.perf_counter() - start) * 1000:9.2f} ms  ({size / 1e6:.1f} MB)")
+
+    try:
+        warm = ContextAgent(history_bytes=1 << 30)
+        start = time.perf_counter()
+        warm.load_snapshot(args.snapshot)
+        print(f"load         {(time.perf_counter() - start) * 1000:9.2f} ms")
+        start = time.perf_counter()
+        context = warm.get_context("hent bruker")
+        print(f"first query  {(time.perf_counter() - start) * 1000:9.2f} ms")
+        assert context == agent.get_context("hent bruker")
+    finally:
+        os.remove(args.snapshot)
+
+
+if __name__ == "__main__":
+    main()
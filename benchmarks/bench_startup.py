@@ -0,0 +1,68 @@
+"""
+bench_startup.py
+Måler importtid og oppstart for PAD i nye Python-prosesser.
+
+Hver måling kjører en ny tolk, slik at importene ikke ligger i cache, og
+trekker fra tiden for en tom ``python -c pass``. Målingene dekker:
+
+- ``import main`` (CLI-stien, skal ikke laste FastAPI)
+- ``import main`` + ``OrchestratorAgent()`` (lat oppstart av agentene)
+- første ``process_request`` (når agentene faktisk lages)
+- ``import pad.api`` (webstakken, til sammenligning)
+
+Kjøres med::
+
+    python -m benchmarks.bench_startup --runs 10
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPETS = {
+    "startup.import_main": "import main",
+    "startup.orchestrator": "import main\nfrom pad.orchestrator import OrchestratorAgent\n"
+                            "OrchestratorAgent()",
+    "startup.first_request": "from pad.orchestrator import OrchestratorAgent\n"
+                             "OrchestratorAgent().process_request('hei')",
+    "startup.import_api": "import pad.api",
+}
+
+
+def time_process(code: str) -> float:
+    """Kjører ``code`` i en ny tolk og returnerer veggklokketiden i sekunder."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def startup_samples(runs: int) -> Dict[str, List[float]]:
+    """
+    Måler hvert kodeutdrag ``runs`` ganger, fratrukket tom tolk-oppstart.
+
+    Returns:
+        Dict[str, List[float]]: Målinger i sekunder per utdrag
+    """
+    baseline = min(time_process("pass") for _ in range(max(runs // 2, 3)))
+    return {name: [max(time_process(code) - baseline, 0.0) for _ in range(runs)]
+            for name, code in SNIPPETS.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    for name, samples in startup_samples(args.runs).items():
+        samples.sort()
+        print(f"{name:<24} median {samples[len(samples) // 2] * 1000:7.1f} ms  "
+              f"min {samples[0] * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
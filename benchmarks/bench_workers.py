@@ -0,0 +1,105 @@
+"""
+bench_workers.py
+Måler gjennomstrømning for ``/generate`` mot antall uvicorn-arbeidere.
+
+For hvert antall arbeidere startes ``uvicorn pad.api:app --workers N`` som
+en egen prosess med et felles SQLite-kontekstlager (``PAD_CONTEXT_STORE``),
+slik ``main.py --api --workers N`` gjør. Deretter sendes ``--requests``
+forespørsler med ``--concurrency`` samtidige klienter fordelt på
+``--sessions`` sesjoner. QA (flake8 og AST-sjekker) er CPU-bundet og
+holder GIL-en, så én prosess metter én kjerne; flere prosesser skalerer
+med antall kjerner.
+
+Kjøres med::
+
+    python -m benchmarks.bench_workers --workers 1 2 4 --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def start_server(workers: int, port: int, store: str) -> "subprocess.Popen[bytes]":
+    env = dict(os.environ, PAD_CONTEXT_STORE=store, PAD_METRICS="0")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "pad.api:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT, env=env, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return process
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("uvicorn startet ikke")
+
+
+async def run_load(port: int, requests: int, concurrency: int, sessions: int) -> List[float]:
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits,
+                                 timeout=60) as client:
+        async def one(i: int) -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/generate", json={
+                    "prompt": f"lag funksjon nummer {i}", "session_id": f"s{i % sessions}",
+                    "use_cache": False})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(one(i) for i in range(requests)))
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--sessions", type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPU-kjerner")
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as tmp:
+            port = free_port()
+            server = start_server(workers, port, os.path.join(tmp, "context.sqlite"))
+            try:
+                # Oppvarming: alle arbeidere importerer og kompilerer før målingen
+                asyncio.run(run_load(port, workers * 20, args.concurrency, args.sessions))
+                start = time.perf_counter()
+                latencies = asyncio.run(run_load(port, args.requests, args.concurrency,
+                                                 args.sessions))
+                elapsed = time.perf_counter() - start
+            finally:
+                server.terminate()
+                server.wait()
+        ordered = sorted(latencies)
+        p95 = ordered[int(len(ordered) * 0.95) - 1]
+        print(f"{workers} arbeidere {len(latencies) / elapsed:8.1f} req/s  "
+              f"p50 {statistics.median(ordered) * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+suite.py
+Samlet ytelsessuite for PAD-pipelinen med lagring og regresjonssjekk.
+
+Dekker tre nivåer:
+
+- mikro: ``CodeGenAgent.generate_code``, ``QualityAssuranceAgent.validate_code``
+  (liten, stor og med funksjoner) og oppdatering av ``ContextAgent``
+- makro: ``OrchestratorAgent.process_request``
+- last: ``/generate`` via en in-process ASGI-klient med p50/p95/p99 og req/s
+- oppstart: import og første forespørsel i nye prosesser (``bench_startup``)
+
+Resultatene lagres som JSON. ``compare`` feiler hvis en måling er tregere
+enn baseline med mer enn en gitt terskel.
+
+Kjøres med::
+
+    python -m benchmarks run --output bench.json
+    python -m benchmarks run --baseline baseline.json --threshold 0.25
+    python -m benchmarks compare bench.json baseline.json
+"""
+import asyncio
+import json
+import logging
+import math
+import platform
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.bench_startup import startup_samples
+from pad.codegen_agent import CodeGenAgent
+from pad.context_agent import ContextAgent
+from pad.orchestrator import OrchestratorAgent
+from pad.qa_agent import QualityAssuranceAgent
+
+Result = Dict[str, float]
+
+SMALL_CODE = "print('hei')\n"
+DEF_CODE = '''import os
+
+
+def les(path):
+    """Leser en fil."""
+    with open(path) as fh:
+        return fh.read()+os.sep
+'''
+LARGE_CODE = "\n\n".join(
+    f"def funksjon_{i}(a, b):\n    resultat = a + b * {i}\n    return resultat" for i in range(200)
+) + "\n"
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Returnerer persentilen ``fraction`` (0–1) etter nearest-rank-metoden."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[float], elapsed: Optional[float] = None) -> Result:
+    """Lager et resultat (i millisekunder) fra målinger i sekunder."""
+    total = elapsed if elapsed is not None else sum(samples)
+    return {
+        "iterations": len(samples),
+        "mean_ms": sum(samples) / len(samples) * 1000,
+        "p50_ms": percentile(samples, 0.50) * 1000,
+        "p95_ms": percentile(samples, 0.95) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "ops_per_sec": len(samples) / total if total else 0.0,
+    }
+
+
+def time_calls(func: Callable[[int], object], iterations: int, warmup: int = 5) -> Result:
+    """
+    Kjører ``func(i)`` ``iterations`` ganger og måler hvert kall.
+
+    Oppvarmingen bruker indekser etter de målte, så kall som caches på
+    ``i`` (som kodegenereringens memo) ikke gir treff i målingen.
+    """
+    for i in range(iterations, iterations + warmup):
+        func(i)
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def micro_benchmarks(iterations: int) -> Dict[str, Result]:
+    codegen = CodeGenAgent()
+    context = ContextAgent()
+    qa_agent = QualityAssuranceAgent(cache_size=0)
+    return {
+        "codegen.generate_code": time_calls(
+            lambda i: codegen.generate_code(f"oppgave {i}", context), iterations),
+        "qa.validate_code.small": time_calls(
+            lambda i: qa_agent.validate_code(SMALL_CODE), iterations),
+        "qa.validate_code.def": time_calls(
+            lambda i: qa_agent.validate_code(DEF_CODE), iterations),
+        "qa.validate_code.large": time_calls(
+            lambda i: qa_agent.validate_code(LARGE_CODE), max(iterations // 10, 5)),
+        "context.update_context_from_code": time_calls(
+            lambda i: context.update_context_from_code(f"x = {i}"), iterations),
+    }
+
+
+def macro_benchmarks(iterations: int) -> Dict[str, Result]:
+    orchestrator = OrchestratorAgent()
+    try:
+        return {
+            "orchestrator.process_request": time_calls(
+                lambda i: orchestrator.process_request(f"oppgave {i}"), iterations),
+        }
+    finally:
+        orchestrator.close()
+
+
+async def _load(requests: int, concurrency: int) -> Result:
+    import httpx
+
+    from pad.api import app
+
+    samples: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i: int) -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/generate", json={"prompt": f"oppgave {i}"})
+                response.raise_for_status()
+                samples.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+    return summarize(samples, elapsed)
+
+
+def load_benchmarks(requests: int, concurrency: int) -> Dict[str, Result]:
+    return {"api.generate.load": asyncio.run(_load(requests, concurrency))}
+
+
+def startup_benchmarks(runs: int) -> Dict[str, Result]:
+    return {name: summarize(samples) for name, samples in startup_samples(runs).items()}
+
+
+def run_suite(quick: bool = False) -> Dict[str, Any]:
+    """
+    Kjører hele suiten.
+
+    Args:
+        quick (bool): Færre iterasjoner, for CI og lokale sjekker
+
+    Returns:
+        Dict[str, Any]: ``meta`` (plattform og tidspunkt) og ``results``
+    """
+    iterations = 50 if quick else 500
+    logging.disable(logging.INFO)
+    try:
+        results: Dict[str, Result] = {}
+        results.update(micro_benchmarks(iterations))
+        results.update(macro_benchmarks(iterations))
+        results.update(load_benchmarks(iterations * 2, 32))
+        results.update(startup_benchmarks(5 if quick else 20))
+    finally:
+        logging.disable(logging.NOTSET)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float = 0.2, metric: str = "p50_ms",
+            floor_ms: float = 0.01) -> List[str]:
+    """
+    Finner målinger som er tregere enn baseline med mer enn ``threshold``.
+
+    Args:
+        current (Dict[str, Any]): Resultat fra ``run_suite``
+        baseline (Dict[str, Any]): Lagret resultat å sammenligne mot
+        threshold (float): Tillatt relativ forverring, f.eks. 0.2 for 20 %
+        metric (str): Feltet som sammenlignes
+        floor_ms (float): Absolutt forverring som må overskrides i tillegg,
+            slik at støy på målinger under mikrosekundet ikke gir falsk alarm
+
+    Returns:
+        List[str]: Én beskrivelse per regresjon. Tom liste betyr OK.
+    """
+    regressions = []
+    for name, base in baseline["results"].items():
+        now = current["results"].get(name)
+        if now is None or not base.get(metric):
+            continue
+        change = now[metric] / base[metric] - 1
+        if change > threshold and now[metric] - base[metric] > floor_ms:
+            regressions.append(
+                f"{name}: {metric} {base[metric]:.3f} -> {now[metric]:.3f} ({change:+.0%})")
+    return regressions
+
+
+def format_results(data: Dict[str, Any]) -> str:
+    lines = [f"{'måling':<36} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>11}"]
+    for name, result in data["results"].items():
+        lines.append(f"{name:<36} {result['p50_ms']:9.3f} {result['p95_ms']:9.3f} "
+                     f"{result['p99_ms']:9.3f} {result['ops_per_sec']:11.1f}")
+    return "\n".join(lines)
+
+
+def load_json(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as fh:
+        data: Dict[str, Any] = json.load(fh)
+    return data
+
+
+def save_json(data: Dict[str, Any], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=2)
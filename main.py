@@ -1,20 +1,118 @@
-from pad.api import app  # FastAPI-app for REST API
-from pad.orchestrator import OrchestratorAgent
+import argparse
+import os
+import sys
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pad.orchestrator import OrchestratorAgent
+
+
+def run_batch(orchestrator: "OrchestratorAgent", args: argparse.Namespace) -> None:
+    """Kjører ``--batch`` og skriver statistikken til stderr."""
+    from pad.batch import Completed
+
+    done = Completed.load(args.output) if args.resume else None
+    source = sys.stdin if args.batch == "-" else open(args.batch, encoding="utf-8")
+    out = sys.stdout if args.output == "-" else open(
+        args.output, "a" if args.resume else "w", encoding="utf-8")
+    try:
+        stats = orchestrator.run_batch(source, out, workers=args.batch_workers,
+                                       max_in_flight=args.max_in_flight,
+                                       ordered=args.ordered, done=done,
+                                       timeout=args.timeout)
+    finally:
+        for stream in (source, out):
+            if stream not in (sys.stdin, sys.stdout):
+                stream.close()
+        orchestrator.close()
+    print(f"[PAD]: {stats['processed']} ferdige, {stats['failed']} feilet, "
+          f"{stats['skipped']} hoppet over", file=sys.stderr)
 
 
 def main() -> None:
     """
     Oppstartspunkt for PAD-systemet.
+
+    Webstakken (FastAPI, Pydantic og uvicorn) importeres bare med
+    ``--api``, slik at CLI-en og korte batch-kjøringer starter raskt.
+
+    ``--api`` alene starter utviklingsserveren med automatisk omlasting.
+    ``--api --workers N`` (N > 1) starter N uvicorn-prosesser uten
+    omlasting. Prosessene deler sesjonskontekst gjennom SQLite-lageret i
+    ``PAD_CONTEXT_STORE`` (standard ``.pad_context.sqlite``).
+
+    ``--snapshot STI`` gir varm start: CLI-en laster kontekstagenten fra
+    filen ved oppstart, lagrer den i bakgrunnen hvert
+    ``--checkpoint-interval`` sekund og en siste gang ved avslutning. Med
+    ``--api`` er STI en katalog med ett øyeblikksbilde per sesjon, og bare
+    én prosess er tillatt.
+
+    ``--batch FIL`` (``-`` for stdin) kjører forespørslene i filen uten
+    interaksjon og skriver ett JSON-resultat per linje til ``--output``.
+    ``--resume`` hopper over forespørsler som allerede står i utdatafilen, og
+    ``--timeout`` gir hver forespørsel en tidsfrist (se ``pad.deadline``).
     """
+    parser = argparse.ArgumentParser(description="Polyglot Agentic Developer")
+    parser.add_argument("--api", action="store_true", help="start REST-API-et")
+    parser.add_argument("--workers", type=int, default=1, help="antall API-prosesser")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--snapshot", help="øyeblikksbilde for varm start (katalog med --api)")
+    parser.add_argument("--checkpoint-interval", type=float, default=60.0,
+                        help="sekunder mellom lagringer av øyeblikksbildet")
+    parser.add_argument("--batch", metavar="FIL",
+                        help="kjør forespørslene i FIL (- for stdin) og skriv JSONL")
+    parser.add_argument("--output", default="-", help="utdatafil for --batch (- for stdout)")
+    parser.add_argument("--batch-workers", type=int, default=4,
+                        help="antall forespørsler som kjøres samtidig i --batch")
+    parser.add_argument("--max-in-flight", type=int,
+                        help="maks antall startede, ikke utskrevne forespørsler")
+    parser.add_argument("--ordered", action="store_true",
+                        help="skriv resultatene i input-rekkefølge")
+    parser.add_argument("--resume", action="store_true",
+                        help="fortsett en avbrutt --batch der --output slapp")
+    parser.add_argument("--timeout", type=float,
+                        help="tidsfrist i sekunder per forespørsel i --batch")
+    args = parser.parse_args()
+    if args.resume and args.output == "-":
+        parser.error("--resume krever --output FIL")
+    if args.api and args.snapshot and args.workers > 1:
+        parser.error("--snapshot med --api krever én prosess; med --workers deles "
+                     "konteksten gjennom PAD_CONTEXT_STORE")
+
+    if args.api:
+        import uvicorn
+        if args.snapshot:
+            os.environ["PAD_SNAPSHOT_DIR"] = args.snapshot
+            os.environ["PAD_CHECKPOINT_INTERVAL"] = str(args.checkpoint_interval)
+        if args.workers > 1:
+            os.environ["PAD_WORKERS"] = str(args.workers)
+            os.environ.setdefault("PAD_CONTEXT_STORE", ".pad_context.sqlite")
+            uvicorn.run("pad.api:app", host=args.host, port=args.port, workers=args.workers)
+        else:
+            uvicorn.run("pad.api:app", host=args.host, port=args.port, reload=True)
+        return
+
+    from pad.orchestrator import OrchestratorAgent
     orchestrator = OrchestratorAgent()
-    orchestrator.run()
+
+    def serve() -> None:
+        if args.batch:
+            run_batch(orchestrator, args)
+        else:
+            orchestrator.run()
+
+    if not args.snapshot:
+        serve()
+        return
+
+    from pad.snapshot import Checkpointer
+    agent = orchestrator.context_agent
+    if os.path.exists(args.snapshot):
+        agent.load_snapshot(args.snapshot)
+    with Checkpointer(lambda: [(args.snapshot, agent)], interval=args.checkpoint_interval):
+        serve()
 
 
 if __name__ == "__main__":
-    import sys
-    if "--api" in sys.argv:
-        import uvicorn
-        uvicorn.run("pad.api:app", host="0.0.0.0", port=8000, reload=True)
-    else:
-        orchestrator = OrchestratorAgent()
-        orchestrator.run()
+    main()
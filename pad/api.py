@@ -2,32 +2,458 @@
 API-endepunkter for PAD Framework via FastAPI.
 Gir REST-baserte grensesnitt for å samhandle med agentene.
 """
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+import atexit
+import hashlib
+import hmac
+import json
+import logging
+import os
+from typing import (TYPE_CHECKING, Any, AsyncIterator, Dict, Iterator, List, Literal, Optional,
+                    Tuple)
+
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from pad.context_agent import ContextAgent
+from pad.context_store import store_from_env
+from pad.deadline import Deadline
+from pad.jobs import Job, JobQueue, QueueFullError
+from pad.metrics import Sample, metrics
 from pad.orchestrator import OrchestratorAgent
+from pad.profiling import MAX_SECONDS, MemoryTracker, StackSampler, collapse
+from pad.sessions import SessionStore
+
+if TYPE_CHECKING:
+    from pad.snapshot import Checkpointer
+
+MAX_BATCH_SIZE = 1000
+DEFAULT_SESSION = "default"
+SESSION_HISTORY_BYTES = 256 * 1024
+# Tidsfrist for forespørsler som ikke oppgir ``timeout`` selv (sekunder, tom = ingen)
+DEFAULT_TIMEOUT = float(os.environ["PAD_REQUEST_TIMEOUT"]) if os.environ.get(
+    "PAD_REQUEST_TIMEOUT") else None
 
 app = FastAPI(
     title="Polyglot Agentic Developer API",
     description="REST API for PAD-agentrammeverket",
     version="0.1.0"
 )
-orchestrator = OrchestratorAgent()
+# Tester i generert kode kjøres bare med PAD_RUN_TESTS=1: prompten styrer hva som
+# havner i koden, og sandkassen (pad/sandbox.py) isolerer ikke mot ondsinnet kode
+orchestrator = OrchestratorAgent(run_tests=os.environ.get("PAD_RUN_TESTS") == "1")
+# Med flere arbeiderprosesser (main.py --workers) deles konteksten via lageret
+context_store = store_from_env()
+# Antall uvicorn-prosesser (settes av main.py --workers). Jobbkøen er per prosess
+WORKER_PROCESSES = int(os.environ.get("PAD_WORKERS", "1"))
+# Katalog med ett øyeblikksbilde per sesjon, for varm start etter omstart. Bare med én
+# prosess; ellers skriver prosessene over hverandres fil for samme sesjon
+snapshot_dir = os.environ.get("PAD_SNAPSHOT_DIR")
+if snapshot_dir is not None and WORKER_PROCESSES > 1:
+    logging.warning("PAD_SNAPSHOT_DIR ignoreres med %d prosesser; konteksten deles "
+                    "gjennom PAD_CONTEXT_STORE", WORKER_PROCESSES)
+    snapshot_dir = None
+checkpointer: Optional["Checkpointer"] = None
+
+
+def snapshot_path(session_id: str) -> str:
+    """Filen sesjonens øyeblikksbilde lagres i (ID-en hashes til et trygt filnavn)."""
+    assert snapshot_dir is not None
+    digest = hashlib.blake2b(session_id.encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(snapshot_dir, f"{digest}.padsnap")
+
+
+def new_session(session_id: str) -> OrchestratorAgent:
+    """Lager en sesjon som deler de tunge agentene med ``orchestrator``."""
+    context_agent = ContextAgent(history_bytes=SESSION_HISTORY_BYTES,
+                                 store=context_store, session_id=session_id)
+    if snapshot_dir is not None and os.path.exists(snapshot_path(session_id)):
+        context_agent.load_snapshot(snapshot_path(session_id))
+    return orchestrator.fork(context_agent)
+
+
+def evict_session(session_id: str, session: OrchestratorAgent) -> None:
+    """Rydder lagret tilstand for en sesjon sesjonslageret kaster ut."""
+    # Med flere prosesser kan en annen prosess fortsatt bruke sesjonen i lageret
+    if context_store is not None and WORKER_PROCESSES == 1:
+        context_store.delete(session_id)
+    if checkpointer is not None:
+        checkpointer.discard(snapshot_path(session_id))
+
+
+sessions = SessionStore(
+    new_session,
+    max_sessions=int(os.environ.get("PAD_MAX_SESSIONS", "10000")),
+    ttl=float(os.environ.get("PAD_SESSION_TTL", "1800")),
+    keyed=True,
+    on_evict=evict_session,
+)
+
+
+def snapshot_targets() -> List[Tuple[str, ContextAgent]]:
+    """Øyeblikksbildene checkpointeren skal holde oppdatert: alle levende sesjoner."""
+    return [(snapshot_path(o.context_agent.session_id), o.context_agent)
+            for o in sessions.values()]
+
+
+if snapshot_dir is not None:
+    import pad.snapshot
+
+    os.makedirs(snapshot_dir, exist_ok=True)
+    checkpointer = pad.snapshot.Checkpointer(
+        snapshot_targets, interval=float(os.environ.get("PAD_CHECKPOINT_INTERVAL", "60")))
+    checkpointer.start()
+    atexit.register(checkpointer.stop)
+
+
+def run_job(job: Job) -> Dict[str, Any]:
+    """Kjører en jobb fra jobbkøen i jobbens sesjon; fristen regnes fra jobben starter."""
+    session = sessions.get(job.session_id or DEFAULT_SESSION)
+    return session.process_request(job.prompt, job.use_cache,
+                                   Deadline.after(job.timeout or DEFAULT_TIMEOUT))
+
+
+jobs = JobQueue(
+    run_job,
+    workers=int(os.environ.get("PAD_JOB_WORKERS", "4")),
+    max_depth=int(os.environ.get("PAD_JOB_QUEUE_DEPTH", "1000")),
+    result_ttl=float(os.environ.get("PAD_JOB_RESULT_TTL", "600")),
+)
+
+
+def collect_metrics() -> Iterator[Sample]:
+    """Leverer cache-, kø-, underprosess- og sesjonstellere til ``/metrics``."""
+    qa_agent = orchestrator.qa_agent
+    if qa_agent.cache is not None:
+        cache = qa_agent.cache.stats()
+        for name in ("hits", "misses", "disk_hits", "invalidations"):
+            yield (f"pad_qa_cache_{name}_total", "counter",
+                   f"Valideringscache: {name}.", cache[name])
+        yield ("pad_qa_cache_size", "gauge", "Rapporter i valideringscachen.", cache["size"])
+    for stage, pending in orchestrator.pending.items():
+        yield (f"pad_{stage}_queue_depth", "gauge",
+               f"Jobber som venter eller kjører i {stage}-poolen.", pending)
+    memo = orchestrator.codegen_agent.memo
+    if memo is not None:
+        yield ("pad_codegen_memo_hits_total", "counter", "Treff i kodegenereringscachen.",
+               memo.hits)
+        yield ("pad_codegen_memo_misses_total", "counter", "Bom i kodegenereringscachen.",
+               memo.misses)
+        yield ("pad_codegen_memo_size", "gauge", "Genereringer i cachen.", len(memo))
+    workers = sum(pool.workers for pool in (qa_agent.lint_pool, qa_agent._batch_pool)
+                  if pool is not None)
+    yield ("pad_lint_worker_processes", "gauge", "Lint-arbeidsprosesser som kjører.", workers)
+    for lane, depth in jobs.depth().items():
+        yield (f"pad_jobs_{lane}", "gauge", f"Jobber i køen: {lane}.", depth)
+    for name, count in jobs.counters.items():
+        yield (f"pad_jobs_{name}_total", "counter", f"Jobber: {name}.", count)
+    yield ("pad_sessions_live", "gauge", "Sesjoner i minnet.", len(sessions))
+    yield ("pad_sessions_created_total", "counter", "Sesjoner opprettet.", sessions.created)
+    yield ("pad_sessions_evicted_total", "counter", "Sesjoner kastet ut.", sessions.evicted)
+
+
+metrics.register_collector(collect_metrics)
+
 
 class UserRequest(BaseModel):
     prompt: str
+    session_id: Optional[str] = None
+    use_cache: bool = True
+    timeout: Optional[float] = Field(default=None, gt=0)
+
 
 class CodeResponse(BaseModel):
     code: str
     feedback: str
+    skipped: List[str] = []
+    partial: bool = False
+
+
+class SessionStats(BaseModel):
+    live_sessions: int
+    max_sessions: int
+    created: int
+    evicted: int
+    memory_bytes_total: int
+    memory_bytes_avg: float
+    memory_bytes_max: int
+
+
+def session_for(request: UserRequest, header_session: Optional[str]) -> OrchestratorAgent:
+    """
+    Velger sesjonens orkestrator fra ``session_id`` i body eller
+    ``X-PAD-Session``-headeren. Uten noen av dem brukes en felles sesjon.
+    """
+    return sessions.get(request.session_id or header_session or DEFAULT_SESSION)
+
+
+class JobRequest(BaseModel):
+    prompt: str
+    session_id: Optional[str] = None
+    use_cache: bool = True
+    priority: Literal["high", "normal", "low"] = "normal"
+    timeout: Optional[float] = Field(default=None, gt=0)
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str
+    priority: str
+    created: float
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    error: Optional[str] = None
+
+
+class BatchValidationRequest(BaseModel):
+    codes: List[str]
+
+
+class BatchValidationResponse(BaseModel):
+    results: List[str]
+
 
 @app.post("/generate", response_model=CodeResponse)
-def generate_code(request: UserRequest):
+async def generate_code(
+    request: UserRequest,
+    x_pad_session: Optional[str] = Header(default=None),
+) -> CodeResponse:
     """
     Ta imot brukerprompt og returner generert kode + QA-feedback.
+
+    Kjører async, slik at forespørselen ikke holder en tråd fra Starlettes
+    tråd-pool mens kodegenerering og QA pågår. Konteksten er per sesjon.
+
+    ``timeout`` (eller ``PAD_REQUEST_TIMEOUT``) gir en tidsfrist i sekunder.
+    Trinn som ikke rekker den, hoppes over og listes i ``skipped``; rekker
+    ikke kodegenereringen fristen, svares det 504.
     """
-    plan = orchestrator.plan(request.prompt)
-    code = orchestrator.codegen_agent.generate_code(plan, orchestrator.context_agent)
-    if not code:
+    session = session_for(request, x_pad_session)
+    deadline = Deadline.after(request.timeout or DEFAULT_TIMEOUT)
+    try:
+        result = await session.process_request_async(
+            request.prompt, request.use_cache, deadline)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if not result["code"]:
+        if "codegen" in result.get("skipped", ()):
+            raise HTTPException(status_code=504, detail=result["feedback"])
         raise HTTPException(status_code=400, detail="Kunne ikke generere kode.")
-    feedback = orchestrator.qa_agent.validate_code(code)
-    return CodeResponse(code=code, feedback=feedback)
+    return CodeResponse(**result)
+
+
+@app.post("/generate/stream")
+async def generate_code_stream(
+    request: UserRequest,
+    x_pad_session: Optional[str] = Header(default=None),
+) -> StreamingResponse:
+    """
+    Strøm generert kode som server-sent events.
+
+    Sender én ``code``-hendelse per kodebit etter hvert som den genereres,
+    og en avsluttende ``feedback``-hendelse med QA-resultatet. Data er
+    JSON-kodet slik at linjeskift i koden bevares.
+
+    ``timeout`` (eller ``PAD_REQUEST_TIMEOUT``) virker som i ``/generate``,
+    men statuskoden er allerede sendt: et trinn som ikke rekker fristen,
+    meldes i ``feedback``-hendelsen.
+    """
+    session = session_for(request, x_pad_session)
+    deadline = Deadline.after(request.timeout or DEFAULT_TIMEOUT)
+
+    async def events() -> AsyncIterator[str]:
+        async for event, data in session.process_request_stream(request.prompt, deadline):
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/jobs", response_model=JobStatus, status_code=202)
+def submit_job(
+    request: JobRequest,
+    x_pad_session: Optional[str] = Header(default=None),
+) -> JobStatus:
+    """
+    Legg en generering i jobbkøen og returner jobb-ID med en gang.
+
+    Når køen er full, svares det 429 med ``Retry-After`` i stedet for at
+    forespørselen blir liggende og vente.
+    """
+    _require_job_queue()
+    try:
+        job = jobs.submit(request.prompt, request.session_id or x_pad_session,
+                          request.use_cache, request.priority, request.timeout)
+    except QueueFullError as exc:
+        raise HTTPException(status_code=429, detail=str(exc),
+                            headers={"Retry-After": str(int(exc.retry_after + 0.5))})
+    return JobStatus(**job.to_dict())
+
+
+def _require_job_queue() -> None:
+    # En jobb lagt inn i én prosess kan ikke hentes fra en annen; svar heller ærlig
+    if WORKER_PROCESSES > 1:
+        raise HTTPException(
+            status_code=503,
+            detail="Jobbkøen er per prosess og er slått av med flere arbeiderprosesser "
+                   "(--workers). Bruk /generate.")
+
+
+def _get_job(job_id: str) -> Job:
+    _require_job_queue()
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ukjent eller utløpt jobb.")
+    return job
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+def job_status(job_id: str) -> JobStatus:
+    """
+    Returner status for en jobb.
+    """
+    return JobStatus(**_get_job(job_id).to_dict())
+
+
+@app.get("/jobs/{job_id}/result", response_model=CodeResponse)
+def job_result(job_id: str) -> CodeResponse:
+    """
+    Returner resultatet for en ferdig jobb, eller 409 hvis den ikke er ferdig.
+    """
+    job = _get_job(job_id)
+    if job.result is None:
+        raise HTTPException(status_code=409, detail=f"Jobben har status {job.status}.")
+    return CodeResponse(**job.result)
+
+
+@app.delete("/jobs/{job_id}", response_model=JobStatus)
+def cancel_job(job_id: str) -> JobStatus:
+    """
+    Avbryt en jobb som venter i køen. Jobber som kjører eller er ferdige gir 409.
+    """
+    job = _get_job(job_id)
+    if not jobs.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Jobben har status {job.status}.")
+    return JobStatus(**job.to_dict())
+
+
+@app.post("/validate/batch", response_model=BatchValidationResponse)
+def validate_batch(request: BatchValidationRequest) -> BatchValidationResponse:
+    """
+    Valider mange kodebiter i én forespørsel, fordelt over alle kjerner.
+
+    Resultatene returneres i samme rekkefølge som ``codes``. Koden analyseres
+    bare statisk; tester i kodebitene kjøres aldri.
+    """
+    if len(request.codes) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"For mange kodebiter (maks {MAX_BATCH_SIZE}).",
+        )
+    results = orchestrator.qa_agent.validate_many(request.codes)
+    return BatchValidationResponse(results=results)
+
+
+@app.get("/sessions/stats", response_model=SessionStats)
+def session_stats() -> SessionStats:
+    """
+    Returner antall levende sesjoner og minnebruk per sesjon.
+    """
+    return SessionStats(**sessions.stats())
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics() -> PlainTextResponse:
+    """
+    Eksporter latens per trinn, tellere og køstørrelser i Prometheus-format.
+    """
+    return PlainTextResponse(metrics.render_prometheus(),
+                             media_type="text/plain; version=0.0.4")
+
+
+# Feilsøking i en kjørende prosess. Rutene finnes bare når PAD_DEBUG_TOKEN er
+# satt, og ingenting samples eller spores før en av dem blir kalt.
+profiler = StackSampler()
+memory_tracker = MemoryTracker()
+
+
+def require_debug(token: Optional[str]) -> None:
+    """
+    Slipper bare gjennom kall med riktig ``X-PAD-Debug-Token``.
+
+    Uten ``PAD_DEBUG_TOKEN`` svarer debug-rutene 404, som om de ikke fantes.
+    """
+    expected = os.environ.get("PAD_DEBUG_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if token is None or not hmac.compare_digest(token.encode("utf-8"),
+                                                expected.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Ugyldig debug-token.")
+
+
+class MemoryStatus(BaseModel):
+    tracing: bool
+
+
+@app.post("/debug/profile/cpu", response_class=PlainTextResponse)
+def profile_cpu(
+    seconds: float = Query(default=5.0, gt=0, le=MAX_SECONDS),
+    idle: bool = False,
+    x_pad_debug_token: Optional[str] = Header(default=None),
+) -> PlainTextResponse:
+    """
+    Sampler stakkene til alle tråder i ``seconds`` sekunder.
+
+    Svaret er sammenslåtte stakker (én ``stakk antall`` per linje) som kan
+    gis rett til ``flamegraph.pl`` eller speedscope. Med flere
+    arbeiderprosesser profileres bare prosessen som svarer. Et nytt vindu
+    mens et kjører gir 409.
+    """
+    require_debug(x_pad_debug_token)
+    try:
+        stacks = profiler.sample(seconds, idle)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return PlainTextResponse(collapse(stacks), headers={"X-PAD-Samples": str(profiler.samples)})
+
+
+@app.post("/debug/memory/start", response_model=MemoryStatus)
+def memory_start(
+    frames: int = Query(default=1, ge=1, le=50),
+    x_pad_debug_token: Optional[str] = Header(default=None),
+) -> MemoryStatus:
+    """
+    Slår på tracemalloc og tar utgangspunktet ``/debug/memory/diff`` sammenligner med.
+    """
+    require_debug(x_pad_debug_token)
+    memory_tracker.start(frames)
+    return MemoryStatus(tracing=True)
+
+
+@app.get("/debug/memory/diff", response_class=PlainTextResponse)
+def memory_diff(
+    limit: int = Query(default=20, ge=1, le=1000),
+    key_type: Literal["lineno", "filename", "traceback"] = "lineno",
+    reset: bool = False,
+    x_pad_debug_token: Optional[str] = Header(default=None),
+) -> PlainTextResponse:
+    """
+    Viser kodestedene med størst endring i minnebruk siden utgangspunktet.
+
+    Med ``reset=true`` blir dette øyeblikksbildet nytt utgangspunkt, slik at
+    gjentatte kall viser veksten mellom hvert kall.
+    """
+    require_debug(x_pad_debug_token)
+    try:
+        lines = memory_tracker.diff(limit, key_type, reset)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return PlainTextResponse("\n".join(lines) + "\n")
+
+
+@app.post("/debug/memory/stop", response_model=MemoryStatus)
+def memory_stop(x_pad_debug_token: Optional[str] = Header(default=None)) -> MemoryStatus:
+    """
+    Slår av tracemalloc igjen.
+    """
+    require_debug(x_pad_debug_token)
+    memory_tracker.stop()
+    return MemoryStatus(tracing=False)
@@ -0,0 +1,234 @@
+"""
+batch.py
+Ikke-interaktiv batch-kjøring av forespørsler med JSONL-utdata.
+
+Forespørslene leses lat, én per linje, fra en fil eller stdin, og kjøres på
+en tråd-pool. Antall forespørsler som er startet men ikke skrevet ut, er
+begrenset av ``max_in_flight``, så minnebruken er den samme for ti som for
+ti millioner linjer. Hvert resultat skrives som én JSON-linje og flushes
+med en gang, enten i fullføringsrekkefølge eller (med ``ordered``) i samme
+rekkefølge som input. I ordnet modus holdes ferdige resultater tilbake til
+alle tidligere er skrevet; de teller med i ``max_in_flight``.
+
+En linje er enten ren tekst eller et JSON-objekt med ``prompt`` og
+eventuelt ``id``. Tomme linjer hoppes over. Hver forespørsel får en
+``index`` (nummeret blant de ikke-tomme linjene). Et JSON-objekt uten
+``prompt`` gir en resultatlinje med ``error``, som en forespørsel som
+feiler, i stedet for å stoppe batchen. Utdatafilen kan
+gjenopptas: ``Completed.load`` leser indeksene som allerede er skrevet,
+fjerner en halvskrevet siste linje, og ``run_batch`` hopper over dem.
+
+Classes:
+    Prompt: Én forespørsel med posisjon og eventuell id.
+    Completed: Mengde av fullførte indekser med konstant minnebruk.
+
+Functions:
+    read_prompts: Leser forespørsler lat fra linjer.
+    run_batch: Kjører forespørsler parallelt og skriver JSONL.
+
+Example:
+    >>> import io, sys
+    >>> from pad.batch import read_prompts, run_batch
+    >>> run_batch(lambda prompt: {"code": prompt.upper(), "feedback": "OK"},
+    ...           read_prompts(io.StringIO("hei\\npå deg\\n")), sys.stdout, ordered=True)
+    {"index": 0, "prompt": "hei", "code": "HEI", "feedback": "OK"}
+    {"index": 1, "prompt": "på deg", "code": "PÅ DEG", "feedback": "OK"}
+    {'processed': 2, 'failed': 0, 'skipped': 0}
+"""
+import json
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, NamedTuple, Optional, Set
+
+Process = Callable[[str], Dict[str, Any]]
+
+
+class Prompt(NamedTuple):
+    """Én forespørsel i en batch; ``position`` blir ``index`` i resultatlinjen."""
+
+    position: int
+    prompt: str
+    id: Optional[Any] = None
+    error: Optional[str] = None
+
+
+def read_prompts(lines: Iterable[str]) -> Iterator[Prompt]:
+    """
+    Leser forespørsler lat, én per ikke-tom linje.
+
+    Args:
+        lines (Iterable[str]): Linjer, for eksempel en åpen fil eller ``sys.stdin``
+
+    Yields:
+        Prompt: Forespørslene i input-rekkefølge. Et JSON-objekt som mangler
+        ``prompt``, gir en ``Prompt`` med ``error`` satt.
+    """
+    index = 0
+    for number, line in enumerate(lines, 1):
+        text = line.strip()
+        if not text:
+            continue
+        ident = error = None
+        if text.startswith("{"):
+            try:
+                record = json.loads(text)
+            except ValueError:
+                record = None
+            if isinstance(record, dict):
+                ident = record.get("id")
+                if isinstance(record.get("prompt"), str):
+                    text = record["prompt"]
+                else:
+                    error = f"ValueError: Linje {number}: JSON-objektet mangler 'prompt'"
+        yield Prompt(index, text, ident, error)
+        index += 1
+
+
+class Completed:
+    """
+    Mengde av fullførte indekser med konstant minnebruk.
+
+    Indeksene fullføres nesten i rekkefølge, så mengden lagres som et
+    vannmerke (alle indekser under er fullført) pluss de få indeksene over
+    det. Størrelsen er dermed begrenset av ``max_in_flight``, ikke av
+    antall forespørsler.
+
+    Example:
+        >>> done = Completed()
+        >>> for index in (0, 2, 1):
+        ...     done.add(index)
+        >>> done.watermark, 3 in done
+        (3, False)
+    """
+
+    def __init__(self) -> None:
+        self.watermark = 0
+        self._above: Set[int] = set()
+
+    def add(self, index: int) -> None:
+        """Markerer ``index`` som fullført."""
+        if index >= self.watermark:
+            self._above.add(index)
+            while self.watermark in self._above:
+                self._above.remove(self.watermark)
+                self.watermark += 1
+
+    def __contains__(self, index: object) -> bool:
+        return isinstance(index, int) and (index < self.watermark or index in self._above)
+
+    def __len__(self) -> int:
+        return self.watermark + len(self._above)
+
+    @classmethod
+    def load(cls, path: str) -> "Completed":
+        """
+        Leser fullførte indekser fra en delvis skrevet utdatafil.
+
+        En siste linje uten linjeskift (en krasj midt i en skriving) kuttes
+        bort, slik at videre skriving starter på en ny, hel linje.
+
+        Args:
+            path (str): JSONL-fil fra en tidligere ``run_batch``. Finnes den
+                ikke, er ingen indekser fullført.
+
+        Returns:
+            Completed: Indeksene som allerede har et resultat
+        """
+        done = cls()
+        if not os.path.exists(path):
+            return done
+        with open(path, "rb+") as fh:
+            end = 0
+            for line in fh:
+                if not line.endswith(b"\n"):
+                    break
+                end += len(line)
+                try:
+                    done.add(int(json.loads(line)["index"]))
+                except (ValueError, KeyError, TypeError):
+                    logging.warning("Hopper over ugyldig linje i %s", path)
+            fh.truncate(end)
+        return done
+
+
+def _run(process: Process, prompt: Prompt) -> Dict[str, Any]:
+    record: Dict[str, Any] = {"index": prompt.position}
+    if prompt.id is not None:
+        record["id"] = prompt.id
+    record["prompt"] = prompt.prompt
+    if prompt.error is not None:
+        record["error"] = prompt.error
+        return record
+    try:
+        result = process(prompt.prompt)
+    except Exception as e:
+        logging.exception("Forespørsel %d feilet", prompt.position)
+        record["error"] = f"{type(e).__name__}: {e}"
+    else:
+        record.update(result)
+    return record
+
+
+def run_batch(process: Process, prompts: Iterable[Prompt], out: IO[str], workers: int = 4,
+              max_in_flight: Optional[int] = None, ordered: bool = False,
+              done: Optional[Completed] = None) -> Dict[str, int]:
+    """
+    Kjører forespørsler parallelt og skriver ett JSON-resultat per linje.
+
+    Args:
+        process (Callable[[str], Dict[str, Any]]): Kjører én forespørsel,
+            typisk ``OrchestratorAgent.process_request``
+        prompts (Iterable[Prompt]): Forespørslene, se ``read_prompts``.
+            Leses bare så langt ``max_in_flight`` tillater.
+        out (IO[str]): Strømmen resultatene skrives til
+        workers (int): Antall tråder
+        max_in_flight (Optional[int]): Maks antall forespørsler som er
+            startet men ikke skrevet ut. Standard er ``2 * workers``.
+        ordered (bool): Skriv resultatene i input-rekkefølge
+        done (Optional[Completed]): Indekser som skal hoppes over (gjenopptak)
+
+    Returns:
+        Dict[str, int]: Antall ``processed``, ``failed`` og ``skipped``
+
+    Note:
+        En forespørsel som feiler, stopper ikke batchen; resultatlinjen får
+        et ``error``-felt i stedet for ``code`` og ``feedback``.
+    """
+    limit = max(1, max_in_flight or 2 * workers)
+    done = done if done is not None else Completed()
+    stats = {"processed": 0, "failed": 0, "skipped": 0}
+    pending: Dict["Future[Dict[str, Any]]", int] = {}
+    ready: Dict[int, Dict[str, Any]] = {}
+    submitted = written = 0
+
+    def write(record: Dict[str, Any]) -> None:
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+        stats["failed" if "error" in record else "processed"] += 1
+
+    items = iter(prompts)
+    with ThreadPoolExecutor(workers, thread_name_prefix="pad-batch") as executor:
+        while True:
+            while len(pending) + len(ready) < limit:
+                prompt = next(items, None)
+                if prompt is None:
+                    break
+                if prompt.position in done:
+                    stats["skipped"] += 1
+                    continue
+                pending[executor.submit(_run, process, prompt)] = submitted
+                submitted += 1
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                sequence = pending.pop(future)
+                if ordered:
+                    ready[sequence] = future.result()
+                else:
+                    write(future.result())
+            while written in ready:
+                write(ready.pop(written))
+                written += 1
+    return stats
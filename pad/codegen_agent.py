@@ -18,7 +18,12 @@ Example:
     >>> context = ContextAgent()
     >>> code = agent.generate_code("lag en funksjon som returnerer sum", context)
 """
+from typing import Iterator, Optional, Tuple
+
 from .context_agent import ContextAgent
+from .deadline import Deadline
+from .model_backend import ModelBackend, backend_from_env
+from .utils import LRUCache
 
 
 class CodeGenAgent:
@@ -36,14 +41,41 @@ class CodeGenAgent:
         - Optimalisere kodeytelse
         - Opprettholde kodestil og konvensjoner
 
+    Generert kode huskes i en LRU med levetid, nøklet på oppgaveteksten og
+    kontekstens fingeravtrykk (``ContextSnapshot.fingerprint``). Når
+    konteksten endres, endres fingeravtrykket, og gamle oppføringer brukes
+    ikke lenger. Cachen deles mellom alle sesjoner som bruker agenten.
+
+    Selve genereringen gjøres av en ModelBackend (se ``pad/model_backend.py``).
+    Standard er DemoBackend, eller HTTPModelBackend når ``PAD_MODEL_URL`` er satt.
+
+    Attributes:
+        backend (ModelBackend): Modell-backenden som genererer koden
+        memo (Optional[LRUCache[str]]): Cache for generert kode, eller None
+
     Example:
         >>> agent = CodeGenAgent()
         >>> context = ContextAgent()
         >>> code = agent.generate_code("lag en REST API endpoint", context)
     """
 
-    def generate_code(self, task_description: str,
-                      context_agent: ContextAgent) -> str:
+    def __init__(self, memo_size: int = 1024, memo_ttl: Optional[float] = 600.0,
+                 backend: Optional[ModelBackend] = None) -> None:
+        """
+        Args:
+            backend (Optional[ModelBackend]): Modell-backend. Standard velges
+                med ``backend_from_env``.
+            memo_size (int): Antall genereringer som huskes. 0 slår av cachen.
+            memo_ttl (Optional[float]): Sekunder en generering huskes, eller
+                None for ingen grense
+        """
+        self.backend = backend or backend_from_env()
+        self.memo: Optional[LRUCache[str]] = None
+        if memo_size > 0:
+            self.memo = LRUCache(memo_size, memo_ttl)
+
+    def generate_code(self, task_description: str, context_agent: ContextAgent,
+                      use_cache: bool = True, deadline: Optional[Deadline] = None) -> str:
         """
         Genererer kode basert på en oppgavebeskrivelse og kontekst.
 
@@ -55,10 +87,18 @@ class CodeGenAgent:
             task_description (str): Beskrivelse av oppgaven i naturlig språk
             context_agent (ContextAgent): Agent som gir kontekstuell informasjon
                 om eksisterende kodebase, avhengigheter og konvensjoner
+            use_cache (bool): Slå opp i og lagre til cachen. False tvinger
+                en ny generering.
+            deadline (Optional[Deadline]): Forespørselens tidsfrist. Kallet
+                mot modellen (med nye forsøk) får bare tiden som er igjen.
 
         Returns:
             str: Generert kode som oppfyller oppgavebeskrivelsen
 
+        Raises:
+            DeadlineExceeded: Hvis fristen har gått ut før genereringen starter
+            TimeoutError: Hvis modellen ikke svarer før fristen
+
         Example:
             >>> agent = CodeGenAgent()
             >>> context = ContextAgent()
@@ -72,8 +112,50 @@ class CodeGenAgent:
             Nåværende implementasjon er en demo. I produksjon ville denne
             integrere med LLM-er for faktisk kodegenerering.
         """
-        # For demo: Returnerer et dummy-kodesnutt
-        context = context_agent.get_context()
-        return (f"# Generert kode for: {task_description}\n"
-                f"# Kontekst: {context}\nprint('Hei, verden!')")
+        if self.memo is None or not use_cache:
+            return self._generate(task_description, context_agent, deadline)
+        fingerprint = context_agent.snapshot().fingerprint
+        key: Tuple[str, str] = (task_description, fingerprint)
+        code = self.memo.get(key)
+        if code is None:
+            code = self._generate(task_description, context_agent, deadline)
+            # Endret konteksten seg underveis, vet vi ikke hvilken versjon koden bygger på
+            if context_agent.snapshot().fingerprint == fingerprint:
+                self.memo.put(key, code)
+        return code
+
+    def _generate(self, task_description: str, context_agent: ContextAgent,
+                  deadline: Optional[Deadline] = None) -> str:
+        context = context_agent.get_context(task_description)
+        if deadline is None:
+            return self.backend.generate(task_description, context)
+        deadline.check("codegen")
+        return self.backend.generate(task_description, context, deadline.remaining())
+
+    def generate_code_stream(self, task_description: str,
+                             context_agent: ContextAgent) -> Iterator[str]:
+        """
+        Genererer kode som en strøm av biter.
+
+        Gir de samme bitene som ``generate_code`` setter sammen, men etter
+        hvert som de produseres. Brukes av strømmende API-endepunkter slik at
+        klienten får de første bytene før hele koden er ferdig.
+
+        Args:
+            task_description (str): Beskrivelse av oppgaven i naturlig språk
+            context_agent (ContextAgent): Agent som gir kontekstuell informasjon
+
+        Yields:
+            str: Neste bit av den genererte koden
+
+        Example:
+            >>> agent = CodeGenAgent()
+            >>> for chunk in agent.generate_code_stream("hei", ContextAgent()):
+            ...     print(chunk, end="")
+        """
+        context = context_agent.get_context(task_description)
+        yield from self.backend.stream(task_description, context)
 
+    def close(self) -> None:
+        """Lukker backendens tilkoblinger."""
+        self.backend.close()
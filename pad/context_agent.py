@@ -7,8 +7,16 @@ Dette modulet inneholder ContextAgent, som fungerer som PAD-systemets
 "langtidsminne". Agenten opprettholder en intern modell av hele kodebasen,
 inkludert struktur, avhengigheter, API-er og designmønstre.
 
+Med en oppgavetekst setter ``get_context`` sammen konteksten fra de mest
+relevante tidligere kodebitene og indekserte symbolene, rangert med en
+vektorindeks (``pad.retrieval``) og begrenset til et tokenbudsjett.
+
+Tilstanden kan lagres med ``save_snapshot`` og lastes igjen med
+``load_snapshot`` (se ``pad.snapshot``), slik at en ny prosess starter varm.
+
 Classes:
     ContextAgent: Hovedklasse for kontekst- og kunnskapshåndtering.
+    ContextSnapshot: Uforanderlig øyeblikksbilde av ContextAgent-tilstanden.
 
 Example:
     >>> from pad.context_agent import ContextAgent
@@ -16,6 +24,63 @@ Example:
     >>> context.update_context("Python Flask prosjekt")
     >>> print(context.get_context())
 """
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from typing import TYPE_CHECKING, Dict, Hashable, List, NamedTuple, Optional, Tuple, Union
+
+from .history import DEFAULT_MAX_BYTES, CodeHistory
+
+if TYPE_CHECKING:
+    from .context_store import ContextStore
+    from .indexer import CodebaseIndexer
+    from .retrieval import VectorIndex
+
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_.]{2,}")
+
+# Antall nyeste kodebiter som tas med i hvert øyeblikksbilde
+SNAPSHOT_RECENT = 8
+
+# Standard tokenbudsjett og antall treff for get_context med oppgavetekst
+DEFAULT_CONTEXT_BUDGET = 1000
+DEFAULT_TOP_K = 10
+
+# Et indeksert element er enten en posisjon i kodehistorikken eller et symbol
+_Retrieved = Union[int, Dict[str, object]]
+
+
+def _tokens(text: str) -> int:
+    """Grovt anslag på antall tokens: omtrent fire tegn per token."""
+    return len(text) // 4 + 1
+
+
+class ContextSnapshot(NamedTuple):
+    """
+    Uforanderlig øyeblikksbilde av ContextAgent.
+
+    Attributes:
+        context (str): Konteksten på tidspunktet for bildet
+        version (int): Øker med én for hver skriving til agenten
+        recent (Tuple[str, ...]): De nyeste kodebitene, eldste først
+        fingerprint (str): Hash av alt ``get_context`` leser (kontekst,
+            innholdet i den lokale historikken og indeksgenerasjon).
+            Like fingeravtrykk gir lik kontekst, så det kan brukes som
+            cachenøkkel.
+    """
+
+    context: str
+    version: int
+    recent: Tuple[str, ...]
+    fingerprint: str
+
+
+def _fingerprint(context: str, index_state: str) -> str:
+    digest = hashlib.blake2b(context.encode("utf-8"), digest_size=8)
+    digest.update(b"\0" + index_state.encode("utf-8"))
+    return digest.hexdigest()
 
 
 class ContextAgent:
@@ -27,8 +92,20 @@ class ContextAgent:
     avhengigheter, API-definisjoner og designmønstre for å informere
     kodegenerering og beslutninger.
 
+    Lesing skjer fra et uforanderlig ContextSnapshot som byttes ut atomisk
+    ved hver skriving (copy-on-write). Lesere tar aldri en lås og ser aldri
+    halvveis oppdatert tilstand; skrivere serialiseres av én skrivelås.
+
     Attributes:
         context (str): Nåværende kontekstuell informasjon om kodebasen
+        code_history (CodeHistory): Generert kode, begrenset i minnet og
+            eventuelt skjøvet ut til disk
+        indexer (Optional[CodebaseIndexer]): Symbolindeks over kodebasen,
+            satt opp med ``index_codebase``
+        store (Optional[ContextStore]): Delt lager for kontekst og nyeste
+            kodebiter. Med lager skrives endringer dit, og ``snapshot``
+            laster på nytt når en annen prosess har skrevet.
+        session_id (str): Nøkkelen agentens tilstand har i lageret
 
     Capabilities:
         - Kodebase-kartlegging og -analyse
@@ -43,19 +120,179 @@ class ContextAgent:
         >>> current_context = context.get_context()
     """
 
-    def __init__(self) -> None:
+    def __init__(self, history_bytes: int = DEFAULT_MAX_BYTES,
+                 history_path: Optional[str] = None,
+                 store: Optional["ContextStore"] = None,
+                 session_id: str = "default") -> None:
         """
         Initialiserer ContextAgent med standard kontekst.
 
         Setter opp grunnleggende kontekstuell tilstand som kan utvides
         og oppdateres etter hvert som agenten lærer mer om kodebasen.
+
+        Args:
+            history_bytes (int): Byte-budsjett for kodehistorikken i minnet
+            history_path (Optional[str]): Append-only logg som eldre
+                kodebiter skyves ut til. Uten logg forkastes de.
+            store (Optional[ContextStore]): Delt kontekstlager, for flere
+                API-prosesser. Historikken forblir lokal for prosessen.
+            session_id (str): Sesjonen agenten hører til i lageret
+        """
+
+        self.code_history = CodeHistory(history_bytes, history_path)
+        self.indexer: Optional["CodebaseIndexer"] = None
+        self._write_lock = threading.Lock()
+        self._index_generation = 0
+        self._retrieval: Optional["VectorIndex[_Retrieved]"] = None
+        self._history_size = 0
+        # Løpende hash av alle kodebiter lagt i historikken, i rekkefølge
+        self._history_digest = ""
+        self._evicted = 0
+        # Sti -> (innholdshash, nøklene filens symboler har i vektorindeksen)
+        self._symbol_rows: Dict[str, Tuple[str, List[Hashable]]] = {}
+        self.store = store
+        self.session_id = session_id
+        self._snapshot = ContextSnapshot(
+            "Standard kontekst", 0, (), _fingerprint("Standard kontekst", ""))
+        if store is not None:
+            self._load(store.get(session_id))
+
+    @property
+    def context(self) -> str:
+        """Nåværende kontekst (fra siste øyeblikksbilde)."""
+        return self.snapshot().context
+
+    @context.setter
+    def context(self, new_context: str) -> None:
+        self.update_context(new_context)
+
+    def snapshot(self) -> ContextSnapshot:
+        """
+        Returnerer siste øyeblikksbilde uten å ta noen lås.
+
+        Alle felt i bildet hører til samme skriving, så kontekst, versjon
+        og nyeste kodebiter er alltid konsistente med hverandre. Med et
+        delt lager sjekkes først versjonen der, og bildet lastes på nytt
+        bare hvis en annen prosess har skrevet siden sist.
+
+        Returns:
+            ContextSnapshot: Uforanderlig bilde av tilstanden
+
+        Example:
+            >>> context = ContextAgent()
+            >>> context.snapshot().version
+            0
+        """
+        if self.store is not None and self.store.version(self.session_id) > self._snapshot.version:
+            with self._write_lock:
+                self._load(self.store.get(self.session_id))
+        return self._snapshot
+
+    def _load(self, stored: Tuple[str, int, Tuple[str, ...]]) -> None:
+        """Publiserer tilstand lest fra lageret, hvis den er nyere."""
+        context, version, recent = stored
+        if version > self._snapshot.version:
+            self._publish(context, recent, version)
+
+    def _publish(self, context: str, recent: Tuple[str, ...],
+                 version: Optional[int] = None) -> None:
+        """Publiserer et nytt øyeblikksbilde. Kalles med skrivelåsen holdt."""
+        # Historikken avgjør hvilke kodebiter get_context kan finne
+        index_state = f"{self._history_size}:{self._history_digest}"
+        if self.indexer is not None:
+            # Roten og indeksfilen er stabile på tvers av prosesser, i motsetning til id()
+            index_state += (f":{self.indexer.root}:{self.indexer.index_path}"
+                            f":{self._index_generation}")
+        if version is None:
+            version = self._snapshot.version + 1
+        self._snapshot = ContextSnapshot(context, version, recent,
+                                         _fingerprint(context, index_state))
+
+    def index_codebase(self, root: str, index_path: Optional[str] = None,
+                       changed_paths: Optional[List[str]] = None) -> Dict[str, float]:
+        """
+        Indekserer (eller re-indekserer) kodebasen under ``root``.
+
+        Første kall bygger symbolindeksen; senere kall parser bare filer
+        som er endret siden forrige gang.
+
+        Args:
+            root (str): Rotkatalogen for kodebasen
+            index_path (Optional[str]): Fil der indeksen lagres mellom kjøringer
+            changed_paths (Optional[List[str]]): Filer som er kjent endret;
+                da hoppes full ``stat`` av treet over
+
+        Returns:
+            Dict[str, float]: Statistikk fra ``CodebaseIndexer.update``
+
+        Example:
+            >>> context = ContextAgent()
+            >>> stats = context.index_codebase(".", ".pad_index.sqlite")
         """
+        from .indexer import CodebaseIndexer
+
+        fresh = self.indexer is None or self.indexer.root != os.path.abspath(root)
+        if fresh:
+            # Generasjonen nullstilles ikke, så en ny indeks over samme rot
+            # får aldri et gammelt fingeravtrykk
+            self.indexer = CodebaseIndexer(root, index_path)
+        assert self.indexer is not None
+        stats = self.indexer.update(changed_paths)
+        if stats["parsed"] or stats["removed"] or fresh:
+            # Symboltreff i get_context kan ha endret seg: nytt fingeravtrykk
+            with self._write_lock:
+                self._sync_symbols()
+                self._index_generation += 1
+                old = self._snapshot
+                # Versjonen følger lageret, så indeksering teller ikke som skriving der
+                self._publish(old.context, old.recent,
+                              old.version if self.store is not None else None)
+        return stats
+
+    def _index(self) -> "VectorIndex[_Retrieved]":
+        """Vektorindeksen, opprettet ved første bruk (NumPy lastes først da)."""
+        if self._retrieval is None:
+            from .retrieval import VectorIndex
 
-        self.context = "Standard kontekst"
-        self.code_history = []
+            self._retrieval = VectorIndex()
+        return self._retrieval
 
-    def get_context(self) -> str:
+    def _sync_symbols(self) -> None:
+        """Oppdaterer symbolene i vektorindeksen for filer med ny hash."""
+        assert self.indexer is not None
+        index = self._index()
+        files = self.indexer.files
+        for path in [p for p in self._symbol_rows if p not in files]:
+            for key in self._symbol_rows.pop(path)[1]:
+                index.remove(key)
+        for path, record in files.items():
+            old = self._symbol_rows.get(path)
+            if old is not None and old[0] == record["hash"]:
+                continue
+            for key in old[1] if old is not None else ():
+                index.remove(key)
+            keys: List[Hashable] = []
+            for name, kind, line in record["symbols"]:
+                key = ("symbol", path, name, line)
+                symbol: Dict[str, object] = {"name": name, "kind": kind, "path": path,
+                                             "line": line}
+                index.add(key, f"{name} {kind} {path}", symbol)
+                keys.append(key)
+            self._symbol_rows[path] = (record["hash"], keys)
 
+    def find_symbols(self, query: str, limit: int = 10) -> List[Dict[str, object]]:
+        """Slår opp identifikatorer fra ``query`` i symbolindeksen."""
+        if self.indexer is None:
+            return []
+        matches: List[Dict[str, object]] = []
+        for word in dict.fromkeys(_IDENTIFIER_RE.findall(query)):
+            matches.extend(self.indexer.find(word, limit - len(matches)))
+            if len(matches) >= limit:
+                break
+        return matches
+
+    def get_context(self, query: Optional[str] = None, budget: Optional[int] = None,
+                    top_k: int = DEFAULT_TOP_K) -> str:
         """
         Returnerer nåværende kontekst for kodegenerering.
 
@@ -63,6 +300,18 @@ class ContextAgent:
         ContextAgent har samlet om kodebasen. Denne informasjonen
         brukes av andre agenter for å informere deres beslutninger.
 
+        Med en oppgavetekst legges de ``top_k`` mest relevante tidligere
+        kodebitene og indekserte symbolene til, så langt de får plass i
+        ``budget``. Symboler som nevnes ved navn kommer først; resten
+        rangeres med cosinus-likhet i vektorindeksen. Treff som ikke får
+        plass hoppes over, slik at mindre treff lenger ned kan tas med.
+
+        Args:
+            query (Optional[str]): Oppgavetekst å rangere kodebiter og symboler mot
+            budget (Optional[int]): Omtrentlig antall tokens hele konteksten
+                kan bruke (fire tegn per token). Standard er 1000.
+            top_k (int): Maks antall kodebiter og symboler som tas med
+
         Returns:
             str: Nåværende kontekstuell informasjon om kodebasen
 
@@ -72,7 +321,46 @@ class ContextAgent:
             >>> print(current_context)
             Standard kontekst
         """
-        return self.context
+        context = self.snapshot().context
+        if query is None:
+            return context
+        remaining = (DEFAULT_CONTEXT_BUDGET if budget is None else budget) - _tokens(context)
+        sections: Dict[str, List[str]] = {"Relevante symboler:": [], "Relevante kodebiter:": []}
+        seen = set()
+        for item in self._ranked(query, top_k):
+            if isinstance(item, int):
+                text = self.code_history.get(item)
+                if text is None:
+                    continue
+                header, key = "Relevante kodebiter:", text
+            else:
+                text = f"- {item['kind']} {item['name']} ({item['path']}:{item['line']})"
+                header, key = "Relevante symboler:", text
+            if key in seen:
+                continue
+            lines = sections[header]
+            cost = _tokens(text) + (0 if lines else _tokens(header))
+            if cost > remaining:
+                continue
+            seen.add(key)
+            remaining -= cost
+            lines.append(text)
+            if len(seen) >= top_k:
+                break
+        parts = [context]
+        for header, lines in sections.items():
+            if lines:
+                separator = "\n\n" if header == "Relevante kodebiter:" else "\n"
+                parts.append(header + "\n" + separator.join(lines))
+        return "\n".join(parts)
+
+    def _ranked(self, query: str, top_k: int) -> List[_Retrieved]:
+        """Symboler nevnt ved navn, så treff fra vektorindeksen, best først."""
+        ranked: List[_Retrieved] = list(self.find_symbols(query, top_k))
+        if self._retrieval is not None:
+            # Litt ekstra, siden noen treff kan være duplikater eller for store
+            ranked.extend(item for _, item in self._retrieval.search(query, 2 * top_k))
+        return ranked
 
     def update_context(self, new_context: str) -> None:
         """
@@ -95,8 +383,180 @@ class ContextAgent:
             merging av ny kontekst med eksisterende kunnskap.
         """
 
-        self.context = new_context
+        if self.store is not None:
+            stored = self.store.update(self.session_id,
+                                       lambda context, recent: (new_context, recent))
+            with self._write_lock:
+                self._load(stored)
+            return
+        with self._write_lock:
+            self._publish(new_context, self._snapshot.recent)
+
+    def save_snapshot(self, path: str) -> int:
+        """
+        Lagrer kontekst, kodehistorikk og vektorindeks i et øyeblikksbilde.
+
+        Skrivelåsen holdes bare mens referanser og lister kopieres; arrayene
+        bygges og skrives til disk etterpå. Symbolindeksen lagres ikke på
+        nytt, men bildet peker til ``index_path`` den allerede ligger i.
+
+        Args:
+            path (str): Filen bildet skrives til (atomisk)
+
+        Returns:
+            int: Antall byte skrevet
+
+        Example:
+            >>> context = ContextAgent()
+            >>> context.update_context("Flask-prosjekt")
+            >>> size = context.save_snapshot("/tmp/pad_context.snap")
+        """
+        from .snapshot import pack_strings, write_snapshot
+
+        with self._write_lock:
+            snapshot = self._snapshot
+            entries, memory_bytes, dropped, spilled = self.code_history.export()
+            index = self._retrieval.state() if self._retrieval is not None else None
+            meta: Dict[str, object] = {
+                "kind": "context_agent",
+                "context": snapshot.context,
+                "version": snapshot.version,
+                "recent": list(snapshot.recent),
+                "memory_bytes": memory_bytes,
+                "dropped": dropped,
+                "spilled": spilled,
+                "history_size": self._history_size,
+                "history_digest": self._history_digest,
+                "evicted": self._evicted,
+                "symbol_rows": dict(self._symbol_rows),
+                "indexer": None,
+            }
+            if self.indexer is not None and self.indexer.index_path is not None:
+                meta["indexer"] = [self.indexer.root, self.indexer.index_path,
+                                   self._index_generation]
+        arrays = dict(zip(("history_data", "history_offsets"), pack_strings(entries)))
+        if index is not None:
+            index_arrays, others = index.to_arrays()
+            arrays.update({f"index_{name}": array for name, array in index_arrays.items()})
+            # Kodebiter er rene heltall i arrayene; bare symbolene trenger JSON
+            arrays.update(zip(("symbols_data", "symbols_offsets"),
+                              pack_strings([json.dumps(others)])))
+            meta["index_buckets"] = index.buckets
+        return write_snapshot(path, meta, arrays)
+
+    def load_snapshot(self, path: str) -> None:
+        """
+        Laster tilstand fra ``save_snapshot``.
+
+        Filen minnekartlegges: postinglistene i vektorindeksen brukes rett
+        fra kartet og leses inn fra disk først når et søk trenger dem, så
+        lastetiden avhenger lite av størrelsen. Kodebitene i historikken
+        (begrenset av byte-budsjettet) dekodes med en gang.
+
+        Med et delt kontekstlager beholdes konteksten derfra; bare
+        historikk og indekser lastes.
+
+        Args:
+            path (str): Filen som skal lastes
+
+        Raises:
+            ValueError: Hvis filen ikke er et øyeblikksbilde av en ContextAgent
+
+        Example:
+            >>> context = ContextAgent()
+            >>> context.load_snapshot("/tmp/pad_context.snap")
+            >>> context.get_context()
+            'Flask-prosjekt'
+        """
+        from .indexer import CodebaseIndexer
+        from .retrieval import VectorIndex
+        from .snapshot import read_snapshot, unpack_strings
+
+        meta, arrays = read_snapshot(path)
+        if meta.get("kind") != "context_agent":
+            raise ValueError(f"{path} er ikke et øyeblikksbilde av en ContextAgent")
+        entries = unpack_strings(arrays["history_data"], arrays["history_offsets"])
+        retrieval: Optional["VectorIndex[_Retrieved]"] = None
+        if "index_alive" in arrays:
+            others = json.loads(
+                unpack_strings(arrays["symbols_data"], arrays["symbols_offsets"])[0])
+            retrieval = VectorIndex.from_arrays(
+                {name[6:]: array for name, array in arrays.items() if name.startswith("index_")},
+                [(row, tuple(key), item) for row, key, item in others], meta["index_buckets"])
+        indexer = None
+        if meta["indexer"] is not None and os.path.exists(meta["indexer"][1]):
+            indexer = CodebaseIndexer(meta["indexer"][0], meta["indexer"][1])
+
+        with self._write_lock:
+            self.code_history.restore(entries, meta["memory_bytes"], meta["dropped"],
+                                      meta["spilled"])
+            self._retrieval = retrieval
+            self._history_size = meta["history_size"]
+            self._history_digest = meta.get("history_digest", "")
+            self._evicted = meta["evicted"]
+            self._symbol_rows = {path: (digest, [tuple(key) for key in keys])
+                                 for path, (digest, keys) in meta["symbol_rows"].items()}
+            if indexer is not None:
+                self.indexer = indexer
+                self._index_generation = meta["indexer"][2]
+            old = self._snapshot
+            if self.store is None:
+                self._publish(meta["context"], tuple(meta["recent"]),
+                              max(meta["version"], old.version + 1))
+            else:
+                self._publish(old.context, old.recent, old.version)
+
+    def memory_usage(self) -> int:
+        """
+        Omtrentlig antall byte denne agentens tilstand holder i minnet.
+
+        Returns:
+            int: Kontekststrengen, kodehistorikken i minnet og vektorindeksen
+        """
+        index_bytes = self._retrieval.nbytes if self._retrieval is not None else 0
+        return (sys.getsizeof(self._snapshot.context) + self.code_history.memory_bytes
+                + index_bytes)
+
+    def update_context_from_code(self, code: str) -> None:
+        """
+        Registrerer generert kode i historikken og oppdaterer konteksten.
+
+        Historikk og kontekst oppdateres under skrivelåsen, og det nye
+        øyeblikksbildet publiseres først når begge er på plass. Med et
+        delt lager skjer kontekstoppdateringen som én transaksjon der,
+        mens historikken forblir lokal for prosessen.
+
+        Kodebiten legges også i vektorindeksen, slik at ``get_context`` kan
+        finne den igjen så lenge historikken har den i minnet.
+
+        Args:
+            code (str): Nylig generert kode
+        """
+        def updater(context: str, recent: Tuple[str, ...]) -> Tuple[str, Tuple[str, ...]]:
+            return f"Seneste kodeblokk: {code[:40]}...", (recent + (code,))[-SNAPSHOT_RECENT:]
+
+        if self.store is not None:
+            stored = self.store.update(self.session_id, updater)
+            with self._write_lock:
+                self._remember(code)
+                self._load(stored)
+            return
+        with self._write_lock:
+            old = self._snapshot
+            self._remember(code)
+            self._publish(*updater(old.context, old.recent))
 
-    def update_context_from_code(self, code: str):
-        self.code_history.append(code)
-        self.context = f"Seneste kodeblokk: {code[:40]}..."
+    def _remember(self, code: str) -> None:
+        """Legger kodebiten i historikk og vektorindeks. Kalles med skrivelåsen holdt."""
+        position = self.code_history.append(code)
+        index = self._index()
+        index.add(position, code, position)
+        # Indeksen følger historikkens byte-budsjett: utskjøvne kodebiter tas ut
+        evicted = self.code_history.dropped + self.code_history.spilled
+        for old in range(self._evicted, evicted):
+            index.remove(old)
+        self._evicted = evicted
+        self._history_size = position + 1
+        digest = hashlib.blake2b(self._history_digest.encode("ascii"), digest_size=8)
+        digest.update(code.encode("utf-8"))
+        self._history_digest = digest.hexdigest()
@@ -0,0 +1,203 @@
+"""
+context_store.py
+Delt lager for sesjonskontekst, slik at flere API-prosesser ser samme tilstand.
+
+Med flere uvicorn-arbeidere har hver prosess sine egne Python-objekter.
+Når en ContextAgent har et ContextStore, lagres konteksten og de nyeste
+kodebitene for sesjonen i lageret. Skriving skjer som en atomisk
+les-endre-skriv-transaksjon, og lesing sjekker først et versjonsnummer,
+slik at en prosess bare laster på nytt når en annen har skrevet.
+
+Classes:
+    ContextStore: Grensesnitt for kontekstlagre.
+    MemoryContextStore: Lager i minnet, for én prosess og tester.
+    SQLiteContextStore: SQLite i WAL-modus, delt mellom prosesser på samme maskin.
+
+Functions:
+    store_from_env: Velger lager ut fra ``PAD_CONTEXT_STORE``.
+
+Example:
+    >>> from pad.context_store import SQLiteContextStore
+    >>> store = SQLiteContextStore("/tmp/pad_context.sqlite")
+    >>> store.update("klient-a", lambda context, recent: ("Flask-prosjekt", recent))
+    ('Flask-prosjekt', 1, ())
+"""
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional, Tuple
+
+# (kontekst, versjon, nyeste kodebiter)
+StoredContext = Tuple[str, int, Tuple[str, ...]]
+Updater = Callable[[str, Tuple[str, ...]], Tuple[str, Tuple[str, ...]]]
+
+DEFAULT_CONTEXT = "Standard kontekst"
+
+
+class ContextStore(ABC):
+    """
+    Grensesnitt for kontekstlagre.
+
+    Versjonen for en sesjon starter på 0 og øker med én per ``update``.
+    API-et sletter en sesjon med ``delete`` når sesjonslageret kaster den
+    ut, så lenge det bare kjører én prosess.
+    """
+
+    @abstractmethod
+    def version(self, session_id: str) -> int:
+        """Returnerer gjeldende versjon for sesjonen (0 hvis den er ukjent)."""
+
+    @abstractmethod
+    def get(self, session_id: str) -> StoredContext:
+        """Returnerer (kontekst, versjon, nyeste kodebiter) for sesjonen."""
+
+    @abstractmethod
+    def update(self, session_id: str, updater: Updater) -> StoredContext:
+        """
+        Oppdaterer sesjonen atomisk.
+
+        Args:
+            session_id (str): Sesjonen som oppdateres
+            updater (Updater): Får (kontekst, nyeste) og returnerer nye verdier
+
+        Returns:
+            StoredContext: Tilstanden etter oppdateringen
+        """
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Sletter sesjonen fra lageret."""
+
+    def close(self) -> None:
+        """Frigjør tilkoblinger."""
+
+
+class MemoryContextStore(ContextStore):
+    """
+    Kontekstlager i minnet. Delt mellom agenter i samme prosess.
+
+    Example:
+        >>> store = MemoryContextStore()
+        >>> store.get("a")
+        ('Standard kontekst', 0, ())
+    """
+
+    def __init__(self) -> None:
+        self._data: Dict[str, StoredContext] = {}
+        self._lock = threading.Lock()
+
+    def version(self, session_id: str) -> int:
+        return self.get(session_id)[1]
+
+    def get(self, session_id: str) -> StoredContext:
+        return self._data.get(session_id, (DEFAULT_CONTEXT, 0, ()))
+
+    def update(self, session_id: str, updater: Updater) -> StoredContext:
+        with self._lock:
+            context, version, recent = self.get(session_id)
+            context, recent = updater(context, recent)
+            stored = (context, version + 1, tuple(recent))
+            self._data[session_id] = stored
+            return stored
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._data.pop(session_id, None)
+
+
+class SQLiteContextStore(ContextStore):
+    """
+    Kontekstlager i en SQLite-fil i WAL-modus.
+
+    WAL lar mange prosesser lese samtidig mens én skriver. Hver tråd får
+    sin egen tilkobling. ``update`` bruker ``BEGIN IMMEDIATE``, slik at
+    to prosesser som oppdaterer samme sesjon samtidig blir serialisert og
+    ingen oppdatering går tapt.
+
+    Attributes:
+        path (str): Sti til SQLite-filen
+        timeout (float): Sekunder å vente på skrivelåsen
+
+    Example:
+        >>> store = SQLiteContextStore(".pad_context.sqlite")
+        >>> store.version("klient-a")
+        0
+    """
+
+    def __init__(self, path: str, timeout: float = 10.0) -> None:
+        """
+        Args:
+            path (str): SQLite-fil som deles av alle prosessene
+            timeout (float): Sekunder å vente hvis en annen prosess skriver
+        """
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        db = self._connection()
+        with db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS contexts (session TEXT PRIMARY KEY, "
+                "version INTEGER NOT NULL, context TEXT NOT NULL, recent TEXT NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        db: Optional[sqlite3.Connection] = getattr(self._local, "db", None)
+        if db is None:
+            # Transaksjoner styres eksplisitt (BEGIN IMMEDIATE i update)
+            db = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def version(self, session_id: str) -> int:
+        row = self._connection().execute(
+            "SELECT version FROM contexts WHERE session = ?", (session_id,)).fetchone()
+        return 0 if row is None else int(row[0])
+
+    def get(self, session_id: str) -> StoredContext:
+        return self._read(self._connection(), session_id)
+
+    @staticmethod
+    def _read(db: sqlite3.Connection, session_id: str) -> StoredContext:
+        row = db.execute("SELECT context, version, recent FROM contexts WHERE session = ?",
+                         (session_id,)).fetchone()
+        if row is None:
+            return DEFAULT_CONTEXT, 0, ()
+        return row[0], int(row[1]), tuple(json.loads(row[2]))
+
+    def update(self, session_id: str, updater: Updater) -> StoredContext:
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            context, version, recent = self._read(db, session_id)
+            context, recent = updater(context, recent)
+            db.execute("INSERT OR REPLACE INTO contexts VALUES (?, ?, ?, ?)",
+                       (session_id, version + 1, context, json.dumps(list(recent))))
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+        return context, version + 1, tuple(recent)
+
+    def delete(self, session_id: str) -> None:
+        self._connection().execute("DELETE FROM contexts WHERE session = ?", (session_id,))
+
+    def close(self) -> None:
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+
+def store_from_env() -> Optional[ContextStore]:
+    """
+    Returnerer SQLiteContextStore for ``PAD_CONTEXT_STORE``, eller None.
+
+    Returns:
+        Optional[ContextStore]: Delt lager, eller None for kontekst kun i minnet
+    """
+    path = os.environ.get("PAD_CONTEXT_STORE")
+    return SQLiteContextStore(path) if path else None
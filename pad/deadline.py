@@ -0,0 +1,89 @@
+"""
+deadline.py
+Tidsfrister for forespørsler gjennom pipelinen.
+
+En Deadline er et absolutt tidspunkt (``time.monotonic``) som sendes
+gjennom ``plan``, ``generate_code`` og ``validate_code``. Hvert trinn får
+en andel av tiden som er igjen når trinnet starter (``STAGE_SHARES``), så
+et tregt trinn kan ikke spise budsjettet til trinnene etter det. Agentene
+bruker fristen til å begrense sitt eget arbeid: HTTP-kall og nye forsøk
+mot modelltjeneren, lint-arbeidere og testkjøring i sandkassen.
+
+Classes:
+    Deadline: Absolutt tidsfrist for én forespørsel.
+    DeadlineExceeded: Kastes når et trinn ikke rekker fristen.
+
+Example:
+    >>> from pad.deadline import Deadline
+    >>> deadline = Deadline(2.0)
+    >>> 0 < deadline.budget("codegen") <= 1.4
+    True
+    >>> deadline.cap(30.0) <= 2.0
+    True
+"""
+import time
+from typing import Optional
+
+# Andel av gjenværende tid hvert trinn får når det starter. Siste trinn får resten.
+STAGE_SHARES = {"plan": 0.1, "codegen": 0.7, "qa": 1.0}
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Et trinn rakk ikke forespørselens tidsfrist, eller ble hoppet over.
+
+    Attributes:
+        stage (str): Trinnet som gikk ut på tid (``plan``, ``codegen`` eller ``qa``)
+    """
+
+    def __init__(self, stage: str) -> None:
+        super().__init__(f"Tidsfristen gikk ut under {stage}")
+        self.stage = stage
+
+
+class Deadline:
+    """
+    Absolutt tidsfrist for én forespørsel.
+
+    Attributes:
+        expires (float): Tidspunktet fristen går ut, i ``time.monotonic``-sekunder
+    """
+
+    __slots__ = ("expires",)
+
+    def __init__(self, seconds: float) -> None:
+        """
+        Args:
+            seconds (float): Sekunder fra nå til fristen går ut
+        """
+        self.expires = time.monotonic() + seconds
+
+    @classmethod
+    def after(cls, seconds: Optional[float]) -> Optional["Deadline"]:
+        """Lager en frist om ``seconds`` sekunder, eller None uten grense."""
+        return None if seconds is None else cls(seconds)
+
+    def remaining(self) -> float:
+        """Sekunder igjen, aldri negativt."""
+        return max(0.0, self.expires - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires
+
+    def budget(self, stage: str) -> float:
+        """Tiden trinnet ``stage`` får av det som er igjen (se ``STAGE_SHARES``)."""
+        return self.remaining() * STAGE_SHARES.get(stage, 1.0)
+
+    def cap(self, timeout: Optional[float]) -> float:
+        """Et tidsavbrudd som ikke går forbi fristen."""
+        remaining = self.remaining()
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def check(self, stage: str) -> None:
+        """
+        Raises:
+            DeadlineExceeded: Hvis fristen har gått ut
+        """
+        if self.expired:
+            raise DeadlineExceeded(stage)
@@ -0,0 +1,204 @@
+"""
+history.py
+Begrenset kodehistorikk for ContextAgent med utskyving til disk.
+
+ContextAgent husker all generert kode. I en langtkjørende API-prosess ville
+en vanlig liste vokse uten grense, så CodeHistory holder bare de nyeste
+kodebitene i minnet innenfor et byte-budsjett. Eldre kodebiter skyves ut
+i batcher til en append-only loggfil og kan leses tilbake lat med en
+iterator. Kodebiter i minnet kan også hentes enkeltvis med posisjonen
+``append`` returnerte.
+
+Classes:
+    CodeHistory: Ringbuffer med byte-budsjett og valgfri disk-logg.
+
+Example:
+    >>> from pad.history import CodeHistory
+    >>> history = CodeHistory(max_bytes=1024, spill_path="/tmp/pad_history.log")
+    >>> history.append("print('hei')")
+    0
+    >>> list(history)
+    ["print('hei')"]
+"""
+import os
+import struct
+import sys
+import threading
+from collections import deque
+from itertools import islice
+from typing import BinaryIO, Deque, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+
+# Etter utskyving fylles minnet bare opp til denne andelen av budsjettet,
+# slik at diskskrivingen skjer i batcher og ikke for hver ny kodebit.
+_LOW_WATERMARK = 0.75
+_RECORD_HEADER = struct.Struct("<I")
+
+
+def _footprint(code: str) -> int:
+    return sys.getsizeof(code)
+
+
+class CodeHistory:
+    """
+    Ringbuffer for kodehistorikk med byte-budsjett.
+
+    Når summen av kodebitene i minnet overstiger ``max_bytes``, flyttes de
+    eldste til loggfilen (eller forkastes hvis ``spill_path`` er None)
+    inntil bufferet er under 75 % av budsjettet. Iterasjon gir alle
+    kodebiter i kronologisk rekkefølge, først fra disk og så fra minnet.
+
+    Attributes:
+        max_bytes (int): Byte-budsjett for kodebitene i minnet
+        spill_path (Optional[str]): Append-only logg for utskjøvne kodebiter
+        spilled (int): Antall kodebiter som er skjøvet ut til loggfilen
+        dropped (int): Antall kodebiter som er forkastet uten loggfil
+
+    Example:
+        >>> history = CodeHistory(max_bytes=200)
+        >>> for i in range(10):
+        ...     _ = history.append(f"x = {i}")
+        >>> history.memory_bytes <= 200, history.dropped > 0
+        (True, True)
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES,
+                 spill_path: Optional[str] = None) -> None:
+        """
+        Args:
+            max_bytes (int): Byte-budsjett for kodebitene som holdes i minnet
+            spill_path (Optional[str]): Loggfil for utskjøvne kodebiter
+        """
+        self.max_bytes = max_bytes
+        self.spill_path = spill_path
+        self.spilled = 0
+        self.dropped = 0
+        self._entries: Deque[str] = deque()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if spill_path is not None and os.path.exists(spill_path):
+            self.spilled = sum(1 for _ in self._read_log())
+
+    @property
+    def memory_bytes(self) -> int:
+        """Omtrentlig antall byte kodebitene i minnet bruker."""
+        return self._bytes
+
+    def __len__(self) -> int:
+        return self.spilled + len(self._entries)
+
+    def append(self, code: str) -> int:
+        """
+        Legger til en kodebit og skyver ut eldre ved behov.
+
+        Returns:
+            int: Kodebitens posisjon, fast for hele levetiden og brukbar med ``get``
+        """
+        with self._lock:
+            position = self.dropped + self.spilled + len(self._entries)
+            self._entries.append(code)
+            self._bytes += _footprint(code)
+            if self._bytes > self.max_bytes:
+                self._compact()
+            return position
+
+    def get(self, position: int) -> Optional[str]:
+        """
+        Henter en kodebit i minnet med posisjonen ``append`` returnerte.
+
+        Returns:
+            Optional[str]: Kodebiten, eller None hvis den er skjøvet ut eller forkastet
+        """
+        with self._lock:
+            index = position - self.dropped - self.spilled
+            if 0 <= index < len(self._entries):
+                return self._entries[index]
+            return None
+
+    def export(self) -> Tuple[List[str], int, int, int]:
+        """
+        Kopierer tilstanden i minnet, for øyeblikksbilder.
+
+        Returns:
+            Tuple[List[str], int, int, int]: Kodebitene i minnet,
+            ``memory_bytes``, ``dropped`` og ``spilled``
+        """
+        with self._lock:
+            return list(self._entries), self._bytes, self.dropped, self.spilled
+
+    def restore(self, entries: Iterable[str], memory_bytes: int, dropped: int,
+                spilled: int) -> None:
+        """
+        Erstatter tilstanden i minnet med en kopi fra ``export``.
+
+        Tellerne settes som de var, slik at posisjonene fra ``append`` er
+        de samme som før. Utskjøvne kodebiter leses fortsatt fra
+        ``spill_path``, så bruk samme loggfil som da kopien ble tatt.
+        """
+        with self._lock:
+            self._entries = deque(entries)
+            self._bytes = memory_bytes
+            self.dropped = dropped
+            self.spilled = spilled
+
+    def _compact(self) -> None:
+        target = int(self.max_bytes * _LOW_WATERMARK)
+        evicted: List[str] = []
+        # Behold alltid den nyeste kodebiten, selv om den alene er for stor
+        while self._bytes > target and len(self._entries) > 1:
+            code = self._entries.popleft()
+            self._bytes -= _footprint(code)
+            evicted.append(code)
+        if self.spill_path is not None and evicted:
+            records = []
+            for code in evicted:
+                data = code.encode("utf-8")
+                records.append(_RECORD_HEADER.pack(len(data)))
+                records.append(data)
+            with open(self.spill_path, "ab") as fh:
+                fh.write(b"".join(records))
+            self.spilled += len(evicted)
+        else:
+            self.dropped += len(evicted)
+
+    def recent(self, n: int) -> List[str]:
+        """Returnerer de ``n`` nyeste kodebitene (eldste først)."""
+        with self._lock:
+            return list(islice(reversed(self._entries), max(n, 0)))[::-1]
+
+    def _read_log(self) -> Iterator[str]:
+        assert self.spill_path is not None
+        with open(self.spill_path, "rb") as fh:
+            yield from self._read_records(fh)
+
+    @staticmethod
+    def _read_records(fh: BinaryIO) -> Iterator[str]:
+        while True:
+            header = fh.read(_RECORD_HEADER.size)
+            if len(header) < _RECORD_HEADER.size:
+                return
+            (length,) = _RECORD_HEADER.unpack(header)
+            yield fh.read(length).decode("utf-8")
+
+    def iter_spilled(self) -> Iterator[str]:
+        """
+        Leser utskjøvne kodebiter lat fra loggfilen.
+
+        Yields:
+            str: Utskjøvne kodebiter i kronologisk rekkefølge
+        """
+        if self.spill_path is None or not os.path.exists(self.spill_path):
+            return iter(())
+        return self._read_log()
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            in_memory = list(self._entries)
+            spilled = self.spilled
+        # Kodebiter som skyves ut mens vi leser, ligger allerede i kopien
+        for i, code in enumerate(self.iter_spilled()):
+            if i >= spilled:
+                break
+            yield code
+        yield from in_memory
@@ -0,0 +1,274 @@
+"""
+indexer.py
+Inkrementell kodebase-indeksering for ContextAgent.
+
+Dette modulet parser kildefiler med ``ast`` til en indeks over symboler
+(funksjoner, klasser og metoder) og importer. Indeksen lagres på disk, og
+ved senere kjøringer parses bare filer der mtime/størrelse og innholdshash
+er endret. En re-indeksering etter én endret fil koster derfor én
+``stat`` per fil pluss én parsing, ikke en full gjennomgang. Kjenner
+kalleren de endrede stiene (f.eks. fra en filovervåker), sjekkes bare de.
+Indeksen lagres i SQLite, slik at bare endrede filer skrives tilbake.
+
+Classes:
+    CodebaseIndexer: Bygger og vedlikeholder symbol- og importindeksen.
+
+Example:
+    >>> from pad.indexer import CodebaseIndexer
+    >>> indexer = CodebaseIndexer(".", index_path=".pad_index.sqlite")
+    >>> stats = indexer.update()
+    >>> indexer.find("ContextAgent")[0]["path"]
+    'pad/context_agent.py'
+"""
+import ast
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+INDEX_VERSION = 1
+SKIP_DIRS = {".git", "__pycache__", ".venv", "venv", "node_modules",
+             ".mypy_cache", ".pytest_cache", "build", "dist"}
+
+Symbol = Dict[str, Any]
+FileRecord = Dict[str, Any]
+
+
+def _extract(tree: ast.AST) -> Tuple[List[List[Any]], List[str]]:
+    """Henter (navn, type, linje) for symboler og modulnavn for importer."""
+    symbols: List[List[Any]] = []
+    imports: List[str] = []
+    for node in ast.iter_child_nodes(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            symbols.append([node.name, "function", node.lineno])
+        elif isinstance(node, ast.ClassDef):
+            symbols.append([node.name, "class", node.lineno])
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    symbols.append([f"{node.name}.{item.name}", "method", item.lineno])
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            prefix = "." * node.level
+            imports.append(prefix + (node.module or ""))
+    return symbols, sorted(set(imports))
+
+
+class CodebaseIndexer:
+    """
+    Symbol- og importindeks over en kildekodekatalog.
+
+    Hver fil lagres med ``mtime_ns``, størrelse, innholdshash, symboler og
+    importer. ``update`` sammenligner først ``stat``-data; bare filer der
+    den er endret leses, og bare filer der hashen også er endret parses.
+
+    Attributes:
+        root (str): Katalogen som indekseres
+        index_path (Optional[str]): SQLite-fil der indeksen lagres
+        files (Dict[str, FileRecord]): Indeksen, nøklet på relativ sti
+
+    Example:
+        >>> indexer = CodebaseIndexer("pad")
+        >>> indexer.update()["parsed"] > 0
+        True
+        >>> indexer.update()["parsed"]
+        0
+    """
+
+    def __init__(self, root: str, index_path: Optional[str] = None,
+                 extensions: Tuple[str, ...] = (".py",)) -> None:
+        """
+        Args:
+            root (str): Rotkatalogen for kodebasen
+            index_path (Optional[str]): Hvor indeksen lagres mellom kjøringer
+            extensions (Tuple[str, ...]): Filendelser som indekseres
+        """
+        self.root = os.path.abspath(root)
+        self.index_path = index_path
+        self.extensions = extensions
+        self.files: Dict[str, FileRecord] = {}
+        self._by_name: Dict[str, List[Symbol]] = {}
+        self._dirty: Dict[str, Optional[FileRecord]] = {}
+        if index_path is not None and os.path.exists(index_path):
+            self.load()
+
+    def _walk(self) -> Iterator[os.DirEntry]:
+        stack = [self.root]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            stack.append(entry.path)
+                    elif entry.name.endswith(self.extensions):
+                        yield entry
+
+    def _parse(self, rel_path: str, data: bytes) -> FileRecord:
+        try:
+            tree = ast.parse(data, filename=rel_path)
+        except (SyntaxError, ValueError):
+            return {"symbols": [], "imports": [], "error": True}
+        symbols, imports = _extract(tree)
+        return {"symbols": symbols, "imports": imports}
+
+    def update(self, changed_paths: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """
+        Oppdaterer indeksen inkrementelt og lagrer endringene.
+
+        Args:
+            changed_paths (Optional[Iterable[str]]): Stier (relative til
+                ``root`` eller absolutte) som kan være endret. Uten denne
+                sjekkes ``stat`` for alle filer i treet.
+
+        Returns:
+            Dict[str, float]: ``scanned``, ``parsed``, ``removed`` og
+            ``seconds`` for denne kjøringen
+        """
+        start = time.perf_counter()
+        parsed = 0
+        if changed_paths is None:
+            prefix = len(self.root) + len(os.sep)
+            seen = set()
+            for entry in self._walk():
+                rel_path = entry.path[prefix:]
+                seen.add(rel_path)
+                parsed += self._refresh(rel_path, entry.path, entry.stat())
+            removed = [path for path in self.files if path not in seen]
+        else:
+            seen = {os.path.relpath(os.path.join(self.root, p), self.root)
+                    for p in changed_paths}
+            removed = []
+            for rel_path in seen:
+                full_path = os.path.join(self.root, rel_path)
+                try:
+                    stat = os.stat(full_path)
+                except FileNotFoundError:
+                    if rel_path in self.files:
+                        removed.append(rel_path)
+                    continue
+                parsed += self._refresh(rel_path, full_path, stat)
+
+        for path in removed:
+            self._unlink_symbols(path, self.files.pop(path))
+            self._dirty[path] = None
+        self.save()
+        return {"scanned": len(seen), "parsed": parsed, "removed": len(removed),
+                "seconds": time.perf_counter() - start}
+
+    def _refresh(self, rel_path: str, full_path: str, stat: os.stat_result) -> int:
+        """Oppdaterer én fil hvis stat-data er endret; returnerer 1 hvis den ble parset."""
+        record = self.files.get(rel_path)
+        if (record is not None and record["mtime_ns"] == stat.st_mtime_ns
+                and record["size"] == stat.st_size):
+            return 0
+        with open(full_path, "rb") as fh:
+            data = fh.read()
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        parsed = 0
+        if record is None or record["hash"] != digest:
+            if record is not None:
+                self._unlink_symbols(rel_path, record)
+            record = self._parse(rel_path, data)
+            record["hash"] = digest
+            self._link_symbols(rel_path, record)
+            parsed = 1
+        record["mtime_ns"] = stat.st_mtime_ns
+        record["size"] = stat.st_size
+        self.files[rel_path] = record
+        self._dirty[rel_path] = record
+        return parsed
+
+    def _link_symbols(self, rel_path: str, record: FileRecord) -> None:
+        for name, kind, lineno in record["symbols"]:
+            symbol = {"name": name, "kind": kind, "path": rel_path, "line": lineno}
+            self._by_name.setdefault(name.rsplit(".", 1)[-1].lower(), []).append(symbol)
+
+    def _unlink_symbols(self, rel_path: str, record: FileRecord) -> None:
+        for name, _, _ in record["symbols"]:
+            key = name.rsplit(".", 1)[-1].lower()
+            remaining = [s for s in self._by_name.get(key, []) if s["path"] != rel_path]
+            if remaining:
+                self._by_name[key] = remaining
+            else:
+                self._by_name.pop(key, None)
+
+    def find(self, name: str, limit: int = 20) -> List[Symbol]:
+        """
+        Finner symboler med gitt navn (uten hensyn til store/små bokstaver).
+
+        For metoder matches navnet både med og uten klasseprefiks.
+
+        Args:
+            name (str): Symbolnavn, f.eks. ``"get_context"``
+            limit (int): Maksimalt antall treff
+
+        Returns:
+            List[Symbol]: Treff med ``name``, ``kind``, ``path`` og ``line``
+        """
+        key = name.rsplit(".", 1)[-1].lower()
+        matches = self._by_name.get(key, [])
+        if "." in name:
+            matches = [s for s in matches if s["name"].lower() == name.lower()]
+        return matches[:limit]
+
+    def importers(self, module: str) -> List[str]:
+        """Returnerer filene som importerer ``module``."""
+        return sorted(path for path, record in self.files.items()
+                      if module in record["imports"])
+
+    def _connect(self) -> sqlite3.Connection:
+        assert self.index_path is not None
+        db = sqlite3.connect(self.index_path)
+        db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime_ns INTEGER, "
+            "size INTEGER, hash TEXT, symbols TEXT, imports TEXT)"
+        )
+        return db
+
+    def save(self) -> None:
+        """Skriver endrede og slettede filer til ``index_path``."""
+        if self.index_path is None or not self._dirty:
+            self._dirty.clear()
+            return
+        db = self._connect()
+        try:
+            with db:
+                db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?), ('root', ?)",
+                           (str(INDEX_VERSION), self.root))
+                for path, record in self._dirty.items():
+                    if record is None:
+                        db.execute("DELETE FROM files WHERE path = ?", (path,))
+                        continue
+                    db.execute(
+                        "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                        (path, record["mtime_ns"], record["size"], record["hash"],
+                         json.dumps(record["symbols"]), json.dumps(record["imports"])),
+                    )
+        finally:
+            db.close()
+        self._dirty.clear()
+
+    def load(self) -> None:
+        """Leser indeksen fra ``index_path``. Ukjent versjon eller rot gir tom indeks."""
+        db = self._connect()
+        try:
+            meta = dict(db.execute("SELECT key, value FROM meta"))
+            if meta.get("version") != str(INDEX_VERSION) or meta.get("root") != self.root:
+                with db:
+                    db.execute("DELETE FROM files")
+                return
+            rows = db.execute("SELECT path, mtime_ns, size, hash, symbols, imports FROM files")
+            self.files = {
+                path: {"mtime_ns": mtime_ns, "size": size, "hash": digest,
+                       "symbols": json.loads(symbols), "imports": json.loads(imports)}
+                for path, mtime_ns, size, digest, symbols, imports in rows
+            }
+        finally:
+            db.close()
+        self._by_name = {}
+        for rel_path, record in self.files.items():
+            self._link_symbols(rel_path, record)
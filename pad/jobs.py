@@ -0,0 +1,301 @@
+"""
+jobs.py
+Asynkron jobbkø for API-et, med mottrykk og prioriteter.
+
+Lange genereringer holder ellers en HTTP-tilkobling og en tråd i hele
+kjøretiden. Med jobbkøen får klienten en jobb-ID med en gang, og en fast
+pool av arbeidertråder kjører jobbene. Køen er begrenset: når den er full,
+avvises nye jobber (HTTP 429 med ``Retry-After``) i stedet for at alle
+forespørsler blir trege og går ut på tid. Jobber som har ventet lenger enn
+``max_wait`` kjøres ikke, og ferdige resultater slettes etter
+``result_ttl`` sekunder.
+
+Classes:
+    Job: Én jobb med status, tidspunkter og resultat.
+    JobQueue: Begrenset prioritetskø med arbeidertråder.
+    QueueFullError: Kastes når køen er full.
+
+Example:
+    >>> from pad.jobs import JobQueue
+    >>> queue = JobQueue(lambda job: {"code": job.prompt, "feedback": ""}, workers=2)
+    >>> job = queue.submit("skriv ut hei", priority="high")
+    >>> queue.wait(job.id, timeout=1).status
+    'done'
+"""
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+EXPIRED = "expired"
+FINISHED = {DONE, FAILED, CANCELLED, EXPIRED}
+
+
+class QueueFullError(RuntimeError):
+    """
+    Køen er full.
+
+    Attributes:
+        retry_after (float): Anslått antall sekunder før det er plass
+    """
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__("Jobbkøen er full")
+        self.retry_after = retry_after
+
+
+class Job:
+    """
+    Én jobb i køen.
+
+    Attributes:
+        id (str): Jobb-ID
+        prompt (str): Brukerens forespørsel
+        session_id (Optional[str]): Sesjonen jobben hører til
+        use_cache (bool): Om kodegenereringscachen skal brukes
+        priority (str): ``high``, ``normal`` eller ``low``
+        timeout (Optional[float]): Tidsfrist i sekunder fra jobben starter
+        status (str): ``queued``, ``running``, ``done``, ``failed``,
+            ``cancelled`` eller ``expired``
+        result (Optional[Dict[str, Any]]): ``code`` og ``feedback`` når ferdig
+        error (Optional[str]): Feilmelding hvis jobben feilet
+    """
+
+    def __init__(self, prompt: str, session_id: Optional[str] = None,
+                 use_cache: bool = True, priority: str = "normal",
+                 timeout: Optional[float] = None) -> None:
+        self.id = uuid.uuid4().hex
+        self.prompt = prompt
+        self.session_id = session_id
+        self.use_cache = use_cache
+        self.priority = priority
+        self.timeout = timeout
+        self.status = QUEUED
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self._done = threading.Event()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Status uten resultat, for ``GET /jobs/{id}``."""
+        return {"job_id": self.id, "status": self.status, "priority": self.priority,
+                "created": self.created, "started": self.started,
+                "finished": self.finished, "error": self.error}
+
+
+class JobQueue:
+    """
+    Begrenset prioritetskø med en fast pool av arbeidertråder.
+
+    Jobber hentes i prioritetsrekkefølge (``high`` før ``normal`` før
+    ``low``) og ellers først inn, først ut. Arbeiderne startes ved første
+    ``submit``.
+
+    Attributes:
+        workers (int): Antall arbeidertråder
+        max_depth (int): Maks antall ventende jobber
+        max_wait (Optional[float]): Jobber som har ventet lenger enn dette
+            i køen, markeres ``expired`` i stedet for å kjøres
+        result_ttl (float): Sekunder ferdige jobber huskes
+        counters (Dict[str, int]): ``submitted``, ``rejected``, ``done``,
+            ``failed``, ``cancelled`` og ``expired``
+
+    Example:
+        >>> queue = JobQueue(run_job, workers=4, max_depth=100)
+        >>> job = queue.submit("lag en funksjon")
+        >>> queue.get(job.id).status
+        'queued'
+    """
+
+    def __init__(self, run: Callable[[Job], Dict[str, Any]], workers: int = 4,
+                 max_depth: int = 1000, max_wait: Optional[float] = 300.0,
+                 result_ttl: float = 600.0) -> None:
+        """
+        Args:
+            run (Callable[[Job], Dict[str, Any]]): Kjører én jobb
+            workers (int): Antall arbeidertråder
+            max_depth (int): Maks antall ventende jobber før nye avvises
+            max_wait (Optional[float]): Maks ventetid i køen i sekunder
+            result_ttl (float): Hvor lenge ferdige jobber huskes
+        """
+        self.run = run
+        self.workers = workers
+        self.max_depth = max_depth
+        self.max_wait = max_wait
+        self.result_ttl = result_ttl
+        self.counters = {"submitted": 0, "rejected": 0, "done": 0, "failed": 0,
+                         "cancelled": 0, "expired": 0}
+        self._jobs: Dict[str, Job] = {}
+        self._heap: List[Tuple[int, int, Job]] = []
+        self._queued = 0
+        self._running = 0
+        self._sequence = itertools.count()
+        # Glidende snitt av kjøretid, for Retry-After
+        self._service_time = 1.0
+        self._last_purge = 0.0
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._closed = False
+
+    def _start(self) -> None:
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"pad-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def depth(self) -> Dict[str, int]:
+        """Antall ventende jobber per prioritet, pluss ``running``."""
+        with self._cond:
+            lanes = {name: 0 for name in PRIORITIES}
+            for _, _, job in self._heap:
+                if job.status == QUEUED:
+                    lanes[job.priority] += 1
+            lanes["running"] = self._running
+            return lanes
+
+    def submit(self, prompt: str, session_id: Optional[str] = None,
+               use_cache: bool = True, priority: str = "normal",
+               timeout: Optional[float] = None) -> Job:
+        """
+        Legger en jobb i køen.
+
+        Args:
+            prompt (str): Brukerens forespørsel
+            session_id (Optional[str]): Sesjonen jobben hører til
+            use_cache (bool): Om kodegenereringscachen skal brukes
+            priority (str): ``high``, ``normal`` eller ``low``
+            timeout (Optional[float]): Tidsfrist i sekunder fra jobben starter
+
+        Returns:
+            Job: Den nye jobben med status ``queued``
+
+        Raises:
+            ValueError: Ved ukjent prioritet
+            QueueFullError: Hvis ``max_depth`` jobber allerede venter
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Ukjent prioritet {priority!r}")
+        job = Job(prompt, session_id, use_cache, priority, timeout)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Jobbkøen er stengt")
+            self._purge()
+            if self._queued >= self.max_depth:
+                self.counters["rejected"] += 1
+                retry_after = self._queued * self._service_time / max(self.workers, 1)
+                raise QueueFullError(max(1.0, retry_after))
+            if not self._threads:
+                self._start()
+            self._jobs[job.id] = job
+            heapq.heappush(self._heap, (PRIORITIES[priority], next(self._sequence), job))
+            self._queued += 1
+            self.counters["submitted"] += 1
+            self._cond.notify()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Henter en jobb, eller None hvis den er ukjent eller utløpt."""
+        with self._cond:
+            self._purge()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Avbryter en ventende jobb.
+
+        Returns:
+            bool: True hvis jobben ble avbrutt. Jobber som kjører eller er
+            ferdige kan ikke avbrytes.
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                return False
+            # Jobben blir liggende i heapen og hoppes over når den hentes
+            self._finish(job, CANCELLED)
+            self._queued -= 1
+            return True
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Job]:
+        """Venter til jobben er ferdig, og returnerer den."""
+        job = self.get(job_id)
+        if job is not None:
+            job._done.wait(timeout)
+        return job
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished = time.time()
+        self.counters[status] += 1
+        job._done.set()
+
+    def _purge(self) -> None:
+        """Sletter ferdige jobber eldre enn ``result_ttl``. Kalles med låsen."""
+        now = time.time()
+        if now - self._last_purge < 1.0:
+            return
+        self._last_purge = now
+        cutoff = now - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.status in FINISHED and job.finished is not None
+                   and job.finished < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _next_job(self) -> Optional[Job]:
+        with self._cond:
+            while True:
+                while self._heap and self._heap[0][2].status != QUEUED:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    if self._closed:
+                        return None
+                    self._cond.wait()
+                    continue
+                job = heapq.heappop(self._heap)[2]
+                self._queued -= 1
+                if self.max_wait is not None and time.time() - job.created > self.max_wait:
+                    # Klienten har sannsynligvis gitt opp; ikke bruk tid på den
+                    self._finish(job, EXPIRED)
+                    continue
+                job.status = RUNNING
+                job.started = time.time()
+                self._running += 1
+                return job
+
+    def _work(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            start = time.perf_counter()
+            try:
+                result = self.run(job)
+            except Exception as exc:
+                status, job.error = FAILED, f"{type(exc).__name__}: {exc}"
+            else:
+                status, job.result = DONE, result
+            with self._cond:
+                self._running -= 1
+                self._service_time = 0.9 * self._service_time + 0.1 * (time.perf_counter() - start)
+                self._finish(job, status)
+
+    def close(self) -> None:
+        """Stopper arbeiderne etter at jobbene i køen er kjørt."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
@@ -0,0 +1,308 @@
+"""
+lint_engine.py
+Definerer en in-process lintemotor for QualityAssuranceAgent.
+
+Dette modulet kjører de samme sjekkene som flake8 (pyflakes og pycodestyle)
+direkte på en kodestreng i minnet, uten midlertidige filer og uten å starte
+en ny Python-prosess per kall. Resultatet formateres likt flake8 sin
+standardutskrift (``sti:linje:kolonne: KODE melding``).
+
+Classes:
+    LintEngine: Kjører pyflakes/pycodestyle på kode i minnet.
+    LintWorkerPool: Valgfri pool av varme lint-prosesser for isolasjon.
+
+Example:
+    >>> from pad.lint_engine import LintEngine
+    >>> engine = LintEngine()
+    >>> engine.check("import os\\n")
+    ["stdin:1:1: F401 'os' imported but unused"]
+"""
+import ast
+import configparser
+import hashlib
+import os
+import re
+import signal
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import pycodestyle
+import pyflakes.checker
+
+from .qa_checks import Finding, syntax_finding
+
+try:
+    from flake8.plugins.pyflakes import FLAKE8_PYFLAKES_CODES
+except ImportError:  # pragma: no cover - flake8 er en del av requirements
+    FLAKE8_PYFLAKES_CODES = {}
+
+DEFAULT_CONFIG_NAME = ".flake8"
+# PAD-kodene kommer fra AST-sjekkene i qa_checks.py
+DEFAULT_SELECT = ("E", "F", "W", "C90", "PAD")
+DEFAULT_IGNORE = tuple(pycodestyle.DEFAULT_IGNORE.split(","))
+
+_NOQA_RE = re.compile(
+    r"#\s*noqa(?::[\s]?(?P<codes>[A-Z][0-9]+(?:[,\s]+[A-Z][0-9]+)*))?",
+    re.IGNORECASE,
+)
+
+
+def _split_list(value: str) -> Tuple[str, ...]:
+    return tuple(part.strip() for part in re.split(r"[,\s]+", value) if part.strip())
+
+
+class _CollectingReport(pycodestyle.BaseReport):
+    """pycodestyle-rapport som samler funn i stedet for å skrive dem ut."""
+
+    def __init__(self, options: object) -> None:
+        super().__init__(options)
+        self.results: List[Tuple[int, int, str]] = []
+
+    def error(self, line_number: int, offset: int, text: str,  # type: ignore[override]
+              check: object) -> Optional[str]:
+        code = super().error(line_number, offset, text, check)
+        if code:
+            self.results.append((line_number, offset, text))
+        return code
+
+
+class LintEngine:
+    """
+    In-process erstatning for ``flake8 <fil>``.
+
+    Leser de samme innstillingene fra ``.flake8`` som flake8 ville gjort
+    (``max-line-length``, ``select``, ``ignore``, ``extend-ignore`` og
+    ``builtins``), og kjører pyflakes og pycodestyle direkte på strengen.
+
+    Attributes:
+        config_path (str): Sti til flake8-konfigurasjonen som brukes
+        max_line_length (int): Maksimal linjelengde fra konfigurasjonen
+
+    Example:
+        >>> engine = LintEngine()
+        >>> engine.check("def f():\\n    return 1\\n")
+        []
+    """
+
+    def __init__(self, config_path: Optional[str] = None) -> None:
+        """
+        Initialiserer motoren og leser linter-konfigurasjonen.
+
+        Args:
+            config_path (Optional[str]): Sti til ``.flake8``. Standard er
+                ``.flake8`` i arbeidskatalogen, slik flake8 selv søker.
+        """
+        self.config_path = config_path or os.path.join(os.getcwd(), DEFAULT_CONFIG_NAME)
+        self.load_config()
+
+    def load_config(self) -> None:
+        """Leser (eller leser på nytt) innstillingene fra konfigurasjonsfilen."""
+        raw = b""
+        self._config_mtime = self._stat_config()
+        if self._config_mtime is not None:
+            with open(self.config_path, "rb") as fh:
+                raw = fh.read()
+        self._fingerprint = hashlib.sha256(raw).hexdigest()[:16]
+        parser = configparser.ConfigParser()
+        parser.read_string(raw.decode("utf-8"))
+        section = parser["flake8"] if parser.has_section("flake8") else {}
+
+        self.max_line_length = int(section.get("max-line-length", pycodestyle.MAX_LINE_LENGTH))
+        self.select = _split_list(section.get("select", "")) or DEFAULT_SELECT
+        self.select += _split_list(section.get("extend-select", ""))
+        self.ignore = _split_list(section.get("ignore", "")) or DEFAULT_IGNORE
+        self.ignore += _split_list(section.get("extend-ignore", ""))
+        self.builtins = _split_list(section.get("builtins", ""))
+
+        self._style = pycodestyle.StyleGuide(
+            max_line_length=self.max_line_length,
+            select=("E", "W"),
+            quiet=True,
+        )
+
+    def _stat_config(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.config_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def config_fingerprint(self) -> str:
+        """
+        Returnerer et kort fingeravtrykk av linter-konfigurasjonen.
+
+        Konfigurasjonen leses automatisk på nytt hvis filen er endret siden
+        sist, slik at cacher som bruker fingeravtrykket i nøkkelen blir
+        ugyldige når innstillingene endres.
+
+        Returns:
+            str: Hex-hash av innholdet i ``.flake8``
+        """
+        if self._stat_config() != self._config_mtime:
+            self.load_config()
+        return self._fingerprint
+
+    def _is_selected(self, code: str) -> bool:
+        selected = max((len(s) for s in self.select if code.startswith(s)), default=-1)
+        ignored = max((len(i) for i in self.ignore if code.startswith(i)), default=-1)
+        return selected >= 0 and selected > ignored
+
+    def _pyflakes(self, tree: ast.AST, filename: str) -> Iterable[Tuple[int, int, str]]:
+        checker = pyflakes.checker.Checker(
+            tree, filename=filename, builtins=self.builtins or None
+        )
+        for message in checker.messages:
+            code = FLAKE8_PYFLAKES_CODES.get(type(message).__name__, "F999")
+            text = message.message % message.message_args
+            yield message.lineno, getattr(message, "col", 0), f"{code} {text}"
+
+    def _pycodestyle(self, lines: List[str], filename: str) -> Iterable[Tuple[int, int, str]]:
+        report = _CollectingReport(self._style.options)
+        checker = pycodestyle.Checker(
+            filename=filename, lines=lines, options=self._style.options, report=report
+        )
+        checker.check_all()
+        return report.results
+
+    def check(self, code: str, filename: str = "stdin",
+              tree: Optional[ast.AST] = None, extra: Sequence[Finding] = ()) -> List[str]:
+        """
+        Linter kode i minnet og returnerer funn i flake8-format.
+
+        Args:
+            code (str): Kildekoden som skal sjekkes
+            filename (str): Filnavnet som brukes i rapportlinjene
+            tree (Optional[ast.AST]): Ferdig parset AST, hvis kalleren
+                allerede har parset koden
+            extra (Sequence[Finding]): Funn fra andre sjekker (f.eks.
+                qa_checks) som skal filtreres og sorteres sammen med resten
+
+        Returns:
+            List[str]: Én linje per funn, sortert på linje og kolonne. Tom
+            liste betyr at koden er ren.
+        """
+        self.config_fingerprint()
+        if tree is None:
+            try:
+                tree = ast.parse(code, filename=filename)
+            except SyntaxError as exc:
+                return self.format(code, [syntax_finding(exc)], filename)
+
+        results = list(self._pyflakes(tree, filename))
+        results.extend(self._pycodestyle(code.splitlines(True), filename))
+        results.extend(extra)
+        return self.format(code, results, filename)
+
+    def format(self, code: str, results: Iterable[Finding],
+               filename: str = "stdin") -> List[str]:
+        """
+        Filtrerer funn på ``select``/``ignore`` og ``# noqa``, og formaterer dem.
+
+        Args:
+            code (str): Kildekoden funnene gjelder
+            results (Iterable[Finding]): (linje, kolonne fra 0, "KODE melding")
+            filename (str): Filnavnet som brukes i rapportlinjene
+
+        Returns:
+            List[str]: Funn i flake8-format, sortert på linje og kolonne
+        """
+        self.config_fingerprint()
+        lines = code.splitlines(True)
+        findings = []
+        for row, col, text in sorted(results, key=lambda r: (r[0], r[1])):
+            code_id = text.split(" ", 1)[0]
+            if not self._is_selected(code_id) or self._is_noqa(lines, row, code_id):
+                continue
+            findings.append(f"{filename}:{row}:{col + 1}: {text}")
+        return findings
+
+    @staticmethod
+    def _is_noqa(lines: List[str], row: int, code_id: str) -> bool:
+        if not 0 < row <= len(lines):
+            return False
+        match = _NOQA_RE.search(lines[row - 1])
+        if match is None:
+            return False
+        codes = match.group("codes")
+        return codes is None or any(code_id.startswith(c) for c in _split_list(codes.upper()))
+
+
+# Motor per arbeiderprosess, opprettet av _init_worker ved oppstart.
+_worker_engine: Optional[LintEngine] = None
+
+
+def _init_worker(config_path: Optional[str]) -> None:
+    global _worker_engine
+    _worker_engine = LintEngine(config_path)
+    # Varmer opp pyflakes/pycodestyle slik at første reelle kall er raskt
+    _worker_engine.check("def _warm():\n    return None\n")
+
+
+def _on_alarm(signum: int, frame: object) -> None:
+    raise TimeoutError("tidsavbrudd i lint-arbeider")
+
+
+def _worker_check(code: str, timeout: Optional[float],
+                  extra: Sequence[Finding] = ()) -> List[str]:
+    assert _worker_engine is not None
+    if not timeout:
+        return _worker_engine.check(code, extra=extra)
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return _worker_engine.check(code, extra=extra)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+class LintWorkerPool:
+    """
+    Pool av forhåndsstartede lint-prosesser.
+
+    Gir samme resultat som LintEngine, men kjører hver sjekk i en egen
+    prosess. Det isolerer krasj og minnelekkasjer i linterne fra API-prosessen,
+    uten å betale for interpreter-oppstart per kall.
+
+    Example:
+        >>> pool = LintWorkerPool(workers=2)
+        >>> pool.check("import os\\n", timeout=5)
+        ["stdin:1:1: F401 'os' imported but unused"]
+        >>> pool.close()
+    """
+
+    def __init__(self, workers: int = 2, config_path: Optional[str] = None) -> None:
+        """
+        Args:
+            workers (int): Antall arbeiderprosesser
+            config_path (Optional[str]): Sti til ``.flake8`` for arbeiderne
+        """
+        self.workers = workers
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(config_path,)
+        )
+
+    def submit(self, code: str, timeout: Optional[float] = None,
+               extra: Sequence[Finding] = ()) -> "Future[List[str]]":
+        """Sender kode til en arbeider og returnerer en Future med funnene."""
+        return self._executor.submit(_worker_check, code, timeout, tuple(extra))
+
+    def check(self, code: str, timeout: Optional[float] = None,
+              extra: Sequence[Finding] = ()) -> List[str]:
+        """
+        Linter kode i en arbeiderprosess og venter på svaret.
+
+        Raises:
+            TimeoutError: Hvis sjekken bruker lengre tid enn ``timeout``
+        """
+        return self.submit(code, timeout, extra).result()
+
+    def __enter__(self) -> "LintWorkerPool":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stopper arbeiderprosessene."""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,273 @@
+"""
+metrics.py
+Lettvekts latensmåling og tellere for PAD-pipelinen.
+
+Orkestratoren måler hvert trinn (planlegging, kodegenerering, QA og
+kontekstoppdatering) med ``metrics.span(trinn)``. Målingene samles i
+histogrammer med faste bøtter, slik at én måling koster ett
+``perf_counter``-kall, ett binærsøk og noen heltallsøkninger. Tellere
+for cache, køer og underprosesser hentes først når ``/metrics`` leses,
+via registrerte innsamlere.
+
+Med ``PAD_METRICS=0`` (eller ``metrics.enabled = False``) returnerer
+``span`` et delt, tomt kontekstobjekt, og ingenting måles.
+
+Classes:
+    Histogram: Histogram med faste bøtter og estimerte persentiler.
+    MetricsRegistry: Samler histogrammer, tellere og innsamlere.
+
+Example:
+    >>> from pad.metrics import metrics
+    >>> with metrics.span("codegen"):
+    ...     pass
+    >>> metrics.stage_summary()["codegen"]["count"]
+    1
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# Bøttegrenser i sekunder, fra 50 µs til 10 s
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# (navn, type, hjelpetekst, verdi) for én måling fra en innsamler
+Sample = Tuple[str, str, str, float]
+Collector = Callable[[], Iterable[Sample]]
+
+
+class Histogram:
+    """
+    Histogram med faste bøtter, kompatibelt med Prometheus.
+
+    Attributes:
+        buckets (Tuple[float, ...]): Øvre grenser for bøttene i sekunder
+        count (int): Antall målinger
+        total (float): Summen av alle målinger i sekunder
+
+    Example:
+        >>> histogram = Histogram()
+        >>> histogram.observe(0.002)
+        >>> histogram.count
+        1
+    """
+
+    __slots__ = ("buckets", "count", "total", "_counts", "_lock")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.count = 0
+        self.total = 0.0
+        # Siste plass er +Inf-bøtta
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        """Registrerer én måling."""
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total += seconds
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """Returnerer (øvre grense, kumulativt antall), med ``inf`` til slutt."""
+        with self._lock:
+            counts = list(self._counts)
+        result = []
+        running = 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            running += n
+            result.append((bound, running))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimerer persentilen ``q`` (0–1) ved lineær interpolasjon i bøtta,
+        som ``histogram_quantile`` i Prometheus.
+
+        Returns:
+            float: Estimert verdi i sekunder, eller 0.0 uten målinger
+        """
+        cumulative = self.cumulative()
+        total = cumulative[-1][1]
+        if total == 0:
+            return 0.0
+        rank = q * total
+        lower, below = 0.0, 0
+        for bound, running in cumulative:
+            if running >= rank:
+                if bound == float("inf"):
+                    return lower
+                inside = running - below
+                return lower + (bound - lower) * ((rank - below) / inside if inside else 0)
+            lower, below = bound, running
+        return lower
+
+
+class _Span:
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram: Histogram) -> None:
+        self._histogram = histogram
+
+    def __enter__(self) -> "_Span":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._histogram.observe(time.perf_counter() - self._start)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class MetricsRegistry:
+    """
+    Register for trinnlatens, tellere og innsamlere.
+
+    Attributes:
+        enabled (bool): Om målinger registreres
+        stages (Dict[str, Histogram]): Latenshistogram per trinn
+        counters (Dict[str, float]): Monotone tellere
+
+    Example:
+        >>> registry = MetricsRegistry()
+        >>> with registry.span("qa"):
+        ...     pass
+        >>> "pad_stage_seconds_count{stage=\\"qa\\"} 1" in registry.render_prometheus()
+        True
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        """
+        Args:
+            enabled (bool): Om målinger skal registreres fra start
+        """
+        self.enabled = enabled
+        self.stages: Dict[str, Histogram] = {}
+        self.counters: Dict[str, float] = {}
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+
+    def _histogram(self, stage: str) -> Histogram:
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.stages.setdefault(stage, Histogram())
+        return histogram
+
+    def span(self, stage: str) -> Union[_Span, _NullSpan]:
+        """
+        Måler tiden i en ``with``-blokk og legger den i trinnets histogram.
+
+        Args:
+            stage (str): Trinnets navn, f.eks. ``"codegen"``
+
+        Returns:
+            Kontekstobjekt. Når registeret er avslått, et delt tomt objekt.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self._histogram(stage))
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Registrerer en ferdig målt varighet for et trinn."""
+        if self.enabled:
+            self._histogram(stage).observe(seconds)
+
+    def inc(self, name: str, value: float = 1.0) -> None:
+        """Øker en teller."""
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0.0) + value
+
+    def register_collector(self, collector: Collector) -> None:
+        """
+        Registrerer en funksjon som leverer målinger når ``/metrics`` leses.
+
+        Args:
+            collector (Collector): Returnerer (navn, type, hjelp, verdi),
+                der type er ``"counter"`` eller ``"gauge"``
+        """
+        self._collectors.append(collector)
+
+    def stage_summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returnerer antall, gjennomsnitt, p50 og p99 (i ms) per trinn.
+
+        Returns:
+            Dict[str, Dict[str, float]]: ``count``, ``mean_ms``, ``p50_ms``
+            og ``p99_ms`` for hvert trinn
+        """
+        summary = {}
+        for stage, histogram in list(self.stages.items()):
+            count = histogram.count
+            summary[stage] = {
+                "count": count,
+                "mean_ms": histogram.total / count * 1000 if count else 0.0,
+                "p50_ms": histogram.quantile(0.50) * 1000,
+                "p99_ms": histogram.quantile(0.99) * 1000,
+            }
+        return summary
+
+    def reset(self) -> None:
+        """Nullstiller histogrammer og tellere (innsamlere beholdes)."""
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+
+    def render_prometheus(self) -> str:
+        """
+        Formaterer alle målinger i Prometheus' tekstformat (versjon 0.0.4).
+
+        Returns:
+            str: Tekst klar for ``GET /metrics``
+        """
+        lines = [
+            "# HELP pad_stage_seconds Latens per trinn i orkestratoren.",
+            "# TYPE pad_stage_seconds histogram",
+        ]
+        for stage, histogram in sorted(self.stages.items()):
+            for bound, running in histogram.cumulative():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'pad_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {running}')
+            lines.append(f'pad_stage_seconds_sum{{stage="{stage}"}} {histogram.total!r}')
+            lines.append(f'pad_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+        lines.append("# HELP pad_stage_quantile_seconds Estimert p50/p99 per trinn.")
+        lines.append("# TYPE pad_stage_quantile_seconds gauge")
+        for stage, histogram in sorted(self.stages.items()):
+            for q in (0.5, 0.99):
+                lines.append(f'pad_stage_quantile_seconds{{stage="{stage}",quantile="{q}"}} '
+                             f"{histogram.quantile(q)!r}")
+        samples: List[Sample] = [
+            (name, "counter", name, value) for name, value in sorted(self.counters.items())
+        ]
+        for collector in self._collectors:
+            samples.extend(collector())
+        for name, kind, help_text, value in samples:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {float(value)!r}")
+        return "\n".join(lines) + "\n"
+
+
+def _env_enabled(value: Optional[str]) -> bool:
+    return (value or "1").lower() not in ("0", "false", "no", "off")
+
+
+metrics = MetricsRegistry(enabled=_env_enabled(os.environ.get("PAD_METRICS")))
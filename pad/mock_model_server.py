@@ -0,0 +1,173 @@
+"""
+mock_model_server.py
+Lokal stand-in for en modelltjener, for tester og benchmarks.
+
+Tjeneren implementerer det samme HTTP-grensesnittet som HTTPModelBackend
+forventer (``/v1/generate`` og ``/v1/generate_batch``) og svarer med den
+samme demo-koden som DemoBackend, etter en konfigurerbar forsinkelse.
+Den teller kall, batcher og nye TCP-tilkoblinger, slik at effekten av
+tilkoblingspool og batching kan måles uten nettverk.
+
+Classes:
+    MockModelServer: Trådet HTTP/1.1-tjener som kjører i bakgrunnen.
+
+Example:
+    >>> from pad.mock_model_server import MockModelServer
+    >>> with MockModelServer(latency=0.01) as server:
+    ...     backend = HTTPModelBackend(server.url)
+
+Kjøres frittstående med::
+
+    python -m pad.mock_model_server --port 9000 --latency 0.05
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from .model_backend import DemoBackend
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.owner._count("connections")
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _reply(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        try:
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # Klienten ga opp (tidsfrist eller tidsavbrudd) før svaret var klart
+            pass
+
+    def do_POST(self) -> None:
+        owner = self.server.owner
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        owner._count("requests")
+        if owner._should_fail():
+            self._reply(503, {"error": "midlertidig utilgjengelig"})
+            return
+        demo = DemoBackend()
+        if self.path == "/v1/generate":
+            time.sleep(owner.latency)
+            self._reply(200, {"code": demo.generate(payload["task"], payload["context"])})
+        elif self.path == "/v1/generate_batch":
+            owner._count("batches")
+            prompts = payload["prompts"]
+            time.sleep(owner.latency + owner.per_item_latency * len(prompts))
+            self._reply(200, {"codes": [demo.generate(p["task"], p["context"])
+                                        for p in prompts]})
+        else:
+            self._reply(404, {"error": "ukjent sti"})
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    owner: "MockModelServer"
+
+
+class MockModelServer:
+    """
+    Lokal modelltjener med kunstig forsinkelse.
+
+    Attributes:
+        latency (float): Forsinkelse per kall i sekunder
+        per_item_latency (float): Ekstra forsinkelse per prompt i batch-kall
+        fail_first (int): Antall første kall som svarer 503 (for retry-tester)
+        counters (Dict[str, int]): ``requests``, ``batches`` og ``connections``
+        url (str): Adressen tjeneren lytter på
+
+    Example:
+        >>> server = MockModelServer(latency=0.02).start()
+        >>> server.url
+        'http://127.0.0.1:...'
+        >>> server.stop()
+    """
+
+    def __init__(self, latency: float = 0.01, per_item_latency: float = 0.0,
+                 fail_first: int = 0, host: str = "127.0.0.1", port: int = 0) -> None:
+        """
+        Args:
+            latency (float): Forsinkelse per kall i sekunder
+            per_item_latency (float): Ekstra forsinkelse per prompt i en batch
+            fail_first (int): Antall kall som skal feile med 503 først
+            host (str): Adresse å lytte på
+            port (int): Port; 0 velger en ledig port
+        """
+        self.latency = latency
+        self.per_item_latency = per_item_latency
+        self.fail_first = fail_first
+        self.counters: Dict[str, int] = {"requests": 0, "batches": 0, "connections": 0}
+        self._lock = threading.Lock()
+        self.host = host
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.owner = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self._httpd.server_address[1]}"
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            if self.fail_first > 0:
+                self.fail_first -= 1
+                return True
+            return False
+
+    def start(self) -> "MockModelServer":
+        """Starter tjeneren i en bakgrunnstråd."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                        name="pad-mock-model", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stopper tjeneren og lukker porten."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "MockModelServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--per-item-latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = MockModelServer(args.latency, args.per_item_latency, host=args.host, port=args.port)
+    print(f"Mock-modelltjener lytter på {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
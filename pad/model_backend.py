@@ -0,0 +1,345 @@
+"""
+model_backend.py
+Utskiftbare modell-backends for CodeGenAgent.
+
+CodeGenAgent spør en ModelBackend om kode for en oppgave og en kontekst.
+DemoBackend gir den samme faste demo-koden som før. HTTPModelBackend
+snakker med en modelltjener over HTTP med:
+
+- en pool av keep-alive-tilkoblinger (``httpx.Client``)
+- et tak på samtidige kall mot tjeneren
+- tidsavbrudd per kall og nye forsøk med eksponentiell backoff, innenfor
+  forespørselens tidsfrist (``timeout`` i ``generate``)
+- mikro-batching: samtidige prompter samles i ett kall mot
+  ``/v1/generate_batch`` når tjeneren støtter det
+
+For tester og benchmarks finnes en lokal stand-in-tjener i
+``pad/mock_model_server.py``.
+
+Classes:
+    ModelBackend: Grensesnitt for modell-backends.
+    DemoBackend: Fast demo-kode uten nettverk.
+    HTTPModelBackend: HTTP-backend med pool, grenser, retries og batching.
+    ModelBackendError: Kastes når tjeneren ikke svarer etter alle forsøk.
+
+Functions:
+    backend_from_env: Velger backend ut fra miljøvariabler.
+
+Example:
+    >>> from pad.model_backend import HTTPModelBackend
+    >>> backend = HTTPModelBackend("http://localhost:9000", batching=True)
+    >>> code = backend.generate("lag en funksjon", "Standard kontekst")
+    >>> backend.close()
+"""
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from abc import ABC, abstractmethod
+from concurrent.futures import TimeoutError as FuturesTimeout
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import httpx
+
+# (oppgave, kontekst) for én generering
+Prompt = Tuple[str, str]
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class ModelBackendError(RuntimeError):
+    """Modelltjeneren svarte ikke riktig etter alle forsøk."""
+
+
+class ModelBackend(ABC):
+    """
+    Grensesnitt for modell-backends.
+
+    Underklasser implementerer ``generate``. ``generate_many`` og ``stream``
+    har standardimplementasjoner basert på den.
+    """
+
+    @abstractmethod
+    def generate(self, task: str, context: str, timeout: Optional[float] = None) -> str:
+        """
+        Genererer kode for én oppgave.
+
+        Args:
+            task (str): Oppgaven (planen) i naturlig språk
+            context (str): Kontekst fra ContextAgent
+            timeout (Optional[float]): Sekunder kallet totalt kan bruke,
+                inkludert nye forsøk (forespørselens tidsfrist)
+
+        Returns:
+            str: Generert kode
+
+        Raises:
+            TimeoutError: Hvis ``timeout`` går ut før koden er generert
+        """
+
+    def generate_many(self, prompts: Sequence[Prompt]) -> List[str]:
+        """Genererer kode for flere (oppgave, kontekst)-par, i samme rekkefølge."""
+        return [self.generate(task, context) for task, context in prompts]
+
+    def stream(self, task: str, context: str) -> Iterator[str]:
+        """Gir generert kode i biter. Standard er hele koden som én bit."""
+        yield self.generate(task, context)
+
+    def close(self) -> None:
+        """Frigjør tilkoblinger og tråder."""
+
+
+class DemoBackend(ModelBackend):
+    """
+    Demo-backend som gir fast kode uten nettverkskall.
+
+    Example:
+        >>> DemoBackend().generate("hei", "Standard kontekst")
+        "# Generert kode for: hei\\n# Kontekst: Standard kontekst\\nprint('Hei, verden!')"
+    """
+
+    def generate(self, task: str, context: str, timeout: Optional[float] = None) -> str:
+        return "".join(self.stream(task, context))
+
+    def stream(self, task: str, context: str) -> Iterator[str]:
+        yield f"# Generert kode for: {task}\n"
+        # Bare første linje: hentede kodebiter ville ellers gått igjen i ny kode
+        yield f"# Kontekst: {context.partition(chr(10))[0]}\n"
+        yield "print('Hei, verden!')"
+
+
+class HTTPModelBackend(ModelBackend):
+    """
+    Backend for en modelltjener over HTTP.
+
+    Tjeneren må ha ``POST /v1/generate`` som tar ``{"task", "context"}`` og
+    svarer ``{"code"}``. Med ``batching=True`` brukes også
+    ``POST /v1/generate_batch`` med ``{"prompts": [...]}`` og svar
+    ``{"codes": [...]}``: kall som kommer innenfor ``batch_window``
+    sekunder av hverandre sendes samlet, opptil ``batch_size`` om gangen.
+
+    Attributes:
+        base_url (str): Adressen til modelltjeneren
+        max_concurrency (int): Maks samtidige kall mot tjeneren
+        timeout (float): Tidsavbrudd per kall i sekunder
+        retries (int): Antall nye forsøk ved nettverksfeil, 429 og 5xx
+        pooled (bool): Gjenbruk tilkoblinger (keep-alive). False åpner en
+            ny tilkobling per kall, for sammenligning i benchmarks.
+        requests (int): Antall HTTP-kall sendt (inkludert nye forsøk)
+        batches (int): Antall batch-kall sendt
+
+    Example:
+        >>> backend = HTTPModelBackend("http://localhost:9000", max_concurrency=8)
+        >>> backend.generate_many([("a", "ctx"), ("b", "ctx")])
+    """
+
+    def __init__(self, base_url: str, max_concurrency: int = 16, timeout: float = 30.0,
+                 retries: int = 3, backoff: float = 0.1, pooled: bool = True,
+                 batching: bool = False, batch_size: int = 16,
+                 batch_window: float = 0.005) -> None:
+        """
+        Args:
+            base_url (str): Adressen til modelltjeneren
+            max_concurrency (int): Maks samtidige kall (og tilkoblinger i poolen)
+            timeout (float): Tidsavbrudd per kall i sekunder
+            retries (int): Antall nye forsøk etter første feilede kall
+            backoff (float): Første ventetid før nytt forsøk; dobles hver gang
+            pooled (bool): Gjenbruk tilkoblinger mellom kall
+            batching (bool): Slå sammen samtidige prompter til batch-kall
+            batch_size (int): Maks prompter per batch-kall
+            batch_window (float): Hvor lenge en batch venter på flere prompter
+        """
+        from httpx import Client, Limits
+
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.pooled = pooled
+        self.batching = batching
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.requests = 0
+        self.batches = 0
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._client: Optional["httpx.Client"] = None
+        if pooled:
+            self._client = Client(
+                timeout=timeout,
+                limits=Limits(max_connections=max_concurrency,
+                              max_keepalive_connections=max_concurrency),
+            )
+        self._queue: "queue.Queue[Optional[Tuple[Prompt, Future[str]]]]" = queue.Queue()
+        self._batcher: Optional[threading.Thread] = None
+        self._senders: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _post(self, path: str, payload: Dict[str, Any],
+              budget: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Sender ett kall med tak på samtidighet, tidsavbrudd og nye forsøk.
+
+        Med ``budget`` kortes hvert forsøk ned til tiden som er igjen, og
+        det gjøres ingen nye forsøk etter at budsjettet er brukt opp.
+
+        Raises:
+            TimeoutError: Hvis budsjettet er det som stoppet forsøkene
+            ModelBackendError: Hvis alle forsøkene feilet innenfor budsjettet
+        """
+        from httpx import TimeoutException, TransportError, post
+
+        deadline = None if budget is None else time.monotonic() + budget
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            timeout = self.timeout
+            if deadline is not None:
+                timeout = min(timeout, deadline - time.monotonic())
+                if timeout <= 0:
+                    raise TimeoutError(f"Tidsfristen gikk ut etter {attempt} forsøk mot {path}")
+            with self._slots:
+                self.requests += 1
+                try:
+                    if self._client is not None:
+                        response = self._client.post(self.base_url + path, json=payload,
+                                                     timeout=timeout)
+                    else:
+                        response = post(self.base_url + path, json=payload, timeout=timeout)
+                except TransportError as exc:
+                    error: Exception = exc
+                else:
+                    if response.status_code not in RETRY_STATUS:
+                        response.raise_for_status()
+                        data: Dict[str, Any] = response.json()
+                        return data
+                    error = ModelBackendError(f"HTTP {response.status_code} fra {path}")
+            if attempt < self.retries:
+                # Full jitter, slik at mange klienter ikke prøver igjen i takt
+                pause = random.uniform(0, delay)
+                if deadline is not None:
+                    pause = max(0.0, min(pause, deadline - time.monotonic()))
+                time.sleep(pause)
+                delay *= 2
+        if deadline is not None and (time.monotonic() >= deadline or (
+                timeout < self.timeout and isinstance(error, TimeoutException))):
+            # Siste forsøk ble kortet ned av fristen og rakk det ikke
+            raise TimeoutError(
+                f"Tidsfristen gikk ut etter {self.retries + 1} forsøk mot {path}") from error
+        raise ModelBackendError(
+            f"Modelltjeneren svarte ikke etter {self.retries + 1} forsøk: {error}") from error
+
+    def generate(self, task: str, context: str, timeout: Optional[float] = None) -> str:
+        if not self.batching:
+            return str(self._post("/v1/generate", {"task": task, "context": context},
+                                  timeout)["code"])
+        future: "Future[str]" = Future()
+        self._ensure_batcher()
+        self._queue.put(((task, context), future))
+        try:
+            return future.result(timeout)
+        except FuturesTimeout:
+            # Batch-kallet deles med andre prompter og fullføres for dem
+            raise TimeoutError("Tidsfristen gikk ut mens batch-kallet pågikk") from None
+
+    def generate_many(self, prompts: Sequence[Prompt]) -> List[str]:
+        if not self.batching:
+            return super().generate_many(prompts)
+        futures = []
+        self._ensure_batcher()
+        for prompt in prompts:
+            future: "Future[str]" = Future()
+            self._queue.put((prompt, future))
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def _ensure_batcher(self) -> None:
+        if self._batcher is not None:
+            return
+        with self._lock:
+            if self._batcher is None:
+                self._senders = ThreadPoolExecutor(self.max_concurrency,
+                                                   thread_name_prefix="pad-model")
+                self._batcher = threading.Thread(target=self._collect, name="pad-model-batcher",
+                                                 daemon=True)
+                self._batcher.start()
+
+    def _collect(self) -> None:
+        """Samler prompter fra køen til batcher og sender dem i bakgrunnen."""
+        assert self._senders is not None
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            self._senders.submit(self._send_batch, batch)
+
+    def _send_batch(self, batch: List[Tuple[Prompt, "Future[str]"]]) -> None:
+        try:
+            if len(batch) == 1:
+                (task, context), _ = batch[0]
+                codes = [self._post("/v1/generate", {"task": task, "context": context})["code"]]
+            else:
+                self.batches += 1
+                prompts = [{"task": task, "context": context} for (task, context), _ in batch]
+                codes = self._post("/v1/generate_batch", {"prompts": prompts})["codes"]
+            if len(codes) != len(batch):
+                # Uten ett svar per prompt vet vi ikke hvilken kode som hører til hvem
+                raise ModelBackendError(
+                    f"Modelltjeneren svarte med {len(codes)} koder for {len(batch)} prompter")
+        except BaseException as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+        for (_, future), code in zip(batch, codes):
+            future.set_result(str(code))
+
+    def close(self) -> None:
+        if self._batcher is not None:
+            self._queue.put(None)
+            self._batcher.join()
+            self._batcher = None
+        if self._senders is not None:
+            self._senders.shutdown(wait=True)
+            self._senders = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+def backend_from_env() -> ModelBackend:
+    """
+    Velger backend ut fra miljøvariabler.
+
+    ``PAD_MODEL_URL`` gir HTTPModelBackend; ellers brukes DemoBackend.
+    ``PAD_MODEL_CONCURRENCY``, ``PAD_MODEL_TIMEOUT``, ``PAD_MODEL_RETRIES``
+    og ``PAD_MODEL_BATCHING`` (``1`` for å slå på) justerer HTTP-backenden.
+
+    Returns:
+        ModelBackend: Backenden CodeGenAgent skal bruke
+    """
+    url = os.environ.get("PAD_MODEL_URL")
+    if not url:
+        return DemoBackend()
+    return HTTPModelBackend(
+        url,
+        max_concurrency=int(os.environ.get("PAD_MODEL_CONCURRENCY", "16")),
+        timeout=float(os.environ.get("PAD_MODEL_TIMEOUT", "30")),
+        retries=int(os.environ.get("PAD_MODEL_RETRIES", "3")),
+        batching=os.environ.get("PAD_MODEL_BATCHING", "0") == "1",
+    )
@@ -17,11 +17,34 @@ Example:
     >>> orchestrator.run()
 """
 
+import copy
 import logging
-from .codegen_agent import CodeGenAgent
-from .qa_agent import QualityAssuranceAgent
-from .context_agent import ContextAgent
-from .user_agent import UserInteractionAgent
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
+from functools import cached_property
+from typing import (IO, TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, Iterable,
+                    List, Optional, Set, Tuple, TypeVar)
+
+from .deadline import Deadline, DeadlineExceeded
+from .metrics import metrics
+from .singleflight import SingleFlight
+from .task_graph import Subtask, TaskGraph, TaskScheduler, merge_results, plan_graph
+
+if TYPE_CHECKING:
+    from .batch import Completed
+    from .codegen_agent import CodeGenAgent
+    from .context_agent import ContextAgent
+    from .qa_agent import QualityAssuranceAgent
+    from .user_agent import UserInteractionAgent
+
+T = TypeVar("T")
+
+STAGES = ("plan", "codegen", "qa")
+SKIPPED_FEEDBACK = {
+    "plan": "Forespørselen ble ikke startet: tidsfristen gikk ut før planleggingen.",
+    "codegen": "Kodegenerering hoppet over: tidsfristen gikk ut.",
+    "qa": "QA hoppet over: tidsfristen gikk ut.",
+}
 
 
 class OrchestratorAgent:
@@ -37,26 +60,69 @@ class OrchestratorAgent:
         context_agent (ContextAgent): Administrerer kodebase-kontekst
         codegen_agent (CodeGenAgent): Genererer og refaktorerer kode
         qa_agent (QualityAssuranceAgent): Utfører kvalitetssikring
+        codegen_workers (int): Maks samtidige kodegenereringer i async-stien
+        qa_workers (int): Maks samtidige QA-kjøringer i async-stien
+        singleflight (SingleFlight): Slår sammen identiske forespørsler som
+            pågår samtidig i denne orkestratoren (sesjonen)
+
+    Note:
+        Agentene opprettes lat ved første bruk, slik at oppstart (CLI,
+        batch-kjøringer, kalde containere) ikke betaler for lintemotoren
+        og de andre agentene før de faktisk trengs.
 
     Example:
         >>> orchestrator = OrchestratorAgent()
         >>> orchestrator.run()
     """
 
-    def __init__(self) -> None:
+    def __init__(self, codegen_workers: int = 16, qa_workers: int = 16,
+                 run_tests: bool = True) -> None:
         """
-        Initialiserer OrchestratorAgent med alle nødvendige agenter.
+        Initialiserer OrchestratorAgent.
+
+        De spesialiserte agentene opprettes først når de brukes.
 
-        Oppretter instanser av alle spesialiserte agenter som trengs for å
-        håndtere komplekse utviklingsoppgaver.
+        Args:
+            codegen_workers (int): Størrelse på tråd-poolen for kodegenerering
+                i ``process_request_async``
+            qa_workers (int): Størrelse på tråd-poolen for QA i
+                ``process_request_async``. Holdes separat slik at treg QA
+                ikke blokkerer kodegenerering for andre forespørsler.
+            run_tests (bool): Kjør tester i generert kode under QA. Brukerens
+                forespørsel kan styre hva som havner i koden, så API-et slår
+                dette av med mindre ``PAD_RUN_TESTS=1``.
         """
 
-        self.user_agent = UserInteractionAgent()
-        self.context_agent = ContextAgent()
-        self.codegen_agent = CodeGenAgent()
-        self.qa_agent = QualityAssuranceAgent()
+        self.codegen_workers = codegen_workers
+        self.run_tests = run_tests
+        self.qa_workers = qa_workers
+        self._codegen_executor: Optional[ThreadPoolExecutor] = None
+        self._qa_executor: Optional[ThreadPoolExecutor] = None
+        # Antall jobber per tråd-pool som venter eller kjører; deles med forks
+        self.pending: Dict[str, int] = {"codegen": 0, "codegen_chunk": 0, "qa": 0}
+        self.singleflight = SingleFlight()
         logging.basicConfig(level=logging.INFO)
 
+    @cached_property
+    def user_agent(self) -> "UserInteractionAgent":
+        from .user_agent import UserInteractionAgent
+        return UserInteractionAgent()
+
+    @cached_property
+    def context_agent(self) -> "ContextAgent":
+        from .context_agent import ContextAgent
+        return ContextAgent()
+
+    @cached_property
+    def codegen_agent(self) -> "CodeGenAgent":
+        from .codegen_agent import CodeGenAgent
+        return CodeGenAgent()
+
+    @cached_property
+    def qa_agent(self) -> "QualityAssuranceAgent":
+        from .qa_agent import QualityAssuranceAgent
+        return QualityAssuranceAgent()
+
     def run(self) -> None:
         """
         Hovedløkken for PAD-systemet. Tar imot brukerinput,
@@ -81,11 +147,56 @@ class OrchestratorAgent:
                 print("Avslutter PAD-systemet.")
                 break
 
-            result = self.process_request(user_input)
+            try:
+                result = self.process_request(user_input)
+            except ValueError as exc:
+                # Ugyldig oppgavegraf (ukjent avhengighet, sykel): samme svar som API-ets 400
+                self.user_agent.provide_feedback(f"Ugyldig forespørsel: {exc}")
+                continue
             self.user_agent.provide_feedback(result["feedback"])
             print(result["code"])
 
-    def plan(self, user_input: str) -> str:
+    def run_batch(self, lines: Iterable[str], out: IO[str], workers: int = 4,
+                  max_in_flight: Optional[int] = None, ordered: bool = False,
+                  done: Optional["Completed"] = None,
+                  timeout: Optional[float] = None) -> Dict[str, int]:
+        """
+        Ikke-interaktiv variant av ``run`` for mange forespørsler.
+
+        Leser forespørslene lat fra ``lines`` (én per linje, ren tekst eller
+        JSON med ``prompt``), kjører dem med ``process_request`` på en
+        tråd-pool og skriver ett JSON-resultat per linje til ``out``. Se
+        ``pad.batch`` for format og gjenopptak.
+
+        Args:
+            lines (Iterable[str]): Input, for eksempel en åpen fil eller ``sys.stdin``
+            out (IO[str]): Strømmen JSONL-resultatene skrives til
+            workers (int): Antall forespørsler som kjøres samtidig
+            max_in_flight (Optional[int]): Maks antall startede forespørsler
+                som ikke er skrevet ut ennå (standard ``2 * workers``)
+            ordered (bool): Skriv resultatene i input-rekkefølge
+            done (Optional[Completed]): Fullførte indekser som hoppes over
+            timeout (Optional[float]): Tidsfrist i sekunder per forespørsel,
+                se ``process_request``
+
+        Returns:
+            Dict[str, int]: Antall ``processed``, ``failed`` og ``skipped``
+
+        Example:
+            >>> import sys
+            >>> orchestrator = OrchestratorAgent()
+            >>> with open("prompts.txt") as fh:
+            ...     orchestrator.run_batch(fh, sys.stdout, workers=8, ordered=True)
+        """
+        from .batch import read_prompts, run_batch
+
+        def process(prompt: str) -> Dict[str, Any]:
+            return self.process_request(prompt, deadline=Deadline.after(timeout))
+
+        return run_batch(process, read_prompts(lines), out, workers=workers,
+                         max_in_flight=max_in_flight, ordered=ordered, done=done)
+
+    def plan(self, user_input: str, deadline: Optional[Deadline] = None) -> str:
         """
         Dekomponerer brukerens forespørsel til en plan.
 
@@ -94,6 +205,9 @@ class OrchestratorAgent:
 
         Args:
             user_input (str): Brukerens forespørsel i naturlig språk
+            deadline (Optional[Deadline]): Forespørselens tidsfrist; en
+                LLM-basert planlegger skal holde seg innenfor
+                ``deadline.budget("plan")``
 
         Returns:
             str: Strukturert plan for å håndtere forespørselen
@@ -107,10 +221,407 @@ class OrchestratorAgent:
 
         return user_input
 
-    def process_request(self, user_input: str):
-        logging.info("Starter prosessering av forespørsel")
-        plan = self.plan(user_input)
-        code = self.codegen_agent.generate_code(plan, self.context_agent)
-        feedback = self.qa_agent.validate_code(code)
-        self.context_agent.update_context_from_code(code)
+    def plan_graph(self, user_input: str) -> TaskGraph:
+        """
+        Dekomponerer forespørselen til en graf av deloppgaver.
+
+        En forespørsel med flere ``fil: beskrivelse``-linjer gir én deloppgave
+        per fil, med avhengigheter mellom dem (se ``pad/task_graph.py``).
+        Alle andre forespørsler gir én deloppgave.
+
+        Args:
+            user_input (str): Brukerens forespørsel i naturlig språk
+
+        Returns:
+            TaskGraph: Deloppgaver med avhengigheter
+
+        Raises:
+            ValueError: Ved sykliske eller ukjente avhengigheter
+        """
+        return plan_graph(user_input)
+
+    @staticmethod
+    def _subtask_prompt(subtask: Subtask, inputs: Dict[str, Dict[str, str]]) -> str:
+        prompt = f"{subtask.id}: {subtask.description}"
+        if inputs:
+            prompt += f" (bygger på {', '.join(inputs)})"
+        return prompt
+
+    def _call_stage(self, stage: str, deadline: Optional[Deadline], func: Callable[..., T],
+                    *args: Any, executor: Optional[ThreadPoolExecutor] = None) -> T:
+        """
+        Kjører ett trinn synkront innenfor trinnets andel av fristen.
+
+        Med ``executor`` kjøres trinnet i tråd-poolen, og det ventes bare
+        ``deadline.budget(stage)`` sekunder. Har trinnet ikke startet da,
+        avbrytes det; ellers fullføres det i bakgrunnen uten at noen venter.
+
+        Raises:
+            DeadlineExceeded: Hvis trinnet ikke rakk fristen
+        """
+        if deadline is None:
+            with metrics.span(stage):
+                return func(*args)
+        budget = deadline.budget(stage)
+        if budget <= 0:
+            raise DeadlineExceeded(stage)
+        with metrics.span(stage):
+            if executor is None:
+                try:
+                    return func(*args)
+                except TimeoutError:
+                    raise DeadlineExceeded(stage) from None
+            future = executor.submit(func, *args)
+            try:
+                return future.result(budget)
+            except (TimeoutError, FuturesTimeout):
+                future.cancel()
+                raise DeadlineExceeded(stage) from None
+
+    def _generate_and_validate(self, task: str, use_cache: bool, deadline: Optional[Deadline],
+                               bounded: bool = True) -> Tuple[str, str, List[str]]:
+        """Kodegenerering og QA for én oppgave. Returnerer (kode, rapport, hoppet over)."""
+        codegen_executor, qa_executor = self._executors() if bounded else (None, None)
+        try:
+            code = self._call_stage("codegen", deadline, self.codegen_agent.generate_code,
+                                    task, self.context_agent, use_cache, deadline,
+                                    executor=codegen_executor)
+        except DeadlineExceeded:
+            return "", SKIPPED_FEEDBACK["codegen"], ["codegen", "qa"]
+        try:
+            feedback = self._call_stage("qa", deadline, self.qa_agent.validate_code, code,
+                                        None, deadline, self.run_tests, executor=qa_executor)
+        except DeadlineExceeded:
+            return code, SKIPPED_FEEDBACK["qa"], ["qa"]
+        return code, feedback, []
+
+    def _run_subtask(self, subtask: Subtask, inputs: Dict[str, Dict[str, str]],
+                     use_cache: bool, deadline: Optional[Deadline] = None,
+                     skipped: Optional[Set[str]] = None) -> Dict[str, str]:
+        # Deloppgavene kjører allerede i codegen-poolen; trinnene kjøres derfor i samme tråd
+        code, feedback, stages = self._generate_and_validate(
+            self._subtask_prompt(subtask, inputs), use_cache, deadline, bounded=False)
+        if skipped is not None:
+            skipped.update(stages)
         return {"code": code, "feedback": feedback}
+
+    def _finish(self, code: str, feedback: str, skipped: Iterable[str],
+                generated: bool) -> Dict[str, Any]:
+        """Oppdaterer konteksten med ny kode og bygger resultatet."""
+        if generated:
+            with metrics.span("context"):
+                self.context_agent.update_context_from_code(code)
+        metrics.inc("pad_requests_total")
+        result: Dict[str, Any] = {"code": code, "feedback": feedback}
+        skipped = set(skipped)
+        if skipped:
+            metrics.inc("pad_requests_partial_total")
+            result["skipped"] = [stage for stage in STAGES if stage in skipped]
+            result["partial"] = True
+        return result
+
+    def process_request(self, user_input: str, use_cache: bool = True,
+                        deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """
+        Kjører hele pipelinen for én forespørsel.
+
+        Hvert trinn (``plan``, ``codegen``, ``qa`` og ``context``) måles med
+        ``pad.metrics``, og histogrammene eksporteres fra ``GET /metrics``.
+        Identiske forespørsler som kommer mens en kjører, venter på den og
+        får samme resultat (se ``request_key``).
+
+        Gjelder forespørselen flere filer (se ``plan_graph``), kjøres
+        deloppgavene parallelt med respekt for avhengighetene, og koden og
+        QA-rapportene slås sammen i grafens rekkefølge.
+
+        Med ``deadline`` får hvert trinn sin andel av tiden som er igjen
+        (``pad.deadline.STAGE_SHARES``). Et trinn som ikke rekker fristen,
+        hoppes over, og det som er ferdig returneres: ``skipped`` lister
+        trinnene som ble hoppet over, og ``partial`` er True. Arbeid som
+        ikke har startet, avbrytes; modellkall og testkjøringer får bare
+        tiden som er igjen.
+
+        Args:
+            user_input (str): Brukerens forespørsel i naturlig språk
+            use_cache (bool): Bruk CodeGenAgent sin cache for generert kode.
+                False tvinger ny generering for denne forespørselen.
+            deadline (Optional[Deadline]): Tidsfrist for hele forespørselen
+
+        Returns:
+            Dict[str, Any]: Generert ``code`` og QA-``feedback``, og
+            ``skipped``/``partial`` hvis noen trinn ble hoppet over
+
+        Note:
+            Samtidige, identiske forespørsler deler resultatet til den
+            første. Var det resultatet ufullstendig (den første hadde en
+            kortere frist), kjøres forespørselen på nytt for hver av de
+            andre som fortsatt har tid igjen.
+        """
+        led: List[bool] = []
+
+        def lead() -> Dict[str, Any]:
+            led.append(True)
+            return self._process_request(user_input, use_cache, deadline)
+
+        result = self.singleflight.do(self.request_key(user_input, use_cache), lead)
+        if not led and self._retry_shared(result, deadline):
+            result = self._process_request(user_input, use_cache, deadline)
+        return dict(result)
+
+    @staticmethod
+    def _retry_shared(result: Dict[str, Any], deadline: Optional[Deadline]) -> bool:
+        """Om et delt resultat er ufullstendig og denne forespørselen har tid til mer."""
+        return bool(result.get("partial")) and (deadline is None or not deadline.expired)
+
+    def request_key(self, user_input: str, use_cache: bool = True) -> Tuple[str, str, bool]:
+        """
+        Nøkkel for sammenslåing av like forespørsler.
+
+        Består av prompten med normalisert mellomrom og fingeravtrykket til
+        konteksten, slik at en forespørsel etter en kontekstendring ikke
+        slås sammen med en som startet før endringen.
+
+        Args:
+            user_input (str): Brukerens forespørsel i naturlig språk
+            use_cache (bool): Forespørsler uten cache slås ikke sammen med
+                forespørsler som bruker cachen
+
+        Returns:
+            Tuple[str, str, bool]: (normalisert prompt, kontekstens
+            fingeravtrykk, ``use_cache``)
+        """
+        return (" ".join(user_input.split()), self.context_agent.snapshot().fingerprint,
+                use_cache)
+
+    def _process_request(self, user_input: str, use_cache: bool,
+                         deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        logging.info("Starter prosessering av forespørsel")
+        if deadline is not None and deadline.expired:
+            return self._finish("", SKIPPED_FEEDBACK["plan"], STAGES, generated=False)
+        with metrics.span("plan"):
+            graph = self.plan_graph(user_input)
+            # Deloppgavene lager hver sin prompt, så planen trengs bare for én oppgave
+            plan = self.plan(user_input, deadline) if len(graph) == 1 else ""
+        if len(graph) > 1:
+            codegen_executor, _ = self._executors()
+            skipped: Set[str] = set()
+            results = TaskScheduler().run(
+                graph, lambda subtask, inputs: self._run_subtask(subtask, inputs, use_cache,
+                                                                 deadline, skipped),
+                codegen_executor)
+            merged = merge_results(graph, results)
+            generated = any(result["code"] for result in results.values())
+            return self._finish(merged["code"], merged["feedback"], skipped, generated)
+        code, feedback, stages = self._generate_and_validate(plan, use_cache, deadline,
+                                                             bounded=deadline is not None)
+        return self._finish(code, feedback, stages, generated="codegen" not in stages)
+
+    def _executors(self) -> Tuple[ThreadPoolExecutor, ThreadPoolExecutor]:
+        if self._codegen_executor is None:
+            self._codegen_executor = ThreadPoolExecutor(
+                self.codegen_workers, thread_name_prefix="pad-codegen")
+        if self._qa_executor is None:
+            self._qa_executor = ThreadPoolExecutor(
+                self.qa_workers, thread_name_prefix="pad-qa")
+        return self._codegen_executor, self._qa_executor
+
+    async def _run_stage(self, stage: str, executor: ThreadPoolExecutor,
+                         func: Callable[..., T], *args: Any,
+                         deadline: Optional[Deadline] = None) -> T:
+        """
+        Kjører ``func`` i en tråd-pool og måler trinnet, inkludert køtid.
+
+        Med ``deadline`` ventes det bare trinnets andel av tiden som er
+        igjen. Et kall som fortsatt står i køen da, fjernes fra poolen.
+
+        Raises:
+            DeadlineExceeded: Hvis trinnet ikke rakk fristen
+        """
+        # asyncio importeres her og ikke på modulnivå; CLI-oppstarten trenger det ikke
+        import asyncio
+
+        budget = None if deadline is None else deadline.budget(stage)
+        if budget is not None and budget <= 0:
+            raise DeadlineExceeded(stage)
+        loop = asyncio.get_running_loop()
+        self.pending[stage] += 1
+        try:
+            with metrics.span(stage):
+                call = loop.run_in_executor(executor, func, *args)
+                if budget is None:
+                    return await call
+                try:
+                    return await asyncio.wait_for(call, budget)
+                except (asyncio.TimeoutError, TimeoutError):
+                    raise DeadlineExceeded(stage) from None
+        finally:
+            self.pending[stage] -= 1
+
+    async def process_request_async(self, user_input: str, use_cache: bool = True,
+                                    deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """
+        Asynkron variant av ``process_request`` for bruk i event-løkken.
+
+        Blokkerende trinn (kodegenerering og QA) kjøres i hver sin
+        begrensede tråd-pool, slik at event-løkken og andre forespørsler
+        ikke venter på en treg QA-kjøring. Samtidige, identiske forespørsler
+        slås sammen til én kjøring, som i ``process_request``.
+
+        Args:
+            user_input (str): Brukerens forespørsel i naturlig språk
+            use_cache (bool): Som i ``process_request``
+            deadline (Optional[Deadline]): Som i ``process_request``
+
+        Returns:
+            Dict[str, Any]: ``code`` og ``feedback`` (og eventuelt
+            ``skipped``/``partial``), som ``process_request``
+
+        Example:
+            >>> orchestrator = OrchestratorAgent()
+            >>> result = asyncio.run(orchestrator.process_request_async("hei"))
+        """
+        led: List[bool] = []
+
+        def lead() -> Awaitable[Dict[str, Any]]:
+            led.append(True)
+            return self._process_request_async(user_input, use_cache, deadline)
+
+        result = await self.singleflight.do_async(self.request_key(user_input, use_cache), lead)
+        if not led and self._retry_shared(result, deadline):
+            result = await self._process_request_async(user_input, use_cache, deadline)
+        return dict(result)
+
+    async def _process_request_async(self, user_input: str, use_cache: bool,
+                                     deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        logging.info("Starter prosessering av forespørsel")
+        if deadline is not None and deadline.expired:
+            return self._finish("", SKIPPED_FEEDBACK["plan"], STAGES, generated=False)
+        codegen_executor, qa_executor = self._executors()
+        with metrics.span("plan"):
+            graph = self.plan_graph(user_input)
+            # Deloppgavene lager hver sin prompt, så planen trengs bare for én oppgave
+            plan = self.plan(user_input, deadline) if len(graph) == 1 else ""
+        skipped: Set[str] = set()
+
+        async def run_subtask(subtask: Subtask, inputs: Dict[str, Dict[str, str]]
+                              ) -> Dict[str, str]:
+            task = plan if len(graph) == 1 else self._subtask_prompt(subtask, inputs)
+            try:
+                code = await self._run_stage(
+                    "codegen", codegen_executor, self.codegen_agent.generate_code, task,
+                    self.context_agent, use_cache, deadline, deadline=deadline)
+            except DeadlineExceeded:
+                skipped.update(("codegen", "qa"))
+                return {"code": "", "feedback": SKIPPED_FEEDBACK["codegen"]}
+            try:
+                feedback = await self._run_stage("qa", qa_executor, self.qa_agent.validate_code,
+                                                 code, None, deadline, self.run_tests,
+                                                 deadline=deadline)
+            except DeadlineExceeded:
+                skipped.add("qa")
+                feedback = SKIPPED_FEEDBACK["qa"]
+            return {"code": code, "feedback": feedback}
+
+        if len(graph) > 1:
+            results = await TaskScheduler().run_async(graph, run_subtask)
+            merged = merge_results(graph, results)
+            code, feedback = merged["code"], merged["feedback"]
+            generated = any(result["code"] for result in results.values())
+        else:
+            result = await run_subtask(next(iter(graph)), {})
+            code, feedback = result["code"], result["feedback"]
+            generated = "codegen" not in skipped
+        return self._finish(code, feedback, skipped, generated)
+
+    async def process_request_stream(self, user_input: str, deadline: Optional[Deadline] = None
+                                     ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Strømmende variant av ``process_request_async``.
+
+        Gir ``("code", bit)`` for hver kodebit etter hvert som den genereres,
+        og til slutt ``("feedback", rapport)`` når QA er ferdig. Kontekst
+        oppdateres med den komplette koden etter siste hendelse.
+
+        Args:
+            user_input (str): Brukerens forespørsel i naturlig språk
+            deadline (Optional[Deadline]): Som i ``process_request``. Rekker
+                ikke kodegenereringen fristen, avsluttes strømmen med
+                ``SKIPPED_FEEDBACK["codegen"]`` etter bitene som ble sendt,
+                og konteksten oppdateres ikke med den ufullstendige koden.
+
+        Yields:
+            Tuple[str, str]: Hendelsestype og data
+        """
+        logging.info("Starter strømmende prosessering av forespørsel")
+        if deadline is not None and deadline.expired:
+            self._finish("", "", STAGES, generated=False)
+            yield "feedback", SKIPPED_FEEDBACK["plan"]
+            return
+        codegen_executor, qa_executor = self._executors()
+        with metrics.span("plan"):
+            plan = self.plan(user_input, deadline)
+        chunks = self.codegen_agent.generate_code_stream(plan, self.context_agent)
+        # Alle bitene deler kodegenereringens andel av fristen, ikke én andel hver
+        codegen_deadline = None if deadline is None else Deadline(deadline.budget("codegen"))
+        parts = []
+        while True:
+            try:
+                chunk = await self._run_stage("codegen_chunk", codegen_executor, next, chunks,
+                                              None, deadline=codegen_deadline)
+            except DeadlineExceeded:
+                self._finish("", "", ("codegen", "qa"), generated=False)
+                yield "feedback", SKIPPED_FEEDBACK["codegen"]
+                return
+            if chunk is None:
+                break
+            parts.append(chunk)
+            yield "code", chunk
+        code = "".join(parts)
+        skipped: List[str] = []
+        try:
+            feedback = await self._run_stage("qa", qa_executor, self.qa_agent.validate_code,
+                                             code, None, deadline, self.run_tests,
+                                             deadline=deadline)
+        except DeadlineExceeded:
+            skipped.append("qa")
+            feedback = SKIPPED_FEEDBACK["qa"]
+        yield "feedback", feedback
+        self._finish(code, feedback, skipped, generated=True)
+
+    def fork(self, context_agent: Optional["ContextAgent"] = None) -> "OrchestratorAgent":
+        """
+        Lager en orkestrator med egen kontekst som deler resten med denne.
+
+        Den nye orkestratoren deler CodeGenAgent, QualityAssuranceAgent og
+        tråd-poolene med originalen, men har sin egen ContextAgent. Brukes
+        for sesjoner i API-et, der hver klient skal ha egen kontekst uten å
+        betale for egne agenter og tråder. Kall ``close`` bare på originalen.
+
+        Args:
+            context_agent (Optional[ContextAgent]): Kontekst for den nye
+                orkestratoren. Standard er en ny, tom ContextAgent.
+
+        Returns:
+            OrchestratorAgent: Orkestrator med delte agenter og egen kontekst
+        """
+        from .context_agent import ContextAgent
+
+        # Opprett de delte agentene nå, ellers ville hver fork laget sine egne
+        for name in ("codegen_agent", "qa_agent"):
+            getattr(self, name)
+        self._executors()
+        forked = copy.copy(self)
+        forked.context_agent = context_agent or ContextAgent()
+        forked.singleflight = SingleFlight()
+        return forked
+
+    def close(self) -> None:
+        """Stopper tråd-poolene, QA-agentens arbeidere og modell-backenden."""
+        for executor in (self._codegen_executor, self._qa_executor):
+            if executor is not None:
+                executor.shutdown(wait=False)
+        self._codegen_executor = self._qa_executor = None
+        for name in ("codegen_agent", "qa_agent"):
+            agent = self.__dict__.get(name)
+            if agent is not None:
+                agent.close()
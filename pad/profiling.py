@@ -0,0 +1,212 @@
+"""
+profiling.py
+Profilering av en kjørende PAD-prosess ved behov.
+
+Ingenting her kjører før det blir bedt om det, så det koster ingenting når
+det ikke er i bruk:
+
+- StackSampler samler stakker fra alle tråder (``sys._current_frames``)
+  med et fast intervall i et tidsbegrenset vindu, og gir dem som
+  sammenslåtte stakker (``tråd;ytre;...;indre antall``), klare for
+  ``flamegraph.pl`` eller speedscope. Samplingen er veggklokkebasert, så
+  tråder som venter, kommer også med; ``idle=False`` filtrerer bort
+  stakker som står og venter i ``threading``, ``queue`` eller ``selectors``.
+- MemoryTracker starter ``tracemalloc``, tar et utgangspunkt og viser
+  hvilke kodelinjer som har allokert mest siden, for å finne vekst som i
+  ``ContextAgent.code_history``. ``stop`` slår sporingen av igjen.
+
+Classes:
+    StackSampler: Tidsbegrenset sampling av stakker fra alle tråder.
+    MemoryTracker: Slår tracemalloc av og på og sammenligner øyeblikksbilder.
+
+Functions:
+    collapse: Formaterer talte stakker som sammenslåtte linjer.
+
+Example:
+    >>> from pad.profiling import StackSampler, collapse
+    >>> stacks = StackSampler(interval=0.01).sample(0.1)
+    >>> all(line.rsplit(" ", 1)[1].isdigit() for line in collapse(stacks).splitlines())
+    True
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Dict, List, Optional
+
+MAX_SECONDS = 60.0
+IDLE_FILES = {"threading.py", "queue.py", "selectors.py", "socketserver.py"}
+
+
+def _frame_name(code: CodeType) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse(stacks: Dict[str, int]) -> str:
+    """
+    Formaterer talte stakker som sammenslåtte linjer, flest først.
+
+    Example:
+        >>> collapse({"main;hent (api.py:10)": 3})
+        'main;hent (api.py:10) 3\\n'
+    """
+    return "".join(f"{stack} {count}\n"
+                   for stack, count in sorted(stacks.items(), key=lambda item: -item[1]))
+
+
+class StackSampler:
+    """
+    Tidsbegrenset sampling av stakker fra alle tråder.
+
+    Bare ett vindu kan kjøre om gangen per sampler; samplerens egen tråd
+    og tråden som venter på resultatet, er ikke med.
+
+    Attributes:
+        interval (float): Sekunder mellom hver sampling
+        samples (int): Antall samplinger i siste vindu
+    """
+
+    def __init__(self, interval: float = 0.005) -> None:
+        """
+        Args:
+            interval (float): Sekunder mellom hver sampling
+        """
+        self.interval = interval
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self._lock.locked()
+
+    def sample(self, seconds: float, idle: bool = True) -> Dict[str, int]:
+        """
+        Sampler alle tråder i ``seconds`` sekunder og blokkerer til vinduet er over.
+
+        Args:
+            seconds (float): Vinduets lengde, maks ``MAX_SECONDS``
+            idle (bool): Ta med tråder som venter på lås, kø eller socket
+
+        Returns:
+            Dict[str, int]: Antall samplinger per sammenslått stakk
+
+        Raises:
+            ValueError: Hvis ``seconds`` ikke er mellom 0 og ``MAX_SECONDS``
+            RuntimeError: Hvis et vindu allerede kjører
+        """
+        if not 0 < seconds <= MAX_SECONDS:
+            raise ValueError(f"Vinduet må være mellom 0 og {MAX_SECONDS:g} sekunder")
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("Et profileringsvindu kjører allerede")
+        try:
+            stacks: "Counter[str]" = Counter()
+            caller = threading.get_ident()
+            sampler = threading.Thread(target=self._run, args=(seconds, idle, caller, stacks),
+                                       name="pad-profiler", daemon=True)
+            sampler.start()
+            sampler.join()
+            return dict(stacks)
+        finally:
+            self._lock.release()
+
+    def _run(self, seconds: float, idle: bool, caller: int, stacks: "Counter[str]") -> None:
+        skip = {threading.get_ident(), caller}
+        end = time.monotonic() + seconds
+        self.samples = 0
+        while time.monotonic() < end:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident in skip:
+                    continue
+                if not idle and os.path.basename(frame.f_code.co_filename) in IDLE_FILES:
+                    continue
+                parts = []
+                current: Optional[FrameType] = frame
+                while current is not None:
+                    parts.append(_frame_name(current.f_code))
+                    current = current.f_back
+                parts.append(names.get(ident, str(ident)))
+                stacks[";".join(reversed(parts))] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+
+
+class MemoryTracker:
+    """
+    Slår tracemalloc av og på og sammenligner øyeblikksbilder.
+
+    tracemalloc gjør hver allokering tregere mens den er på, så den startes
+    bare av ``start`` og stoppes av ``stop``.
+
+    Example:
+        >>> tracker = MemoryTracker()
+        >>> tracker.start()
+        >>> data = ["x" * 100 for _ in range(10000)]
+        >>> tracker.diff(limit=3)[-1].startswith("Totalt sporet:")
+        True
+        >>> tracker.stop()
+    """
+
+    def __init__(self) -> None:
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self._baseline is not None
+
+    def start(self, frames: int = 1) -> None:
+        """
+        Starter sporing og tar utgangspunktet det sammenlignes med.
+
+        Args:
+            frames (int): Antall rammer som lagres per allokering. Flere
+                rammer gir bedre tilbakesporing, men koster mer.
+        """
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+            self._baseline = self._snapshot()
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        # Sporingens egne allokeringer er ikke interessante
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)])
+
+    def diff(self, limit: int = 20, key_type: str = "lineno", reset: bool = False) -> List[str]:
+        """
+        Viser hvor minnebruken har endret seg mest siden utgangspunktet.
+
+        Args:
+            limit (int): Antall linjer
+            key_type (str): ``lineno``, ``filename`` eller ``traceback``
+            reset (bool): Bruk det nye øyeblikksbildet som utgangspunkt videre
+
+        Returns:
+            List[str]: Én linje per kodested, størst vekst først, og til
+            slutt sporet minne totalt
+
+        Raises:
+            RuntimeError: Hvis sporingen ikke er startet
+        """
+        with self._lock:
+            if self._baseline is None or not tracemalloc.is_tracing():
+                raise RuntimeError("Minnesporing er ikke startet")
+            snapshot = self._snapshot()
+            stats = snapshot.compare_to(self._baseline, key_type)
+            if reset:
+                self._baseline = snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [str(stat) for stat in stats[:limit]]
+        lines.append(f"Totalt sporet: {current / 1024:.1f} KiB (topp {peak / 1024:.1f} KiB)")
+        return lines
+
+    def stop(self) -> None:
+        """Stopper sporingen og glemmer utgangspunktet."""
+        with self._lock:
+            self._baseline = None
+            tracemalloc.stop()
@@ -15,7 +15,17 @@ Example:
     >>> result = qa_agent.validate_code("print('hello world')")
     >>> print(result)
 """
+import hashlib
+import os
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Sequence, Type
 
+from .deadline import Deadline
+from .lint_engine import LintEngine, LintWorkerPool
+from .qa_cache import ValidationCache
+from .qa_checks import (DEFAULT_CHECKS, FUNCTION, PRINT, TESTS, Analysis, Check, CheckRunner,
+                        FunctionCheck, PrintCheck, TestCheck)
+from .sandbox import SandboxPool, SandboxResult
 
 
 class QualityAssuranceAgent:
@@ -40,19 +50,156 @@ class QualityAssuranceAgent:
         >>> print(result)
     """
 
-    def validate_code(self, code: str) -> str:
+    def __init__(self, lint_workers: int = 0,
+                 config_path: Optional[str] = None,
+                 cache_size: int = 1024,
+                 cache_path: Optional[str] = None,
+                 batch_workers: Optional[int] = None,
+                 checks: Optional[Sequence[Type[Check]]] = None,
+                 sandbox_workers: int = 2,
+                 test_timeout: float = 10.0) -> None:
         """
-        Utfører grunnleggende "statisk" analyse og simulerer testkjøring.
+        Initialiserer QualityAssuranceAgent med en in-process lintemotor.
+
+        Args:
+            lint_workers (int): Antall varme lint-prosesser. 0 (standard)
+                betyr at lintingen kjøres direkte i denne prosessen.
+            config_path (Optional[str]): Sti til ``.flake8``-konfigurasjonen
+            cache_size (int): Antall rapporter i valideringscachen. 0 slår
+                cachen av.
+            cache_path (Optional[str]): SQLite-fil for persistent cache
+            batch_workers (Optional[int]): Antall prosesser ``validate_many``
+                fordeler arbeidet på. Standard er antall CPU-kjerner.
+            checks (Optional[Sequence[Type[Check]]]): AST-sjekker som kjøres
+                i én felles gjennomgang. Standard er ``DEFAULT_CHECKS``.
+            sandbox_workers (int): Antall varme fork-servere for testkjøring.
+                Startes først når det er tester å kjøre. 0 slår testkjøring av.
+            test_timeout (float): Maks veggklokketid per testkjøring i sekunder
+        """
+        self.lint_timeout = 5.0
+        self.lint_engine = LintEngine(config_path)
+        # Fakta-sjekkene styrer rapporten, så de er alltid med
+        self.checks = CheckRunner([FunctionCheck, PrintCheck, TestCheck,
+                                   *(DEFAULT_CHECKS if checks is None else checks)])
+        self.sandbox: Optional[SandboxPool] = None
+        if sandbox_workers > 0:
+            self.sandbox = SandboxPool(sandbox_workers, timeout=test_timeout)
+        self.cache: Optional[ValidationCache] = None
+        if cache_size > 0:
+            self.cache = ValidationCache(cache_size, cache_path)
+        self.config_path = config_path
+        self.batch_workers = batch_workers or os.cpu_count() or 1
+        self.lint_pool: Optional[LintWorkerPool] = None
+        self._batch_pool: Optional[LintWorkerPool] = None
+        if lint_workers > 0:
+            self.lint_pool = LintWorkerPool(lint_workers, config_path)
+
+    def _lint(self, code: str, analysis: Analysis,
+              deadline: Optional[Deadline] = None) -> List[str]:
+        if self.lint_pool is not None:
+            timeout = self.lint_timeout if deadline is None else deadline.cap(self.lint_timeout)
+            return self.lint_pool.check(code, timeout, analysis.findings)
+        return self.lint_engine.check(code, tree=analysis.tree, extra=analysis.findings)
+
+    def _fingerprint(self, tests: Optional[str] = None, run_tests: bool = False) -> str:
+        fingerprint = f"{self.lint_engine.config_fingerprint()}:{self.checks.fingerprint}"
+        if tests:
+            fingerprint += ":" + hashlib.sha256(tests.encode("utf-8")).hexdigest()[:16]
+        elif run_tests:
+            fingerprint += ":tests"
+        return fingerprint
+
+    @staticmethod
+    def _cacheable(report: str) -> bool:
+        # Feil i infrastrukturen og avbrutte testkjøringer kan gå bra neste gang
+        return not report.startswith("Statisk analyse feilet") and "Tester: avbrutt" not in report
+
+    @staticmethod
+    def _format_findings(findings: List[str]) -> str:
+        if findings:
+            return "Flake8-feil:\n" + "\n".join(findings) + "\n"
+        return "Koden er PEP8-kompatibel."
+
+    def _get_batch_pool(self) -> LintWorkerPool:
+        if self.lint_pool is not None:
+            return self.lint_pool
+        if self._batch_pool is None:
+            self._batch_pool = LintWorkerPool(self.batch_workers, self.config_path)
+        return self._batch_pool
+
+    def close(self) -> None:
+        """Stopper eventuelle lint-arbeidere og fork-servere og lukker cachen."""
+        for pool in (self.lint_pool, self._batch_pool):
+            if pool is not None:
+                pool.close()
+        self.lint_pool = self._batch_pool = None
+        if self.sandbox is not None:
+            self.sandbox.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def run_tests(self, code: str, tests: Optional[str] = None,
+                  timeout: Optional[float] = None) -> SandboxResult:
+        """
+        Kjører tester i sandkassen og returnerer et strukturert resultat.
+
+        Args:
+            code (str): Koden som testes (importeres som ``solution``)
+            tests (Optional[str]): Testkode; uten den kjøres testene i ``code``
+            timeout (Optional[float]): Sekunder kjøringen kan bruke, hvis
+                kortere enn ``test_timeout``
+
+        Returns:
+            SandboxResult: Status og resultat per test
+
+        Raises:
+            RuntimeError: Hvis agenten er laget med ``sandbox_workers=0``
+
+        Example:
+            >>> qa_agent = QualityAssuranceAgent()
+            >>> qa_agent.run_tests("def test_ok():\n    assert 1 + 1 == 2\n").status
+            'passed'
+        """
+        if self.sandbox is None:
+            raise RuntimeError("Testkjøring er slått av (sandbox_workers=0)")
+        return self.sandbox.run(code, tests, timeout)
+
+    def _with_tests(self, report: str, code: str, analysis: Analysis,
+                    tests: Optional[str] = None, deadline: Optional[Deadline] = None,
+                    run_tests: bool = False) -> str:
+        """Legger til testresultatet hvis det er bedt om tester og finnes tester å kjøre."""
+        if self.sandbox is None or analysis.syntax_error is not None:
+            return report
+        if not tests and not (run_tests and TESTS in analysis.facts):
+            return report
+        timeout = None if deadline is None else deadline.remaining()
+        return f"{report.rstrip()}\n{self.run_tests(code, tests, timeout).summary()}"
+
+    def validate_code(self, code: str, tests: Optional[str] = None,
+                      deadline: Optional[Deadline] = None, run_tests: bool = False) -> str:
+        """
+        Utfører "statisk" analyse og kjører eventuelle tester.
 
         Analyserer gitt kode for kvalitet, stil og potensielle problemer.
         Returnerer en rapport med funn og anbefalinger.
 
         Args:
             code (str): Kildekode som skal valideres
+            tests (Optional[str]): Testkode som importerer fra ``solution``.
+                Gitt testkode kjøres alltid.
+            deadline (Optional[Deadline]): Forespørselens tidsfrist. Lint-
+                arbeidere og testkjøring får bare tiden som er igjen; en
+                cachet rapport returneres selv om fristen har gått ut.
+            run_tests (bool): Kjør tester som finnes i ``code`` selv. Av som
+                standard, siden det betyr å kjøre koden; slås bare på for
+                kode man stoler på, som modellens egen utdata.
 
         Returns:
             str: Valideringsrapport med status og eventuelle advarsler
 
+        Raises:
+            DeadlineExceeded: Hvis fristen har gått ut og rapporten ikke er cachet
+
         Example:
             >>> qa_agent = QualityAssuranceAgent()
             >>> result = qa_agent.validate_code("print('hello')")
@@ -60,25 +207,122 @@ class QualityAssuranceAgent:
             Koden inneholder print-setning. (Simulert QA: OK)
 
         Note:
-            Nåværende implementasjon er en demo som kun sjekker for print-setninger.
-            I produksjon ville dette inkludere omfattende statisk analyse,
-            linting, sikkerhetssjegging og automatiserte tester.
+            Koden parses én gang, og AST-sjekkene (``qa_checks``) kjøres i
+            én gjennomgang av treet. Syntaksfeil rapporteres uten at noen
+            linter kjøres. Kode med funksjoner lintes in-process med samme
+            sjekker som flake8 (pyflakes og pycodestyle) på det samme treet.
+            Rapporter caches på hash av koden, linter-konfigurasjonen og
+            settet med sjekker.
+
+            Tester kjøres i en varm fork-server (``pad/sandbox.py``) med
+            grenser for CPU-tid, minne og veggklokketid, og resultatet
+            legges til sist i rapporten. Sandkassen isolerer ikke mot
+            ondsinnet kode, så kode fra klienter skal aldri kjøres med
+            ``run_tests=True``.
+
+        """
+        if self.cache is None:
+            return self._validate_uncached(code, tests=tests, deadline=deadline,
+                                           run_tests=run_tests)
+        fingerprint = self._fingerprint(tests, run_tests)
+        report = self.cache.get(code, fingerprint)
+        if report is None:
+            report = self._validate_uncached(code, tests=tests, deadline=deadline,
+                                             run_tests=run_tests)
+            if self._cacheable(report):
+                self.cache.put(code, fingerprint, report)
+        return report
+
+    def _validate_uncached(self, code: str, analysis: Optional[Analysis] = None,
+                           tests: Optional[str] = None,
+                           deadline: Optional[Deadline] = None, run_tests: bool = False) -> str:
+        if deadline is not None:
+            deadline.check("qa")
+        if analysis is None:
+            analysis = self.checks.run(code)
+        return self._with_tests(self._static_report(code, analysis, deadline), code, analysis,
+                                tests, deadline, run_tests)
+
+    def _static_report(self, code: str, analysis: Analysis,
+                       deadline: Optional[Deadline] = None) -> str:
+        if analysis.syntax_error is not None:
+            return self._format_findings(self.lint_engine.format(code, [analysis.syntax_error]))
+        if FUNCTION in analysis.facts:
+            try:
+                findings = self._lint(code, analysis, deadline)
+            except Exception as e:
+                return f"Statisk analyse feilet: {str(e)}"
+            return self._format_findings(findings)
+        if analysis.findings:
+            findings = self.lint_engine.format(code, analysis.findings)
+            if findings:
+                return self._format_findings(findings)
+        if PRINT in analysis.facts:
+            return "Koden inneholder print-setning. (Simulert QA: OK)"
+        return "Advarsel: Ingen validerbar Python-funksjon funnet."
+
+    def validate_many(self, codes: Sequence[str], run_tests: bool = False) -> List[str]:
+        """
+        Validerer mange kodebiter parallelt over en prosesspool.
+
+        Rapportene returneres i samme rekkefølge som input. Cachede og
+        dupliserte kodebiter lintes bare én gang, og resten fordeles på
+        ``batch_workers`` prosesser. Hver kodebit har sin egen tidsgrense
+        (``lint_timeout``), så én treg kodebit påvirker ikke de andre.
+
+        Args:
+            codes (Sequence[str]): Kodebitene som skal valideres
+            run_tests (bool): Kjør tester som finnes i kodebitene, som i
+                ``validate_code``. Av som standard.
+
+        Returns:
+            List[str]: Én valideringsrapport per kodebit, i input-rekkefølge
 
+        Example:
+            >>> qa_agent = QualityAssuranceAgent(batch_workers=4)
+            >>> reports = qa_agent.validate_many(["print('a')", "x = 1"])
+            >>> print(reports[0])
+            Koden inneholder print-setning. (Simulert QA: OK)
         """
-        if "def " in code:
-            with tempfile.NamedTemporaryFile(suffix=".py", delete=False) as tmp:
-                tmp.write(code.encode("utf-8"))
-                tmp.flush()
+        fingerprint = self._fingerprint(run_tests=run_tests)
+        reports: Dict[str, str] = {}
+        pending: Dict[str, Analysis] = {}
+        # Kodebiter uten funksjon eller med syntaksfeil valideres direkte her
+        direct: List[str] = []
+        for code in dict.fromkeys(codes):
+            cached = self.cache.get(code, fingerprint) if self.cache is not None else None
+            if cached is not None:
+                reports[code] = cached
+                continue
+            analysis = self.checks.run(code)
+            if analysis.syntax_error is None and FUNCTION in analysis.facts:
+                pending[code] = analysis
+            else:
+                reports[code] = self._validate_uncached(code, analysis, run_tests=run_tests)
+                direct.append(code)
+
+        if len(pending) == 1:
+            code, analysis = next(iter(pending.items()))
+            reports[code] = self._validate_uncached(code, analysis, run_tests=run_tests)
+        elif pending:
+            # Treet sendes ikke over prosessgrensen; arbeiderne parser på nytt
+            pool = self._get_batch_pool()
+            futures = [(code, pool.submit(code, self.lint_timeout, analysis.findings))
+                       for code, analysis in pending.items()]
+            for code, future in futures:
                 try:
-                    result = subprocess.run(
-                        ["flake8", tmp.name],
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        timeout=5,
-                    )
-                    if result.stdout:
-                        return f"Flake8-feil:\n{result.stdout.decode()}"
-                    return "Koden er PEP8-kompatibel."
+                    reports[code] = self._with_tests(self._format_findings(future.result()),
+                                                     code, pending[code], run_tests=run_tests)
+                except BrokenProcessPool as e:
+                    # En krasjet arbeider gjør poolen ubrukelig; lag en ny neste gang
+                    if pool is self._batch_pool:
+                        self._batch_pool = None
+                    reports[code] = f"Statisk analyse feilet: {str(e)}"
                 except Exception as e:
-                    return f"Statisk analyse feilet: {str(e)}"
-        return "Ingen validerbar Python-funksjon funnet."
+                    reports[code] = f"Statisk analyse feilet: {str(e)}"
+
+        if self.cache is not None:
+            for code in [*direct, *pending]:
+                if self._cacheable(reports[code]):
+                    self.cache.put(code, fingerprint, reports[code])
+        return [reports[code] for code in codes]
@@ -0,0 +1,167 @@
+"""
+qa_cache.py
+Innholdsadressert cache for valideringsrapporter fra QualityAssuranceAgent.
+
+CodeGenAgent produserer ofte byte-identisk kode, og da er det unødvendig å
+kjøre statisk analyse på nytt. Rapporten lagres under en hash av koden og
+et fingeravtrykk av linter-konfigurasjonen (``.flake8``), i en begrenset
+LRU i minnet og eventuelt i en SQLite-fil som overlever omstart.
+
+Classes:
+    ValidationCache: To-nivå cache (minne + valgfri disk) for QA-rapporter.
+
+Example:
+    >>> from pad.qa_cache import ValidationCache
+    >>> cache = ValidationCache(maxsize=128)
+    >>> cache.put("def f(): pass", "cfg", "Koden er PEP8-kompatibel.")
+    >>> cache.get("def f(): pass", "cfg")
+    'Koden er PEP8-kompatibel.'
+"""
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+from .utils import LRUCache
+
+
+class ValidationCache:
+    """
+    Cache for valideringsrapporter med LRU i minnet og valgfri disk-lagring.
+
+    Nøkkelen er SHA-256 av konfigurasjonens fingeravtrykk og koden. Når
+    fingeravtrykket endres (``.flake8`` er redigert), tømmes minnet. Rader
+    på disk slettes ikke, siden prosesser med en annen konfigurasjon kan
+    dele filen; de leses bare under sitt eget fingeravtrykk.
+
+    Attributes:
+        path (Optional[str]): Sti til SQLite-filen, eller None for kun minne
+        hits (int): Treff i minnet eller på disk
+        misses (int): Oppslag som ikke fant noen rapport
+        disk_hits (int): Treff som ble hentet fra disk
+        invalidations (int): Antall ganger cachen er tømt pga. ny konfigurasjon
+
+    Example:
+        >>> cache = ValidationCache(path="/tmp/pad_qa_cache.sqlite")
+        >>> cache.stats()["size"]
+        0
+    """
+
+    def __init__(self, maxsize: int = 1024, path: Optional[str] = None) -> None:
+        """
+        Args:
+            maxsize (int): Maksimalt antall rapporter i minnet
+            path (Optional[str]): SQLite-fil for det persistente nivået
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.invalidations = 0
+        self._memory: LRUCache[str] = LRUCache(maxsize)
+        self._fingerprint: Optional[str] = None
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS qa_cache ("
+                "key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, report TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(code: str, fingerprint: str) -> str:
+        """Lager cachenøkkelen for en kodebit under en gitt konfigurasjon."""
+        digest = hashlib.sha256(fingerprint.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(code.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _check_fingerprint(self, fingerprint: str) -> None:
+        if fingerprint == self._fingerprint:
+            return
+        with self._lock:
+            if fingerprint == self._fingerprint:
+                return
+            if self._fingerprint is not None:
+                self.invalidations += 1
+            self._fingerprint = fingerprint
+            self._memory.clear()
+
+    def get(self, code: str, fingerprint: str) -> Optional[str]:
+        """
+        Slår opp en tidligere rapport for koden.
+
+        Args:
+            code (str): Koden som skal valideres
+            fingerprint (str): Fingeravtrykk av linter-konfigurasjonen
+
+        Returns:
+            Optional[str]: Lagret rapport, eller None ved bom
+        """
+        self._check_fingerprint(fingerprint)
+        key = self.make_key(code, fingerprint)
+        report = self._memory.get(key)
+        if report is None and self._db is not None:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT report FROM qa_cache WHERE key = ? AND fingerprint = ?",
+                    (key, fingerprint)
+                ).fetchone()
+                if row is not None:
+                    self.disk_hits += 1
+            if row is not None:
+                report = row[0]
+                self._memory.put(key, report)
+        # QA-poolens tråder og batch-kallene slår opp samtidig
+        with self._lock:
+            if report is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return report
+
+    def put(self, code: str, fingerprint: str, report: str) -> None:
+        """Lagrer en rapport i minnet og eventuelt på disk."""
+        self._check_fingerprint(fingerprint)
+        key = self.make_key(code, fingerprint)
+        self._memory.put(key, report)
+        if self._db is not None:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO qa_cache (key, fingerprint, report) VALUES (?, ?, ?)",
+                    (key, fingerprint, report),
+                )
+                self._db.commit()
+
+    def clear(self) -> None:
+        """Tømmer både minne- og disknivået."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM qa_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returnerer tellere for cachen.
+
+        Returns:
+            Dict[str, int]: ``hits``, ``misses``, ``disk_hits``,
+            ``invalidations`` og ``size`` (antall rapporter i minnet)
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "invalidations": self.invalidations,
+                "size": len(self._memory),
+            }
+
+    def close(self) -> None:
+        """Lukker SQLite-tilkoblingen."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
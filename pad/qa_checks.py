@@ -0,0 +1,259 @@
+"""
+qa_checks.py
+AST-sjekker for QualityAssuranceAgent, kjørt i én felles gjennomgang av treet.
+
+Koden parses én gang. Hver registrerte sjekk oppgir hvilke nodetyper den
+vil se, og CheckRunner går gjennom treet én gang og sender hver node bare
+til sjekkene som har bedt om den typen. En ny sjekk koster dermed noen få
+funksjonskall på nodene den bryr seg om, ikke en ny parsing eller en ny
+gjennomgang av hele treet. Syntaksfeil stopper kjøringen før noen sjekk
+(eller linter) kjøres.
+
+Sjekker kan både rapportere funn (i flake8-format, med ``PAD``-koder) og
+registrere fakta om koden, f.eks. at den inneholder en funksjon.
+
+Classes:
+    Analysis: Resultatet av én kjøring: tre, syntaksfeil, funn og fakta.
+    Check: Basisklasse for sjekker.
+    FunctionCheck: Registrerer om koden definerer en funksjon.
+    PrintCheck: Registrerer om koden kaller ``print``.
+    TestCheck: Registrerer om koden inneholder tester.
+    DangerousCallCheck: Rapporterer ``eval``/``exec``, ``os.system`` og ``shell=True``.
+    MissingDocstringCheck: Rapporterer funksjoner og klasser uten docstring.
+    CheckRunner: Kjører et sett sjekker i én gjennomgang av treet.
+
+Functions:
+    register_check: Dekoratør som legger en sjekk til standardsettet.
+    syntax_finding: Gjør en SyntaxError om til et E999-funn.
+
+Example:
+    >>> from pad.qa_checks import CheckRunner, DEFAULT_CHECKS
+    >>> analysis = CheckRunner(DEFAULT_CHECKS).run("def f():\\n    return eval('1')\\n")
+    >>> FUNCTION in analysis.facts
+    True
+    >>> analysis.findings
+    [(2, 11, 'PAD101 Kall til eval() kan kjøre vilkårlig kode')]
+"""
+import ast
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple, Type
+
+# (linje, kolonne fra 0, "KODE melding"), samme form som LintEngine bruker internt
+Finding = Tuple[int, int, str]
+
+FUNCTION = "function"
+PRINT = "print"
+TESTS = "tests"
+
+DEFAULT_CHECKS: List[Type["Check"]] = []
+
+
+def syntax_finding(exc: SyntaxError) -> Finding:
+    """Gjør en SyntaxError om til et E999-funn."""
+    # flake8 rapporterer kolonnen én forbi Pythons 1-baserte offset
+    return exc.lineno or 1, exc.offset or 0, f"E999 {type(exc).__name__}: {exc.msg}"
+
+
+class Analysis:
+    """
+    Resultatet av én kjøring av CheckRunner.
+
+    Attributes:
+        tree (Optional[ast.Module]): Parset kode, eller None ved syntaksfeil
+        syntax_error (Optional[Finding]): E999-funnet ved syntaksfeil
+        findings (List[Finding]): Funn fra sjekkene
+        facts (Set[str]): Fakta sjekkene har registrert, f.eks. ``function``
+    """
+
+    def __init__(self, tree: Optional[ast.Module] = None,
+                 syntax_error: Optional[Finding] = None) -> None:
+        self.tree = tree
+        self.syntax_error = syntax_error
+        self.findings: List[Finding] = []
+        self.facts: Set[str] = set()
+
+
+class Check:
+    """
+    Basisklasse for sjekker.
+
+    En ny instans lages for hver kjøring, så sjekker kan trygt holde
+    tilstand i ``self`` selv om agenten brukes fra flere tråder.
+
+    Attributes:
+        node_types (Tuple[Type[ast.AST], ...]): Nodetypene ``visit`` skal få
+        analysis (Analysis): Kjøringen funn og fakta skrives til
+
+    Example:
+        >>> @register_check
+        ... class NoGlobalCheck(Check):
+        ...     node_types = (ast.Global,)
+        ...
+        ...     def visit(self, node: ast.AST) -> None:
+        ...         self.report(node, "PAD301", "Unngå global")
+    """
+
+    node_types: Tuple[Type[ast.AST], ...] = ()
+
+    def __init__(self, analysis: Analysis) -> None:
+        self.analysis = analysis
+
+    def visit(self, node: ast.AST) -> None:
+        """Kalles for hver node av en type i ``node_types``."""
+
+    def finish(self) -> None:
+        """Kalles når hele treet er gjennomgått."""
+
+    def report(self, node: ast.AST, code: str, message: str) -> None:
+        """Legger til et funn på nodens posisjon."""
+        self.analysis.findings.append(
+            (getattr(node, "lineno", 1), getattr(node, "col_offset", 0), f"{code} {message}"))
+
+
+def register_check(check: Type[Check]) -> Type[Check]:
+    """
+    Legger en sjekk til standardsettet som QualityAssuranceAgent bruker.
+
+    Args:
+        check (Type[Check]): Sjekkklassen
+
+    Returns:
+        Type[Check]: Samme klasse, slik at funksjonen kan brukes som dekoratør
+    """
+    if check not in DEFAULT_CHECKS:
+        DEFAULT_CHECKS.append(check)
+    return check
+
+
+@register_check
+class FunctionCheck(Check):
+    """Registrerer ``function`` hvis koden definerer en (async) funksjon."""
+
+    node_types = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+    def visit(self, node: ast.AST) -> None:
+        self.analysis.facts.add(FUNCTION)
+
+
+@register_check
+class PrintCheck(Check):
+    """Registrerer ``print`` hvis koden kaller ``print``."""
+
+    node_types = (ast.Call,)
+
+    def visit(self, node: ast.AST) -> None:
+        assert isinstance(node, ast.Call)
+        if isinstance(node.func, ast.Name) and node.func.id == "print":
+            self.analysis.facts.add(PRINT)
+
+
+@register_check
+class TestCheck(Check):
+    """Registrerer ``tests`` for ``test*``-funksjoner og ``TestCase``-klasser."""
+
+    node_types = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+    def visit(self, node: ast.AST) -> None:
+        if isinstance(node, ast.ClassDef):
+            bases = [getattr(base, "attr", getattr(base, "id", "")) for base in node.bases]
+            if "TestCase" in bases:
+                self.analysis.facts.add(TESTS)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if node.name.startswith("test") and node.col_offset == 0:
+                self.analysis.facts.add(TESTS)
+
+
+@register_check
+class DangerousCallCheck(Check):
+    """Rapporterer kall som kan kjøre vilkårlig kode eller skallkommandoer."""
+
+    node_types = (ast.Call,)
+
+    def visit(self, node: ast.AST) -> None:
+        assert isinstance(node, ast.Call)
+        func = node.func
+        if isinstance(func, ast.Name) and func.id in ("eval", "exec"):
+            self.report(node, "PAD101", f"Kall til {func.id}() kan kjøre vilkårlig kode")
+        elif (isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name)
+              and func.value.id == "os" and func.attr in ("system", "popen")):
+            self.report(node, "PAD102", f"os.{func.attr}() kjører en skallkommando")
+        for keyword in node.keywords:
+            if (keyword.arg == "shell" and isinstance(keyword.value, ast.Constant)
+                    and keyword.value.value is True):
+                self.report(node, "PAD102", "shell=True kjører en skallkommando")
+
+
+class MissingDocstringCheck(Check):
+    """
+    Rapporterer funksjoner og klasser uten docstring.
+
+    Er ikke med i standardsettet; slås på med ``register_check`` eller
+    ved å gi den til QualityAssuranceAgent.
+    """
+
+    node_types = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+    def visit(self, node: ast.AST) -> None:
+        assert isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+        if ast.get_docstring(node) is None:
+            self.report(node, "PAD201", f"{node.name} mangler docstring")
+
+
+class CheckRunner:
+    """
+    Parser koden én gang og kjører alle sjekkene i én gjennomgang av treet.
+
+    Attributes:
+        checks (Tuple[Type[Check], ...]): Sjekkene, i kjørerekkefølge
+        fingerprint (str): Navnene på sjekkene, for cachenøkler
+
+    Example:
+        >>> runner = CheckRunner([FunctionCheck, MissingDocstringCheck])
+        >>> runner.run("def f():\\n    pass\\n").findings
+        [(1, 0, 'PAD201 f mangler docstring')]
+    """
+
+    def __init__(self, checks: Sequence[Type[Check]]) -> None:
+        """
+        Args:
+            checks (Sequence[Type[Check]]): Sjekkene som skal kjøres
+        """
+        self.checks = tuple(dict.fromkeys(checks))
+        self.fingerprint = ",".join(f"{c.__module__}.{c.__qualname__}" for c in self.checks)
+        # Nodetype -> indeksene til sjekkene som vil se den, beregnet én gang
+        self._dispatch: Dict[Type[ast.AST], Tuple[int, ...]] = {}
+        for index, check in enumerate(self.checks):
+            for node_type in check.node_types:
+                self._dispatch[node_type] = self._dispatch.get(node_type, ()) + (index,)
+
+    def run(self, code: str, filename: str = "stdin") -> Analysis:
+        """
+        Parser koden og kjører sjekkene.
+
+        Args:
+            code (str): Kildekoden
+            filename (str): Filnavnet som brukes ved parsing
+
+        Returns:
+            Analysis: Treet, funn og fakta; eller bare ``syntax_error`` hvis
+            koden ikke kunne parses
+        """
+        try:
+            tree = ast.parse(code, filename=filename)
+        except SyntaxError as exc:
+            return Analysis(syntax_error=syntax_finding(exc))
+        except (RecursionError, MemoryError, ValueError) as exc:
+            # For dypt nøstet kode (eller null-byte i eldre Python) kan ikke parses
+            return Analysis(syntax_error=(1, 0, f"E999 {type(exc).__name__}: "
+                                                "koden kan ikke parses"))
+        analysis = Analysis(tree)
+        instances = [check(analysis) for check in self.checks]
+        visitors: Dict[Type[ast.AST], List[Callable[[ast.AST], None]]] = {
+            node_type: [instances[i].visit for i in indexes]
+            for node_type, indexes in self._dispatch.items()
+        }
+        for node in ast.walk(tree):
+            for visit in visitors.get(type(node), ()):
+                visit(node)
+        for instance in instances:
+            instance.finish()
+        return analysis
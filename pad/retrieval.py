@@ -0,0 +1,458 @@
+"""
+retrieval.py
+Vektorindeks for relevansrangering av kodebiter og symboler i ContextAgent.
+
+Tekst gjøres om til hashede trekk: identifikatorer deles opp i ord
+(``hent_bruker`` og ``hentBruker`` gir ``hent``, ``bruker`` og hele navnet),
+og hvert ord hashes til én av ``buckets`` dimensjoner med sublineær
+termfrekvens (``1 + log tf``). Hver rad normaliseres til lengde 1.
+
+Indeksen lagres som invertert liste i NumPy-arrayer: for hver brukte
+dimensjon en array med radnumre og en med vekter. ``add`` legger bare
+trekkene i en buffer av vanlige lister; bufferen flettes inn i arrayene
+i batcher (ved neste søk eller når den er full), så en skriving koster
+noen få mikrosekunder. Minnet er proporsjonalt med antall trekk, ikke
+antall rader ganger dimensjoner. Et søk henter
+postinglistene for trekkene i spørringen, vekter dem med IDF og summerer
+per rad med ``np.bincount`` – én vektorisert cosinus-skåring uten Python-
+løkker over radene. Fjernede rader maskeres og ryddes bort i batcher.
+
+Indeksen kan lagres som arrayer i CSR-form (sorterte dimensjoner,
+startposisjoner, radnumre og vekter) og lastes tilbake uten kopiering,
+f.eks. fra et minnekartlagt øyeblikksbilde (``pad.snapshot``). De lastede
+arrayene brukes som et skrivebeskyttet grunnsegment; en dimensjon kopieres
+ut av det først når nye rader legges til i den.
+
+Classes:
+    VectorIndex: Inkrementell, hashet vektorindeks med cosinus-søk.
+    IndexState: Uforanderlig kopi av en VectorIndex, for lagring.
+
+Functions:
+    tokenize: Deler tekst i ord for indeksering.
+    features: Gjør tekst om til normaliserte, hashede trekk.
+
+Example:
+    >>> from pad.retrieval import VectorIndex
+    >>> index = VectorIndex()
+    >>> index.add("a", "def hent_bruker(bruker_id): ...", "hent_bruker")
+    >>> index.add("b", "class Lager: ...", "Lager")
+    >>> [item for _, item in index.search("hent en bruker", k=1)]
+    ['hent_bruker']
+"""
+import functools
+import math
+import re
+import threading
+import zlib
+from collections import Counter
+from typing import (Any, Dict, Generic, Hashable, Iterator, List, NamedTuple, Optional, Tuple,
+                    TypeVar)
+
+import numpy as np
+
+T = TypeVar("T")
+
+DEFAULT_BUCKETS = 1 << 20
+
+_WORD_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+_CAMEL_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+# Antall bufrede trekk før de flettes inn i postinglistene uten et søk
+_FLUSH_FEATURES = 1 << 16
+
+# Radtyper i lagrede indekser: fjernet, heltallsnøkkel og -element, annet
+_DEAD, _INT, _OTHER = 0, 1, 2
+
+# (radnumre, vekter, antall i bruk) for én dimensjon
+_Posting = Tuple[np.ndarray, np.ndarray, int]
+
+
+class _View(NamedTuple):
+    """Alt ``search`` leser, publisert samlet av én skriving."""
+
+    postings: Dict[int, _Posting]
+    base: Optional["_Segment"]
+    items: List[Any]
+    alive: np.ndarray
+    size: int
+
+
+class _Segment:
+    """Skrivebeskyttede postinglister i CSR-form, typisk lastet fra et øyeblikksbilde."""
+
+    def __init__(self, buckets: np.ndarray, starts: np.ndarray, rows: np.ndarray,
+                 weights: np.ndarray) -> None:
+        self.buckets = buckets
+        self.starts = starts
+        self.rows = rows
+        self.weights = weights
+
+    def get(self, bucket: int) -> Optional[_Posting]:
+        i = int(np.searchsorted(self.buckets, bucket))
+        if i == len(self.buckets) or self.buckets[i] != bucket:
+            return None
+        start, end = int(self.starts[i]), int(self.starts[i + 1])
+        return self.rows[start:end], self.weights[start:end], end - start
+
+    def items(self) -> Iterator[Tuple[int, _Posting]]:
+        starts = self.starts.tolist()
+        for i, bucket in enumerate(self.buckets.tolist()):
+            start, end = starts[i], starts[i + 1]
+            yield bucket, (self.rows[start:end], self.weights[start:end], end - start)
+
+
+def _split(word: str) -> List[str]:
+    """Ordet med små bokstaver, pluss delene hvis det er snake_case eller camelCase."""
+    tokens = [word.lower()]
+    if "_" in word or not (word.islower() or word.isdigit()):
+        parts = [p.lower() for piece in word.split("_") for p in _CAMEL_RE.findall(piece)]
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if len(p) > 1)
+    return tokens
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Deler tekst i små bokstaver-ord, med identifikatorer også delt opp.
+
+    Example:
+        >>> tokenize("hentBruker(bruker_id)")
+        ['hentbruker', 'hent', 'bruker', 'bruker_id', 'bruker', 'id']
+    """
+    return [token for word in _WORD_RE.findall(text) for token in _split(word)]
+
+
+@functools.lru_cache(maxsize=4096)
+def _word_buckets(word: str, buckets: int) -> Tuple[int, ...]:
+    # Kode gjentar de samme identifikatorene, så hvert ord hashes sjelden mer enn én gang
+    return tuple(zlib.crc32(token.encode("utf-8")) % buckets for token in _split(word))
+
+
+def features(text: str, buckets: int = DEFAULT_BUCKETS) -> Dict[int, float]:
+    """
+    Gjør tekst om til hashede trekk med lengde 1.
+
+    Args:
+        text (str): Teksten
+        buckets (int): Antall hash-dimensjoner
+
+    Returns:
+        Dict[int, float]: Dimensjon -> vekt
+    """
+    counts: Dict[int, int] = {}
+    for word, count in Counter(_WORD_RE.findall(text)).items():
+        for bucket in _word_buckets(word, buckets):
+            counts[bucket] = counts.get(bucket, 0) + count
+    weights = {bucket: 1.0 + math.log(count) for bucket, count in counts.items()}
+    norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+    return {bucket: w / norm for bucket, w in weights.items()}
+
+
+class IndexState(NamedTuple):
+    """
+    Uforanderlig kopi av en VectorIndex, tatt med ``VectorIndex.state``.
+
+    Kopien tas på noen mikrosekunder per tusen rader og deler arrayene med
+    indeksen; ``to_arrays`` gjør det tyngre arbeidet og kan kjøres uten lås.
+    """
+
+    buckets: int
+    postings: Dict[int, _Posting]
+    base: Optional[_Segment]
+    alive: np.ndarray
+    rows: Dict[Hashable, int]
+    items: List[Any]
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], List[Tuple[int, Any, Any]]]:
+        """
+        Gjør kopien om til CSR-arrayer.
+
+        Rader der både nøkkel og element er heltall (det vanlige), lagres i
+        arrayene ``keys``/``items``; de andre returneres som en liste, slik
+        at kalleren kan serialisere dem selv.
+
+        Returns:
+            Tuple: Arrayene (``buckets``, ``starts``, ``rows``, ``weights``,
+            ``alive``, ``kinds``, ``keys``, ``items``) og (rad, nøkkel,
+            element) for rader som ikke er rene heltall
+        """
+        merged: Dict[int, _Posting] = dict(self.base.items()) if self.base is not None else {}
+        merged.update(self.postings)
+        order = sorted(merged)
+        counts = np.array([merged[b][2] for b in order], dtype=np.int64)
+        starts = np.zeros(len(order) + 1, dtype=np.int64)
+        np.cumsum(counts, out=starts[1:])
+        empty_rows, empty_weights = np.empty(0, np.int32), np.empty(0, np.float32)
+        rows = np.concatenate([merged[b][0][:merged[b][2]] for b in order] or [empty_rows])
+        weights = np.concatenate([merged[b][1][:merged[b][2]] for b in order] or [empty_weights])
+        size = len(self.alive)
+        kinds = np.full(size, _DEAD, dtype=np.uint8)
+        int_keys = np.zeros(size, dtype=np.int64)
+        int_items = np.zeros(size, dtype=np.int64)
+        others: List[Tuple[int, Any, Any]] = []
+        for key, row in self.rows.items():
+            item = self.items[row]
+            if type(key) is int and type(item) is int:
+                kinds[row], int_keys[row], int_items[row] = _INT, key, item
+            else:
+                kinds[row] = _OTHER
+                others.append((row, key, item))
+        arrays: Dict[str, np.ndarray] = {
+            "buckets": np.array(order, dtype=np.int64), "starts": starts,
+            "rows": rows.astype(np.int32, copy=False),
+            "weights": weights.astype(np.float32, copy=False), "alive": self.alive,
+            "kinds": kinds, "keys": int_keys, "items": int_items}
+        return arrays, others
+
+
+class VectorIndex(Generic[T]):
+    """
+    Inkrementell vektorindeks med cosinus-søk over hashede trekk.
+
+    Hver oppføring har en nøkkel (for ``remove`` og erstatning), en tekst
+    som indekseres og et vilkårlig element som returneres fra ``search``.
+    Skriving serialiseres med en lås; ``search`` tar ingen lås og leser
+    ett samlet øyeblikksbilde av referansene (``_View``) som hver skriving
+    publiserer til slutt, så den kan kjøre samtidig med ``add`` og
+    kompaktering uten å blande radnumre og elementer fra ulike versjoner.
+
+    Attributes:
+        buckets (int): Antall hash-dimensjoner
+
+    Example:
+        >>> index = VectorIndex()
+        >>> index.add(1, "les fil fra disk", "les_fil")
+        >>> index.search("les en fil")[0][1]
+        'les_fil'
+    """
+
+    def __init__(self, buckets: int = DEFAULT_BUCKETS) -> None:
+        """
+        Args:
+            buckets (int): Antall hash-dimensjoner. Bare brukte dimensjoner
+                tar plass, så et stort tall gir få kollisjoner uten ekstra minne.
+        """
+        self.buckets = buckets
+        self._postings: Dict[int, _Posting] = {}
+        # Skrivebeskyttet grunnsegment fra ``from_arrays``; ``_postings`` går foran
+        self._base: Optional[_Segment] = None
+        # Trekk som ennå ikke er flettet inn i postinglistene
+        self._pending: Tuple[List[int], List[int], List[float]] = ([], [], [])
+        self._items: List[T] = []
+        self._alive = np.zeros(64, dtype=bool)
+        self._rows: Dict[Hashable, int] = {}
+        self._size = 0
+        self._dead = 0
+        self._lock = threading.Lock()
+        self._publish()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], others: List[Tuple[int, Any, Any]],
+                    buckets: int = DEFAULT_BUCKETS) -> "VectorIndex[T]":
+        """
+        Gjenoppbygger en indeks fra ``IndexState.to_arrays``.
+
+        Postinglistene kopieres ikke: arrayene brukes direkte som
+        grunnsegment, så lasting fra et minnekartlagt øyeblikksbilde tar
+        omtrent like lang tid uansett størrelse.
+
+        Args:
+            arrays (Dict[str, np.ndarray]): Arrayene fra ``to_arrays``
+            others (List[Tuple[int, Any, Any]]): (rad, nøkkel, element) for
+                rader som ikke er rene heltall, også fra ``to_arrays``
+            buckets (int): Antall hash-dimensjoner indeksen ble bygget med
+
+        Returns:
+            VectorIndex[T]: Indeksen
+        """
+        index: "VectorIndex[T]" = cls(buckets)
+        size = len(arrays["alive"])
+        index._base = _Segment(arrays["buckets"], arrays["starts"], arrays["rows"],
+                               arrays["weights"])
+        index._alive = np.zeros(max(64, 2 * size), dtype=bool)
+        index._alive[:size] = arrays["alive"]
+        int_rows = np.flatnonzero(arrays["kinds"] == _INT)
+        index._items = arrays["items"].tolist()
+        index._rows = dict(zip(arrays["keys"][int_rows].tolist(), int_rows.tolist()))
+        for row, key, item in others:
+            index._rows[key] = row
+            index._items[row] = item
+        index._size = size
+        index._dead = size - len(index._rows)
+        index._publish()
+        return index
+
+    def state(self) -> IndexState:
+        """Tar en uforanderlig kopi av indeksen for lagring (se ``IndexState``)."""
+        with self._lock:
+            self._flush()
+            return IndexState(self.buckets, dict(self._postings), self._base,
+                              self._alive[:self._size].copy(), dict(self._rows),
+                              list(self._items))
+
+    def _publish(self) -> None:
+        """Publiserer referansene ``search`` leser. Kalles med låsen holdt."""
+        self._view = _View(self._postings, self._base, self._items, self._alive, self._size)
+
+    def _posting(self, bucket: int) -> Optional[_Posting]:
+        posting = self._postings.get(bucket)
+        if posting is None and self._base is not None:
+            posting = self._base.get(bucket)
+        return posting
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Omtrentlig antall byte i NumPy-arrayene.
+
+        Et minnekartlagt grunnsegment telles ikke; sidene der hører til
+        filen og leses bare inn ved bruk.
+        """
+        return self._alive.nbytes + sum(r.nbytes + w.nbytes for r, w, _ in
+                                        self._postings.values())
+
+    def add(self, key: Hashable, text: str, item: T) -> None:
+        """
+        Legger til (eller erstatter) en oppføring.
+
+        Args:
+            key (Hashable): Nøkkel for oppføringen
+            text (str): Teksten som indekseres
+            item (T): Elementet ``search`` returnerer
+        """
+        vector = features(text, self.buckets)
+        with self._lock:
+            if key in self._rows:
+                self._remove(key)
+            row = self._size
+            if row == len(self._alive):
+                alive = np.zeros(row * 2, dtype=bool)
+                alive[:row] = self._alive
+                self._alive = alive
+            buckets, rows, weights = self._pending
+            buckets.extend(vector)
+            rows.extend([row] * len(vector))
+            weights.extend(vector.values())
+            self._items.append(item)
+            self._rows[key] = row
+            self._alive[row] = True
+            self._size = row + 1
+            self._publish()
+            if len(buckets) >= _FLUSH_FEATURES:
+                self._flush()
+
+    def _flush(self) -> None:
+        """Fletter bufrede trekk inn i postinglistene. Kalles med låsen holdt."""
+        buckets, rows, weights = self._pending
+        if not buckets:
+            return
+        self._pending = ([], [], [])
+        grouped: Dict[int, Tuple[List[int], List[float]]] = {}
+        for bucket, row, weight in zip(buckets, rows, weights):
+            entry = grouped.get(bucket)
+            if entry is None:
+                grouped[bucket] = ([row], [weight])
+            else:
+                entry[0].append(row)
+                entry[1].append(weight)
+        for bucket, (new_rows, new_weights) in grouped.items():
+            new = len(new_rows)
+            old_rows, old_weights, n = self._posting(bucket) or (
+                np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32), 0)
+            if n + new > len(old_rows):
+                capacity = max(4, 2 * (n + new))
+                grown_rows = np.empty(capacity, dtype=np.int32)
+                grown_weights = np.empty(capacity, dtype=np.float32)
+                grown_rows[:n] = old_rows[:n]
+                grown_weights[:n] = old_weights[:n]
+                old_rows, old_weights = grown_rows, grown_weights
+            # Grunnsegmentet har ingen ledig plass og kopieres derfor alltid ut her.
+            # Plassene etter n er ikke synlige for lesere før lengden er byttet ut
+            old_rows[n:n + new] = new_rows
+            old_weights[n:n + new] = new_weights
+            self._postings[bucket] = (old_rows, old_weights, n + new)
+
+    def remove(self, key: Hashable) -> bool:
+        """Fjerner en oppføring. Returnerer True hvis den fantes."""
+        with self._lock:
+            if key not in self._rows:
+                return False
+            self._remove(key)
+            if self._dead > max(64, len(self._rows)):
+                self._compact()
+            return True
+
+    def _remove(self, key: Hashable) -> None:
+        row = self._rows.pop(key)
+        self._alive[row] = False
+        self._dead += 1
+
+    def _compact(self) -> None:
+        """Fjerner døde rader fra postinglistene og nummererer radene på nytt."""
+        self._flush()
+        alive = self._alive[:self._size]
+        remap = np.cumsum(alive, dtype=np.int64) - 1
+        merged: Dict[int, _Posting] = dict(self._base.items()) if self._base is not None else {}
+        merged.update(self._postings)
+        postings: Dict[int, _Posting] = {}
+        for bucket, (rows, weights, n) in merged.items():
+            keep = alive[rows[:n]]
+            if keep.any():
+                kept_rows = remap[rows[:n][keep]].astype(np.int32)
+                postings[bucket] = (kept_rows, weights[:n][keep], len(kept_rows))
+        live = int(alive.sum())
+        new_alive = np.zeros(max(64, live * 2), dtype=bool)
+        new_alive[:live] = True
+        self._items = [item for item, ok in zip(self._items, alive) if ok]
+        self._rows = {key: int(remap[row]) for key, row in self._rows.items()}
+        self._postings, self._alive, self._size, self._dead = postings, new_alive, live, 0
+        self._base = None
+        # Lesere som er midt i et søk, holder fortsatt den gamle visningen, som ikke endres
+        self._publish()
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[float, T]]:
+        """
+        Returnerer de ``k`` mest relevante elementene for ``query``.
+
+        Skåren er cosinus-likheten mellom spørringen og oppføringen, med
+        IDF-vekting av spørringens trekk, slik at sjeldne ord teller mest.
+
+        Args:
+            query (str): Søketekst
+            k (int): Maks antall treff
+
+        Returns:
+            List[Tuple[float, T]]: (skår, element), høyeste skår først. Bare
+            oppføringer med minst ett felles trekk tas med.
+        """
+        if self._pending[0]:
+            with self._lock:
+                self._flush()
+        postings, base, items, alive, size = self._view
+        if size == 0 or k <= 0:
+            return []
+        rows_parts = []
+        weight_parts = []
+        for bucket, weight in features(query, self.buckets).items():
+            posting = postings.get(bucket)
+            if posting is None and base is not None:
+                posting = base.get(bucket)
+            if posting is None:
+                continue
+            rows, weights, n = posting
+            idf = math.log((size + 1) / (n + 1)) + 1.0
+            rows_parts.append(rows[:n])
+            weight_parts.append(weights[:n] * np.float32(weight * idf))
+        if not rows_parts:
+            return []
+        scores = np.bincount(np.concatenate(rows_parts), weights=np.concatenate(weight_parts),
+                             minlength=size)[:size]
+        scores[~alive[:size]] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(float(scores[row]), items[row]) for row in ranked]
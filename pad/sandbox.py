@@ -0,0 +1,506 @@
+"""
+sandbox.py
+Kjører genererte tester i isolerte, ressursbegrensede prosesser.
+
+Å starte en ny Python-tolk for hver testfil koster fort 20–50 ms før
+første linje test kjøres. SandboxPool holder i stedet noen få varme
+fork-servere: egne, enkelttrådede Python-prosesser som har importert
+vanlige moduler på forhånd. For hver kjøring forker serveren et barn som
+
+- får en ny, tom midlertidig katalog som arbeidskatalog
+- får grenser for CPU-tid (``RLIMIT_CPU``), minne (``RLIMIT_AS``),
+  filstørrelse og antall åpne filer
+- kjører testene og sender et strukturert resultat tilbake over en pipe
+
+Serveren dreper barnet (hele prosessgruppen) hvis det går over
+tidsgrensen i veggklokketid, og sletter katalogen etterpå. Alt kjører
+lokalt med standardbiblioteket på vanlig Linux.
+
+Tester kan være funksjoner med navn ``test_*`` (med ``assert``) eller
+``unittest.TestCase``-klasser, enten i koden selv eller i en egen
+testkode som importerer fra modulen ``solution``.
+
+Note:
+    Grensene beskytter mot uendelige løkker, minnelekkasjer og tester
+    som henger, ikke mot ondsinnet kode. Barnet har samme bruker,
+    filsystem og nettverk som serveren, så kode fra klienter skal aldri
+    kjøres her; sandkassen må ikke eksponeres gjennom API-et.
+
+Classes:
+    TestOutcome: Resultatet av én test.
+    SandboxResult: Resultatet av én kjøring.
+    ForkServer: Én varm fork-server-prosess.
+    SandboxPool: Pool av fork-servere.
+
+Example:
+    >>> from pad.sandbox import SandboxPool
+    >>> with SandboxPool(workers=1) as pool:
+    ...     result = pool.run("def add(a, b):\\n    return a + b\\n",
+    ...                       "from solution import add\\n"
+    ...                       "def test_add():\\n    assert add(1, 2) == 3\\n")
+    >>> result.status, result.passed
+    ('passed', 1)
+"""
+import json
+import os
+import queue
+import select
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import IO, Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+PASSED = "passed"
+FAILED = "failed"
+ERROR = "error"
+TIMEOUT = "timeout"
+CRASHED = "crashed"
+
+# Importeres i serveren før første fork, slik at barna arver dem ferdig lastet
+DEFAULT_PRELOAD = ("unittest", "traceback", "inspect", "importlib", "collections",
+                   "dataclasses", "itertools", "functools", "json", "math", "re", "typing")
+
+MAX_MESSAGE = 500
+MAX_OUTPUT = 2000
+
+
+class TestOutcome(NamedTuple):
+    """
+    Resultatet av én test.
+
+    Attributes:
+        name (str): Testens navn, f.eks. ``test_add`` eller ``AddTest.test_zero``
+        passed (bool): Om testen besto
+        message (str): Feilmelding hvis testen feilet
+    """
+
+    name: str
+    passed: bool
+    message: str = ""
+
+
+class SandboxResult(NamedTuple):
+    """
+    Resultatet av én kjøring i sandkassen.
+
+    Attributes:
+        status (str): ``passed``, ``failed``, ``error`` (import- eller
+            innsamlingsfeil), ``timeout`` eller ``crashed``
+        outcomes (Tuple[TestOutcome, ...]): Resultat per test
+        duration (float): Veggklokketid i sekunder
+        error (str): Forklaring når status er ``error``, ``timeout`` eller ``crashed``
+        output (str): Slutten av det testene skrev til stdout/stderr
+    """
+
+    status: str
+    outcomes: Tuple[TestOutcome, ...] = ()
+    duration: float = 0.0
+    error: str = ""
+    output: str = ""
+
+    @property
+    def passed(self) -> int:
+        return sum(1 for outcome in self.outcomes if outcome.passed)
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for outcome in self.outcomes if not outcome.passed)
+
+    def summary(self) -> str:
+        """
+        Kort rapport for QualityAssuranceAgent.
+
+        Example:
+            >>> SandboxResult(PASSED, (TestOutcome("test_add", True),)).summary()
+            'Tester: 1 bestått, 0 feilet.'
+        """
+        if self.status in (TIMEOUT, CRASHED):
+            return f"Tester: avbrutt ({self.status}): {self.error}"
+        if self.status == ERROR:
+            return f"Tester: kunne ikke kjøres: {self.error}"
+        lines = [f"Tester: {self.passed} bestått, {self.failed} feilet."]
+        lines.extend(f"FEIL {o.name}: {o.message}" for o in self.outcomes if not o.passed)
+        return "\n".join(lines)
+
+
+# --- Kode som kjører i fork-serveren og barna ---------------------------------
+
+def _describe(exc: BaseException) -> str:
+    import traceback
+
+    # Bare linjer i den testede koden er interessante, ikke importlib/unittest
+    frames = [frame for frame in traceback.extract_tb(exc.__traceback__)
+              if os.path.dirname(os.path.abspath(frame.filename)) == os.getcwd()]
+    where = f" (linje {frames[-1].lineno})" if frames else ""
+    text = f"{type(exc).__name__}: {exc}" if str(exc) else type(exc).__name__
+    return (text + where)[:MAX_MESSAGE]
+
+
+def _collect_and_run(module_name: str) -> List[Tuple[str, bool, str]]:
+    """Importerer testmodulen og kjører testene i definisjonsrekkefølge."""
+    import importlib
+    import inspect
+    import unittest
+
+    module = importlib.import_module(module_name)
+    outcomes: List[Tuple[str, bool, str]] = []
+    for name, obj in list(vars(module).items()):
+        if inspect.isfunction(obj) and name.startswith("test") and obj.__module__ == module_name:
+            try:
+                if inspect.iscoroutinefunction(obj):
+                    # Ellers lages bare en korutine som aldri kjøres, og testen "består"
+                    import asyncio
+
+                    asyncio.run(obj())
+                else:
+                    obj()
+            except Exception as exc:
+                outcomes.append((name, False, _describe(exc)))
+            else:
+                outcomes.append((name, True, ""))
+        elif inspect.isclass(obj) and issubclass(obj, unittest.TestCase):
+            for test in unittest.defaultTestLoader.loadTestsFromTestCase(obj):
+                assert isinstance(test, unittest.TestCase)
+                result = unittest.TestResult()
+                test.run(result)
+                test_name = f"{name}.{test.id().rsplit('.', 1)[-1]}"
+                problems = result.failures + result.errors
+                if problems:
+                    message = problems[0][1].strip().splitlines()[-1]
+                    outcomes.append((test_name, False, message[:MAX_MESSAGE]))
+                elif not result.skipped:
+                    outcomes.append((test_name, True, ""))
+    return outcomes
+
+
+def _child(request: Dict[str, Any], directory: str, write_fd: int) -> None:
+    """Kjører i det forkede barnet. Returnerer aldri."""
+    payload: Dict[str, Any]
+    try:
+        import resource
+
+        os.setsid()
+        os.chdir(directory)
+        # stdin er serverens forespørselskanal; testene skal ikke kunne lese den
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.close(devnull)
+        output = os.open("output.txt", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.dup2(output, 1)
+        os.dup2(output, 2)
+        os.close(output)
+        # Overskridelse av filgrensen skal gi en feil, ikke drepe prosessen
+        signal.signal(signal.SIGXFSZ, signal.SIG_IGN)
+        cpu = int(request["cpu_seconds"])
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+        memory = int(request["memory_bytes"])
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (16 * 1024 * 1024,) * 2)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (64, 64))
+
+        with open("solution.py", "w", encoding="utf-8") as fh:
+            fh.write(request["code"])
+        module_name = "solution"
+        if request.get("tests"):
+            with open("test_solution.py", "w", encoding="utf-8") as fh:
+                fh.write(request["tests"])
+            module_name = "test_solution"
+        sys.path.insert(0, directory)
+        sys.argv = [module_name]
+        try:
+            outcomes = _collect_and_run(module_name)
+        except BaseException as exc:
+            payload = {"status": ERROR, "error": _describe(exc)}
+        else:
+            if not outcomes:
+                payload = {"status": ERROR, "error": "Ingen tester funnet"}
+            else:
+                status = PASSED if all(passed for _, passed, _ in outcomes) else FAILED
+                payload = {"status": status, "outcomes": outcomes}
+    except BaseException as exc:
+        payload = {"status": ERROR, "error": _describe(exc)}
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.write(write_fd, json.dumps(payload).encode("utf-8"))
+    finally:
+        os._exit(0)
+
+
+def _read_output(directory: str) -> str:
+    try:
+        with open(os.path.join(directory, "output.txt"), "rb") as fh:
+            fh.seek(0, os.SEEK_END)
+            fh.seek(max(0, fh.tell() - MAX_OUTPUT))
+            return fh.read().decode("utf-8", "replace")
+    except OSError:
+        return ""
+
+
+def _run_forked(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Forker et barn for én kjøring og venter med tidsgrense. Kjører i serveren."""
+    start = time.perf_counter()
+    directory = tempfile.mkdtemp(prefix="pad-sandbox-")
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        _child(request, directory, write_fd)
+    os.close(write_fd)
+
+    chunks: List[bytes] = []
+    deadline = start + float(request["timeout"])
+    timed_out = False
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            timed_out = True
+            break
+        ready, _, _ = select.select([read_fd], [], [], remaining)
+        if ready:
+            chunk = os.read(read_fd, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    os.close(read_fd)
+    if timed_out:
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except OSError:
+            os.kill(pid, signal.SIGKILL)
+    _, status = os.waitpid(pid, 0)
+    # Barnets egne barneprosesser i samme gruppe skal heller ikke overleve
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+    result: Dict[str, Any]
+    if timed_out:
+        result = {"status": TIMEOUT, "error": f"over {request['timeout']} s veggklokketid"}
+    elif chunks:
+        result = json.loads(b"".join(chunks))
+    elif os.WIFSIGNALED(status) and os.WTERMSIG(status) in (signal.SIGXCPU, signal.SIGKILL):
+        result = {"status": TIMEOUT, "error": f"over {request['cpu_seconds']} s CPU-tid"}
+    else:
+        code = os.waitstatus_to_exitcode(status)
+        result = {"status": CRASHED, "error": f"prosessen avsluttet med kode {code}"}
+    result["output"] = _read_output(directory)
+    result["duration"] = time.perf_counter() - start
+    shutil.rmtree(directory, ignore_errors=True)
+    return result
+
+
+def _serve(preload: Sequence[str]) -> None:
+    """Hovedløkken i en fork-server: én JSON-forespørsel per linje på stdin."""
+    import importlib
+
+    for module in preload:
+        importlib.import_module(module)
+    out = sys.stdout
+    out.write("ready\n")
+    out.flush()
+    for line in sys.stdin:
+        out.write(json.dumps(_run_forked(json.loads(line))) + "\n")
+        out.flush()
+
+
+# --- Klientsiden ---------------------------------------------------------------
+
+class ForkServer:
+    """
+    Én varm fork-server-prosess.
+
+    Serveren behandler én kjøring om gangen; bruk SandboxPool for flere
+    samtidig. Hvis serverprosessen dør, startes den på nytt ved neste kjøring.
+
+    Attributes:
+        preload (Tuple[str, ...]): Moduler serveren importerer ved oppstart
+        runs (int): Antall kjøringer serveren har utført
+    """
+
+    def __init__(self, preload: Sequence[str] = DEFAULT_PRELOAD) -> None:
+        self.preload = tuple(preload)
+        self.runs = 0
+        self._process: Optional["subprocess.Popen[str]"] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> "ForkServer":
+        """Starter serverprosessen og venter til den har lastet modulene."""
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = {"PATH": os.environ.get("PATH", "/usr/bin:/bin"), "PYTHONPATH": root,
+               "PYTHONDONTWRITEBYTECODE": "1", "LANG": "C.UTF-8"}
+        self._process = subprocess.Popen(
+            [sys.executable, "-s", "-m", "pad.sandbox", "--serve", *self.preload],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, encoding="utf-8",
+            cwd=tempfile.gettempdir(), env=env, start_new_session=True,
+        )
+        if self._stdout().readline().strip() != "ready":
+            self.close()
+            raise RuntimeError("Sandkasse-serveren startet ikke")
+        return self
+
+    def _stdout(self) -> IO[str]:
+        assert self._process is not None and self._process.stdout is not None
+        return self._process.stdout
+
+    def run(self, code: str, tests: Optional[str] = None, timeout: float = 10.0,
+            cpu_seconds: int = 5, memory_bytes: int = 256 * 1024 * 1024) -> SandboxResult:
+        """
+        Kjører testene i et nytt barn av serveren.
+
+        Args:
+            code (str): Koden som testes; lagres som ``solution.py``
+            tests (Optional[str]): Testkode; lagres som ``test_solution.py``.
+                Uten testkode kjøres testene i ``code`` selv.
+            timeout (float): Maks veggklokketid i sekunder
+            cpu_seconds (int): Maks CPU-tid i sekunder
+            memory_bytes (int): Maks adresserom i byte
+
+        Returns:
+            SandboxResult: Strukturert resultat
+        """
+        request = json.dumps({"code": code, "tests": tests, "timeout": timeout,
+                              "cpu_seconds": cpu_seconds, "memory_bytes": memory_bytes})
+        with self._lock:
+            for attempt in (0, 1):
+                if self._process is None or self._process.poll() is not None:
+                    self.start()
+                assert self._process is not None and self._process.stdin is not None
+                try:
+                    self._process.stdin.write(request + "\n")
+                    self._process.stdin.flush()
+                    line = self._stdout().readline()
+                except (BrokenPipeError, OSError):
+                    line = ""
+                if line:
+                    break
+                self.close()
+            else:
+                return SandboxResult(CRASHED, error="Sandkasse-serveren svarer ikke")
+            self.runs += 1
+        data = json.loads(line)
+        outcomes = tuple(TestOutcome(*outcome) for outcome in data.get("outcomes", ()))
+        return SandboxResult(data["status"], outcomes, float(data.get("duration", 0.0)),
+                             data.get("error", ""), data.get("output", ""))
+
+    def close(self) -> None:
+        """Stopper serverprosessen."""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        if process.stdin is not None:
+            process.stdin.close()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        if process.stdout is not None:
+            process.stdout.close()
+
+
+class SandboxPool:
+    """
+    Pool av varme fork-servere for testkjøring.
+
+    Serverne startes ved første ``run``. Hver kjøring låner en ledig server,
+    så opptil ``workers`` testkjøringer går samtidig.
+
+    Attributes:
+        workers (int): Antall fork-servere
+        timeout (float): Maks veggklokketid per kjøring i sekunder
+        cpu_seconds (int): Maks CPU-tid per kjøring i sekunder
+        memory_bytes (int): Maks adresserom per kjøring i byte
+
+    Example:
+        >>> pool = SandboxPool(workers=2, timeout=5)
+        >>> pool.run("def test_ok():\\n    assert True\\n").status
+        'passed'
+        >>> pool.close()
+    """
+
+    def __init__(self, workers: int = 2, timeout: float = 10.0, cpu_seconds: int = 5,
+                 memory_bytes: int = 256 * 1024 * 1024,
+                 preload: Sequence[str] = DEFAULT_PRELOAD) -> None:
+        """
+        Args:
+            workers (int): Antall fork-servere
+            timeout (float): Maks veggklokketid per kjøring i sekunder
+            cpu_seconds (int): Maks CPU-tid per kjøring i sekunder
+            memory_bytes (int): Maks adresserom per kjøring i byte
+            preload (Sequence[str]): Moduler serverne importerer ved oppstart
+        """
+        self.workers = workers
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+        self.preload = tuple(preload)
+        self._idle: "queue.Queue[ForkServer]" = queue.Queue()
+        self._servers: List[ForkServer] = []
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if not self._servers:
+                self._servers = [ForkServer(self.preload).start() for _ in range(self.workers)]
+                for server in self._servers:
+                    self._idle.put(server)
+
+    def run(self, code: str, tests: Optional[str] = None,
+            timeout: Optional[float] = None) -> SandboxResult:
+        """
+        Kjører testene på en ledig fork-server.
+
+        Args:
+            code (str): Koden som testes
+            tests (Optional[str]): Testkode som importerer fra ``solution``;
+                uten testkode kjøres testene i ``code``
+            timeout (Optional[float]): Sekunder kjøringen totalt kan bruke,
+                inkludert ventetid på en ledig server. Kortes ned til
+                ``self.timeout``.
+
+        Returns:
+            SandboxResult: Strukturert resultat, med status ``timeout`` hvis
+            ingen server ble ledig innen ``timeout``
+        """
+        self._ensure_started()
+        if timeout is None:
+            server = self._idle.get()
+            limit = self.timeout
+        else:
+            start = time.monotonic()
+            try:
+                server = self._idle.get(timeout=timeout)
+            except queue.Empty:
+                return SandboxResult(TIMEOUT, error=f"ingen ledig sandkasse innen {timeout:.2f} s")
+            limit = min(self.timeout, timeout - (time.monotonic() - start))
+        try:
+            if limit <= 0:
+                return SandboxResult(TIMEOUT, error="tidsfristen gikk ut før testene startet")
+            return server.run(code, tests, limit, self.cpu_seconds, self.memory_bytes)
+        finally:
+            self._idle.put(server)
+
+    def __enter__(self) -> "SandboxPool":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stopper alle fork-serverne."""
+        with self._lock:
+            for server in self._servers:
+                server.close()
+            self._servers = []
+            self._idle = queue.Queue()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--serve"]:
+        _serve(sys.argv[2:])
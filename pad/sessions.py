@@ -0,0 +1,135 @@
+"""
+sessions.py
+Sesjonslager for API-et: én orkestrator-tilstand per klientsesjon.
+
+Hver sesjon får sin egen ContextAgent, slik at klienter ikke overskriver
+hverandres kontekst. Sesjonene opprettes lat ved første forespørsel og
+lagres i en begrenset LRU med levetid (TTL), slik at inaktive sesjoner
+frigjøres automatisk.
+
+Classes:
+    SessionStore: Begrenset LRU/TTL-lager for sesjonsorkestratorer.
+
+Example:
+    >>> from pad.orchestrator import OrchestratorAgent
+    >>> from pad.sessions import SessionStore
+    >>> shared = OrchestratorAgent()
+    >>> store = SessionStore(shared.fork, max_sessions=1000, ttl=1800)
+    >>> store.get("klient-a") is store.get("klient-a")
+    True
+"""
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, List, Optional
+
+from .utils import LRUCache
+
+if TYPE_CHECKING:
+    from .orchestrator import OrchestratorAgent
+
+
+class SessionStore:
+    """
+    Lat, begrenset lager for orkestratorer per sesjon.
+
+    Når antallet sesjoner overstiger ``max_sessions``, kastes den som ble
+    brukt for lengst siden. Sesjoner som ikke er brukt på ``ttl`` sekunder
+    regnes som utløpt og opprettes på nytt ved neste forespørsel.
+
+    Attributes:
+        max_sessions (int): Maksimalt antall samtidige sesjoner
+        ttl (float): Levetid i sekunder uten aktivitet
+        created (int): Antall sesjoner opprettet totalt
+        evicted (int): Antall sesjoner kastet ut (LRU eller TTL)
+        keyed (bool): Om ``factory`` får sesjons-ID-en som argument
+
+    Example:
+        >>> store = SessionStore(OrchestratorAgent, max_sessions=2)
+        >>> store.stats()["live_sessions"]
+        0
+    """
+
+    def __init__(self, factory: Callable[..., "OrchestratorAgent"],
+                 max_sessions: int = 1000, ttl: float = 1800.0, keyed: bool = False,
+                 on_evict: Optional[Callable[[str, "OrchestratorAgent"], None]] = None
+                 ) -> None:
+        """
+        Args:
+            factory (Callable): Lager en ny sesjon
+            max_sessions (int): Maksimalt antall sesjoner i minnet
+            ttl (float): Sekunder uten aktivitet før en sesjon utløper
+            keyed (bool): Kall ``factory(session_id)``, f.eks. for å knytte
+                sesjonen til et delt kontekstlager
+            on_evict (Optional[Callable]): Kalles med (sesjons-ID, orkestrator)
+                når en sesjon kastes ut, f.eks. for å rydde lagret tilstand
+        """
+        self.factory = factory
+        self.keyed = keyed
+        self.on_evict = on_evict
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.created = 0
+        self.evicted = 0
+        self._sessions: LRUCache["OrchestratorAgent"] = LRUCache(
+            max_sessions, ttl, on_evict=self._on_evict)
+        self._create_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _on_evict(self, session_id: Hashable, orchestrator: "OrchestratorAgent") -> None:
+        self.evicted += 1
+        if self.on_evict is not None:
+            self.on_evict(str(session_id), orchestrator)
+
+    def get(self, session_id: str) -> "OrchestratorAgent":
+        """
+        Henter orkestratoren for en sesjon, og oppretter den ved behov.
+
+        Args:
+            session_id (str): Sesjons-ID fra klienten
+
+        Returns:
+            OrchestratorAgent: Orkestratoren som tilhører sesjonen
+        """
+        orchestrator = self._sessions.get(session_id)
+        if orchestrator is not None:
+            return orchestrator
+        with self._create_lock:
+            orchestrator = self._sessions.get(session_id, count=False)
+            if orchestrator is None:
+                if self.keyed:
+                    orchestrator = self.factory(session_id)
+                else:
+                    orchestrator = self.factory()
+                self._sessions.put(session_id, orchestrator)
+                self.created += 1
+        return orchestrator
+
+    def values(self) -> List["OrchestratorAgent"]:
+        """Returnerer en kopi av de levende sesjonenes orkestratorer."""
+        return self._sessions.values()
+
+    def drop(self, session_id: str) -> bool:
+        """Fjerner en sesjon. Returnerer True hvis den fantes."""
+        return self._sessions.pop(session_id) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returnerer statistikk for dimensjonering av instanser.
+
+        Returns:
+            Dict[str, Any]: Antall levende sesjoner, opprettede og utkastede
+            sesjoner, samt totalt, gjennomsnittlig og maksimalt minne per
+            sesjon i byte
+        """
+        self._sessions.purge_expired()
+        usage = [o.context_agent.memory_usage() for o in self._sessions.values()]
+        return {
+            "live_sessions": len(usage),
+            "max_sessions": self.max_sessions,
+            "created": self.created,
+            "evicted": self.evicted,
+            "memory_bytes_total": sum(usage),
+            "memory_bytes_avg": sum(usage) / len(usage) if usage else 0,
+            "memory_bytes_max": max(usage, default=0),
+        }
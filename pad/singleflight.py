@@ -0,0 +1,121 @@
+"""
+singleflight.py
+Slår sammen identiske forespørsler som pågår samtidig.
+
+Klienter prøver ofte på nytt, eller flere sender samme prompt samtidig.
+SingleFlight sørger for at bare den første (lederen) kjører beregningen;
+de andre venter på samme resultat og får det når lederen er ferdig.
+Ferdige resultater huskes ikke; en ny forespørsel etter at beregningen er
+ferdig starter en ny kjøring.
+
+Classes:
+    SingleFlight: Sammenslåing av samtidige kall per nøkkel (sync og async).
+
+Example:
+    >>> from pad.singleflight import SingleFlight
+    >>> flight = SingleFlight()
+    >>> flight.do("nøkkel", lambda: 42)
+    42
+"""
+import threading
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from .metrics import metrics
+
+if TYPE_CHECKING:
+    import asyncio
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Sammenslåing av samtidige, identiske kall.
+
+    ``do`` er for tråder (CLI og synkrone kall); ``do_async`` er for
+    event-løkken i API-et. Et unntak fra lederen går til alle som venter.
+    I async-varianten kjøres beregningen som en egen task, så en klient
+    som kobler fra (og blir kansellert) stopper ikke de andre.
+
+    Attributes:
+        leaders (int): Antall kall som faktisk kjørte beregningen
+        coalesced (int): Antall kall som ventet på en annens beregning
+
+    Example:
+        >>> flight = SingleFlight()
+        >>> result = await flight.do_async(("hei", "abc"), lambda: compute())
+    """
+
+    def __init__(self) -> None:
+        self.leaders = 0
+        self.coalesced = 0
+        self._calls: Dict[Hashable, "Future[Any]"] = {}
+        self._tasks: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, leader: bool) -> None:
+        if leader:
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+            metrics.inc("pad_singleflight_coalesced_total")
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        """
+        Kjører ``func`` med mindre et kall med samme nøkkel allerede pågår.
+
+        Args:
+            key (Hashable): Nøkkel som identifiserer beregningen
+            func (Callable[[], T]): Beregningen
+
+        Returns:
+            T: Resultatet fra lederens kjøring
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = Future()
+            self._count(leader)
+        if not leader:
+            result: T = call.result()
+            return result
+        try:
+            value = func()
+        except BaseException as exc:
+            call.set_exception(exc)
+            raise
+        else:
+            call.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    async def do_async(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Async-variant av ``do`` for bruk i én event-løkke.
+
+        Args:
+            key (Hashable): Nøkkel som identifiserer beregningen
+            func (Callable[[], Awaitable[T]]): Lager korutinen som beregner
+
+        Returns:
+            T: Resultatet fra lederens kjøring
+        """
+        import asyncio
+
+        task = self._tasks.get(key)
+        self._count(task is None)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        result: T = await asyncio.shield(task)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """Returnerer ``leaders``, ``coalesced`` og antall kall som pågår nå."""
+        return {"leaders": self.leaders, "coalesced": self.coalesced,
+                "in_flight": len(self._calls) + len(self._tasks)}
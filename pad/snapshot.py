@@ -0,0 +1,265 @@
+"""
+snapshot.py
+Binære øyeblikksbilder av agenttilstand, med minnekartlagt lasting og
+periodisk lagring i bakgrunnen.
+
+Filformatet er kompakt og versjonert:
+
+- 16 byte hode: magisk streng ``PADSNAP\\0``, formatversjon og lengden
+  på metadataene (``<8sII``)
+- metadata som UTF-8-JSON, med en tabell over arrayene
+- NumPy-arrayene etter hverandre, hver justert til 64 byte
+
+Ved lasting kartlegges filen med ``mmap`` og arrayene blir skrivebeskyttede
+``np.frombuffer``-visninger rett inn i kartet. Lastetiden er dermed nesten
+uavhengig av størrelsen: bare hodet og metadataene leses, og sidene i
+arrayene leses inn av operativsystemet først når de brukes. Filer skrives
+til en midlertidig fil og flyttes på plass med ``os.replace``, så en
+leser ser aldri en halvskrevet fil, og gamle kart forblir gyldige.
+
+Classes:
+    Checkpointer: Lagrer øyeblikksbilder av agenter periodisk i en bakgrunnstråd.
+
+Functions:
+    write_snapshot: Skriver metadata og arrayer til en øyeblikksbildefil.
+    read_snapshot: Kartlegger en øyeblikksbildefil og returnerer metadata og arrayer.
+    pack_strings: Pakker en liste strenger i to arrayer.
+    unpack_strings: Pakker ut strenger fra ``pack_strings``.
+
+Example:
+    >>> import numpy as np
+    >>> from pad.snapshot import read_snapshot, write_snapshot
+    >>> _ = write_snapshot("/tmp/pad.snap", {"kind": "demo"}, {"x": np.arange(3)})
+    >>> meta, arrays = read_snapshot("/tmp/pad.snap")
+    >>> meta["kind"], arrays["x"].tolist()
+    ('demo', [0, 1, 2])
+"""
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+from typing import (TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Mapping, Optional,
+                    Tuple, Union)
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .context_agent import ContextAgent
+
+MAGIC = b"PADSNAP\0"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<8sII")
+_ALIGN = 64
+
+Targets = Callable[[], Iterable[Tuple[str, "ContextAgent"]]]
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def pack_strings(strings: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pakker strenger som UTF-8-data og tegnposisjoner.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Data (``uint8``) og ``n + 1`` posisjoner (``int64``)
+    """
+    strings = list(strings)
+    offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+    np.cumsum([len(text) for text in strings], out=offsets[1:])
+    data = np.frombuffer("".join(strings).encode("utf-8"), dtype=np.uint8)
+    return data, offsets
+
+
+def unpack_strings(data: np.ndarray, offsets: np.ndarray) -> List[str]:
+    """Pakker ut strengene fra ``pack_strings``."""
+    text = data.tobytes().decode("utf-8")
+    bounds = offsets.tolist()
+    return [text[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def write_snapshot(path: str, meta: Mapping[str, Any],
+                   arrays: Mapping[str, np.ndarray]) -> int:
+    """
+    Skriver et øyeblikksbilde atomisk.
+
+    Args:
+        path (str): Målfilen
+        meta (Mapping[str, Any]): JSON-serialiserbare metadata
+        arrays (Mapping[str, np.ndarray]): Navngitte, endimensjonale arrayer
+
+    Returns:
+        int: Antall byte skrevet
+    """
+    table: Dict[str, Tuple[int, str, int]] = {}
+    offset = 0
+    for name, array in arrays.items():
+        table[name] = (offset, array.dtype.str, len(array))
+        offset = _aligned(offset + array.nbytes)
+    header_meta = json.dumps({**meta, "arrays": table}).encode("utf-8")
+    data_start = _aligned(_HEADER.size + len(header_meta))
+
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as fh:
+        fh.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(header_meta)))
+        fh.write(header_meta)
+        for name, array in arrays.items():
+            fh.seek(data_start + table[name][0])
+            fh.write(np.ascontiguousarray(array).tobytes())
+        size = fh.tell()
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+    return size
+
+
+def read_snapshot(path: str) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """
+    Kartlegger et øyeblikksbilde i minnet.
+
+    Args:
+        path (str): Filen som skal leses
+
+    Returns:
+        Tuple[Dict[str, Any], Dict[str, np.ndarray]]: Metadata og
+        skrivebeskyttede arrayer som peker rett inn i filkartet
+
+    Raises:
+        ValueError: Hvis filen ikke er et øyeblikksbilde, eller har en
+            formatversjon denne koden ikke kan lese
+    """
+    with open(path, "rb") as fh:
+        data: Union[mmap.mmap, bytes] = b""
+        if os.fstat(fh.fileno()).st_size > 0:
+            data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(data) < _HEADER.size:
+        raise ValueError(f"{path} er ikke et PAD-øyeblikksbilde")
+    magic, version, meta_length = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} er ikke et PAD-øyeblikksbilde")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{path} har formatversjon {version}, forventet {FORMAT_VERSION}")
+    meta = json.loads(bytes(data[_HEADER.size:_HEADER.size + meta_length]).decode("utf-8"))
+    data_start = _aligned(_HEADER.size + meta_length)
+    arrays = {
+        # Visningene holder kartet i live så lenge noen bruker dem
+        name: np.frombuffer(data, dtype=np.dtype(dtype), count=count, offset=data_start + offset)
+        for name, (offset, dtype, count) in meta.pop("arrays").items()
+    }
+    return meta, arrays
+
+
+class Checkpointer:
+    """
+    Lagrer øyeblikksbilder av agenter periodisk i en bakgrunnstråd.
+
+    ``targets`` kalles ved hver runde og gir (sti, agent)-par. Agenter
+    som ikke er endret siden forrige lagring (samme versjon og
+    fingeravtrykk), hoppes over. Selve lagringen tar bare agentens
+    skrivelås mens referanser kopieres; serialisering og diskskriving
+    skjer utenfor, så forespørsler blokkeres ikke av den.
+
+    Attributes:
+        interval (float): Sekunder mellom hver runde
+        saved (int): Antall øyeblikksbilder lagret totalt
+
+    Example:
+        >>> agent = ContextAgent()
+        >>> with Checkpointer(lambda: [("/tmp/pad.snap", agent)], interval=30):
+        ...     agent.update_context("Flask-prosjekt")
+    """
+
+    def __init__(self, targets: Targets, interval: float = 60.0) -> None:
+        """
+        Args:
+            targets (Callable): Gir (sti, agent)-parene som skal lagres
+            interval (float): Sekunder mellom hver runde
+        """
+        self.targets = targets
+        self.interval = interval
+        self.saved = 0
+        self._marks: Dict[str, Tuple[int, str]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "Checkpointer":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+    def start(self) -> "Checkpointer":
+        """Starter bakgrunnstråden."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="pad-checkpointer",
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.checkpoint()
+
+    def checkpoint(self) -> int:
+        """
+        Lagrer alle endrede agenter nå.
+
+        Returns:
+            int: Antall øyeblikksbilder som ble lagret
+        """
+        with self._lock:
+            marks: Dict[str, Tuple[int, str]] = {}
+            count = 0
+            for path, agent in list(self.targets()):
+                snapshot = agent.snapshot()
+                mark = (snapshot.version, snapshot.fingerprint)
+                marks[path] = mark
+                if self._marks.get(path) == mark:
+                    continue
+                try:
+                    agent.save_snapshot(path)
+                except OSError:
+                    logging.exception("Kunne ikke lagre øyeblikksbilde til %s", path)
+                    del marks[path]
+                    continue
+                count += 1
+            self._marks = marks
+            self.saved += count
+            return count
+
+    def discard(self, path: str) -> None:
+        """
+        Sletter øyeblikksbildet i ``path`` og glemmer at det er lagret.
+
+        Tar samme lås som ``checkpoint``, så en runde som allerede har hentet
+        agenten fra ``targets``, kan ikke skrive filen på nytt etterpå.
+
+        Args:
+            path (str): Filen til en agent som ikke lenger er et mål
+        """
+        with self._lock:
+            self._marks.pop(path, None)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def stop(self, final: bool = True) -> None:
+        """
+        Stopper bakgrunnstråden.
+
+        Args:
+            final (bool): Lagre en siste gang etter at tråden er stoppet
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if final:
+            self.checkpoint()
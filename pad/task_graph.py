@@ -0,0 +1,279 @@
+"""
+task_graph.py
+Oppgavegraf og parallell utførelse for OrchestratorAgent.
+
+En forespørsel som gjelder flere filer deles opp i deloppgaver med
+avhengigheter (en DAG). TaskScheduler starter hver deloppgave så snart
+alle avhengighetene er ferdige, slik at uavhengige deloppgaver kjøres
+samtidig. Veggklokketiden følger dermed den kritiske stien i grafen, ikke
+antallet deloppgaver.
+
+Planleggingen er en demo-heuristikk: linjer på formen ``fil.py: beskrivelse``
+blir deloppgaver. Avhengigheter kan angis eksplisitt med
+``(avhenger av a.py, b.py)``, og en deloppgave som nevner en tidligere fil
+(eller modulnavnet) avhenger av den.
+
+Classes:
+    Subtask: Én deloppgave i grafen.
+    TaskGraph: Rettet, asyklisk graf av deloppgaver.
+    TaskScheduler: Kjører en TaskGraph på en tråd-pool eller i event-løkken.
+
+Functions:
+    plan_graph: Lager en TaskGraph fra en brukerforespørsel.
+    merge_results: Slår sammen kode og QA-rapporter fra deloppgavene.
+
+Example:
+    >>> from pad.task_graph import plan_graph
+    >>> graph = plan_graph("models.py: datamodeller\\napi.py: endepunkter som bruker models")
+    >>> graph.get("api.py").depends_on
+    ('models.py',)
+"""
+import re
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from typing import (Awaitable, Callable, Dict, Iterator, List, NamedTuple, Optional, Set,
+                    Tuple, TypeVar)
+
+R = TypeVar("R")
+
+_SUBTASK_RE = re.compile(
+    r"^\s*(?:[-*]|\d+[.)])?\s*(?P<name>[\w./-]+\.\w+)\s*:\s*(?P<description>.+?)\s*$")
+_DEPENDS_RE = re.compile(r"\((?:avhenger av|depends on)\s+(?P<names>[^)]*)\)", re.IGNORECASE)
+
+
+class Subtask(NamedTuple):
+    """
+    Én deloppgave i en oppgavegraf.
+
+    Attributes:
+        id (str): Unik ID, vanligvis filnavnet
+        description (str): Hva som skal genereres
+        depends_on (Tuple[str, ...]): ID-ene til deloppgaver som må være ferdige først
+    """
+
+    id: str
+    description: str
+    depends_on: Tuple[str, ...] = ()
+
+
+class TaskGraph:
+    """
+    Rettet, asyklisk graf av deloppgaver.
+
+    Deloppgavene holdes i innsettingsrekkefølge, som også brukes når
+    resultatene slås sammen.
+
+    Example:
+        >>> graph = TaskGraph()
+        >>> graph.add("a.py", "lag a")
+        >>> graph.add("b.py", "lag b", depends_on=("a.py",))
+        >>> graph.critical_path()
+        ['a.py', 'b.py']
+    """
+
+    def __init__(self) -> None:
+        self._subtasks: Dict[str, Subtask] = {}
+
+    def __len__(self) -> int:
+        return len(self._subtasks)
+
+    def __iter__(self) -> Iterator[Subtask]:
+        return iter(self._subtasks.values())
+
+    def get(self, subtask_id: str) -> Subtask:
+        return self._subtasks[subtask_id]
+
+    def add(self, subtask_id: str, description: str, depends_on: Tuple[str, ...] = ()) -> None:
+        """
+        Legger til en deloppgave.
+
+        Raises:
+            ValueError: Hvis ID-en finnes fra før
+        """
+        if subtask_id in self._subtasks:
+            raise ValueError(f"Deloppgaven {subtask_id!r} finnes allerede")
+        self._subtasks[subtask_id] = Subtask(subtask_id, description, tuple(depends_on))
+
+    def topological_order(self) -> List[str]:
+        """
+        Returnerer ID-ene slik at avhengigheter alltid kommer først.
+
+        Raises:
+            ValueError: Ved ukjente avhengigheter eller sykler
+        """
+        order: List[str] = []
+        state: Dict[str, int] = {}  # 1 = under besøk, 2 = ferdig
+
+        def visit(subtask_id: str, path: Tuple[str, ...]) -> None:
+            if state.get(subtask_id) == 2:
+                return
+            if state.get(subtask_id) == 1:
+                raise ValueError("Syklisk avhengighet: " + " -> ".join(path + (subtask_id,)))
+            state[subtask_id] = 1
+            for dependency in self._subtasks[subtask_id].depends_on:
+                if dependency not in self._subtasks:
+                    raise ValueError(f"{subtask_id!r} avhenger av ukjent {dependency!r}")
+                visit(dependency, path + (subtask_id,))
+            state[subtask_id] = 2
+            order.append(subtask_id)
+
+        for subtask_id in self._subtasks:
+            visit(subtask_id, ())
+        return order
+
+    def critical_path(self) -> List[str]:
+        """Returnerer den lengste kjeden av avhengigheter (i antall deloppgaver)."""
+        longest: Dict[str, List[str]] = {}
+        for subtask_id in self.topological_order():
+            dependencies = self._subtasks[subtask_id].depends_on
+            best = max((longest[d] for d in dependencies), key=len, default=[])
+            longest[subtask_id] = best + [subtask_id]
+        return max(longest.values(), key=len, default=[])
+
+
+def plan_graph(user_input: str) -> TaskGraph:
+    """
+    Dekomponerer en forespørsel til en graf av deloppgaver.
+
+    Args:
+        user_input (str): Brukerens forespørsel i naturlig språk
+
+    Returns:
+        TaskGraph: Én deloppgave per ``fil: beskrivelse``-linje, eller én
+        deloppgave (``main``) med hele forespørselen hvis ingen linjer matcher
+
+    Raises:
+        ValueError: Hvis eksplisitte avhengigheter er ukjente eller sykliske
+
+    Note:
+        Dette er en demo-heuristikk. I en fullstendig implementasjon ville
+        en LLM lage grafen.
+    """
+    graph = TaskGraph()
+    for line in user_input.splitlines():
+        match = _SUBTASK_RE.match(line)
+        if match is None:
+            continue
+        name, description = match.group("name"), match.group("description")
+        depends: List[str] = []
+        explicit = _DEPENDS_RE.search(description)
+        if explicit is not None:
+            names = re.split(r"\s*(?:,|\bog\b|\band\b)\s*", explicit.group("names"))
+            depends = [dep for dep in names if dep]
+            description = (description[:explicit.start()] + description[explicit.end():]).strip()
+        else:
+            words = set(re.findall(r"[\w./-]+", description))
+            for earlier in graph:
+                stem = earlier.id.rsplit("/", 1)[-1].split(".", 1)[0]
+                if earlier.id in words or stem in words:
+                    depends.append(earlier.id)
+        graph.add(name, description, tuple(depends))
+    if len(graph) == 0:
+        graph.add("main", user_input)
+    graph.topological_order()
+    return graph
+
+
+class TaskScheduler:
+    """
+    Kjører deloppgavene i en TaskGraph med respekt for avhengighetene.
+
+    Hver deloppgave startes så snart alle avhengighetene er ferdige (ikke
+    nivå for nivå), og får avhengighetenes resultater som argument.
+
+    Example:
+        >>> scheduler = TaskScheduler()
+        >>> results = scheduler.run(graph, lambda task, deps: task.id.upper(), executor)
+    """
+
+    def run(self, graph: TaskGraph, func: Callable[[Subtask, Dict[str, R]], R],
+            executor: Executor) -> Dict[str, R]:
+        """
+        Kjører grafen på en tråd-pool.
+
+        Args:
+            graph (TaskGraph): Grafen som skal kjøres
+            func (Callable): Kalles med (deloppgave, resultater fra avhengighetene)
+            executor (Executor): Poolen deloppgavene kjøres på
+
+        Returns:
+            Dict[str, R]: Resultat per deloppgave, i grafens rekkefølge
+
+        Raises:
+            Exception: Første unntak fra en deloppgave; ventende deloppgaver startes ikke
+        """
+        graph.topological_order()
+        results: Dict[str, R] = {}
+        waiting: Dict[str, Set[str]] = {t.id: set(t.depends_on) for t in graph}
+        running: Dict["Future[R]", str] = {}
+
+        def start_ready() -> None:
+            for subtask_id, deps in list(waiting.items()):
+                if not deps:
+                    del waiting[subtask_id]
+                    subtask = graph.get(subtask_id)
+                    inputs = {d: results[d] for d in subtask.depends_on}
+                    running[executor.submit(func, subtask, inputs)] = subtask_id
+
+        start_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                subtask_id = running.pop(future)
+                results[subtask_id] = future.result()
+                for deps in waiting.values():
+                    deps.discard(subtask_id)
+            start_ready()
+        return {t.id: results[t.id] for t in graph}
+
+    async def run_async(self, graph: TaskGraph,
+                        func: Callable[[Subtask, Dict[str, R]], Awaitable[R]]) -> Dict[str, R]:
+        """
+        Kjører grafen som asyncio-tasks i event-løkken.
+
+        Args:
+            graph (TaskGraph): Grafen som skal kjøres
+            func (Callable): Async-funksjon som kalles med (deloppgave,
+                resultater fra avhengighetene)
+
+        Returns:
+            Dict[str, R]: Resultat per deloppgave, i grafens rekkefølge
+        """
+        import asyncio
+
+        tasks: Dict[str, "asyncio.Task[R]"] = {}
+
+        async def run_one(subtask: Subtask) -> R:
+            inputs = {d: await tasks[d] for d in subtask.depends_on}
+            return await func(subtask, inputs)
+
+        for subtask_id in graph.topological_order():
+            tasks[subtask_id] = asyncio.ensure_future(run_one(graph.get(subtask_id)))
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        return {subtask_id: tasks[subtask_id].result() for subtask_id in
+                (t.id for t in graph)}
+
+
+def merge_results(graph: TaskGraph, results: Dict[str, Dict[str, str]],
+                  header: Optional[str] = "# --- {id} ---\n") -> Dict[str, str]:
+    """
+    Slår sammen kode og QA-rapporter fra deloppgavene.
+
+    Args:
+        graph (TaskGraph): Grafen resultatene hører til
+        results (Dict[str, Dict[str, str]]): ``code`` og ``feedback`` per deloppgave
+        header (Optional[str]): Overskrift før hver deloppgaves kode
+
+    Returns:
+        Dict[str, str]: Samlet ``code`` og ``feedback``
+    """
+    code = []
+    feedback = []
+    for subtask in graph:
+        result = results[subtask.id]
+        code.append((header or "").format(id=subtask.id) + result["code"])
+        feedback.append(f"{subtask.id}: {result['feedback']}")
+    return {"code": "\n\n".join(code), "feedback": "\n".join(feedback)}
@@ -0,0 +1,73 @@
+"""
+Tester for REST-API-et (pad.api).
+"""
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from pad import api
+from pad.api import app
+
+client = TestClient(app)
+
+
+def test_generate_returns_code_and_feedback() -> None:
+    response = client.post("/generate", json={"prompt": "skriv ut hei"})
+    assert response.status_code == 200
+    assert "skriv ut hei" in response.json()["code"]
+
+
+def test_validate_batch_keeps_input_order() -> None:
+    codes = ["def f():\n    return 1\n", "import os\n\n\ndef g():\n    return 2\n", "x = 1"]
+    response = client.post("/validate/batch", json={"codes": codes})
+    results = response.json()["results"]
+    assert results[0] == "Koden er PEP8-kompatibel."
+    assert "F401" in results[1]
+    assert results[2].startswith("Advarsel")
+
+
+def test_generate_stream_sends_code_then_feedback() -> None:
+    with client.stream("POST", "/generate/stream", json={"prompt": "skriv ut hei"}) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [line for line in response.iter_lines() if line.startswith("event:")]
+    assert events[0] == "event: code"
+    assert events[-1] == "event: feedback"
+
+
+def test_sessions_have_separate_context() -> None:
+    client.post("/generate", json={"prompt": "oppgave for a", "session_id": "a"})
+    response = client.post("/generate", json={"prompt": "oppgave"},
+                           headers={"X-PAD-Session": "b"})
+    assert "Standard kontekst" in response.json()["code"]
+    stats = client.get("/sessions/stats").json()
+    assert stats["live_sessions"] >= 2
+
+
+def test_metrics_exports_stage_histograms() -> None:
+    client.post("/generate", json={"prompt": "skriv ut hei"})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    body = response.text
+    for stage in ("plan", "codegen", "qa", "context"):
+        assert f'pad_stage_seconds_count{{stage="{stage}"}}' in body
+    assert "pad_qa_cache_hits_total" in body
+    assert "pad_codegen_queue_depth 0.0" in body
+
+
+def test_job_submit_status_and_result(monkeypatch: pytest.MonkeyPatch) -> None:
+    response = client.post("/jobs", json={"prompt": "skriv ut hei", "priority": "high"})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    for _ in range(500):
+        if client.get(f"/jobs/{job_id}").json()["status"] == "done":
+            break
+        time.sleep(0.01)
+    result = client.get(f"/jobs/{job_id}/result").json()
+    assert "skriv ut hei" in result["code"]
+    assert client.delete(f"/jobs/{job_id}").status_code == 409
+    assert client.get("/jobs/finnes-ikke").status_code == 404
+    # Med flere arbeiderprosesser ville status havne i feil prosess; køen er av
+    monkeypatch.setattr(api, "WORKER_PROCESSES", 2)
+    assert client.post("/jobs", json={"prompt": "hei"}).status_code == 503
+    assert client.get(f"/jobs/{job_id}").status_code == 503
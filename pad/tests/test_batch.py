@@ -0,0 +1,72 @@
+"""
+Tester for batch-kjøring (pad.batch og OrchestratorAgent.run_batch).
+"""
+import io
+import json
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator
+
+from pad.batch import Completed, Prompt, read_prompts, run_batch
+from pad.orchestrator import OrchestratorAgent
+
+
+def test_run_batch_bounds_in_flight_and_keeps_input_order() -> None:
+    out = io.StringIO()
+    lock = threading.Lock()
+    read = [0]
+    running = [0, 0]  # nå, maks
+
+    def prompts() -> Iterator[Prompt]:
+        for prompt in read_prompts(f"oppgave {i}\n" for i in range(200)):
+            # Input leses aldri mer enn max_in_flight foran det som er skrevet
+            assert read[0] - out.getvalue().count("\n") <= 6
+            read[0] += 1
+            yield prompt
+
+    def process(prompt: str) -> Dict[str, str]:
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        time.sleep(random.random() / 1000)
+        with lock:
+            running[0] -= 1
+        if prompt == "oppgave 7":
+            raise RuntimeError("modellen svarte ikke")
+        return {"code": prompt.upper(), "feedback": "OK"}
+
+    stats = run_batch(process, prompts(), out, workers=3, max_in_flight=6, ordered=True)
+    assert stats == {"processed": 199, "failed": 1, "skipped": 0}
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [record["index"] for record in records] == list(range(200))
+    assert records[1]["code"] == "OPPGAVE 1"
+    assert records[7]["error"] == "RuntimeError: modellen svarte ikke"
+    assert running[1] <= 3
+
+
+def test_resume_skips_written_results_and_drops_partial_line(tmp_path: Path) -> None:
+    lines = ["skriv ut hei", "", '{"prompt": "lag en funksjon", "id": "a"}', "skriv ut hade",
+             '{"id": "b"}', "skriv ut slutt"]
+    path = tmp_path / "ut.jsonl"
+    path.write_text('{"index": 1, "id": "a", "prompt": "lag en funksjon", "code": ""}\n'
+                    '{"index": 0, "prompt": "skri')
+    done = Completed.load(str(path))
+    assert 1 in done and 0 not in done and len(done) == 1
+
+    orchestrator = OrchestratorAgent()
+    try:
+        with open(path, "a", encoding="utf-8") as out:
+            stats = orchestrator.run_batch(lines, out, workers=2, done=done)
+    finally:
+        orchestrator.close()
+    assert stats == {"processed": 3, "failed": 1, "skipped": 1}
+    records = sorted((json.loads(line) for line in path.read_text().splitlines()),
+                     key=lambda record: record["index"])
+    assert [record["index"] for record in records] == [0, 1, 2, 3, 4]
+    assert records[1]["id"] == "a"
+    assert "skriv ut hade" in records[2]["code"] and records[2]["feedback"]
+    # En linje uten prompt blir en feillinje; batchen fortsetter etter den
+    assert records[3]["id"] == "b" and "mangler 'prompt'" in records[3]["error"]
+    assert "skriv ut slutt" in records[4]["code"]
@@ -0,0 +1,27 @@
+"""
+Tester for regresjonssjekken i ytelsessuiten (benchmarks.suite).
+"""
+from typing import List
+
+from benchmarks.suite import compare, summarize, time_calls
+
+
+def test_summarize_reports_percentiles() -> None:
+    result = summarize([0.001] * 98 + [0.1] * 2)
+    assert result["p50_ms"] == 1.0
+    assert result["p99_ms"] == 100.0
+    assert result["iterations"] == 100
+
+
+def test_compare_flags_only_regressions_over_threshold() -> None:
+    baseline = {"results": {"a": {"p50_ms": 10.0}, "b": {"p50_ms": 10.0}}}
+    current = {"results": {"a": {"p50_ms": 11.0}, "b": {"p50_ms": 13.0}}}
+    regressions = compare(current, baseline, threshold=0.2)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("b:")
+
+
+def test_warmup_does_not_reuse_measured_inputs() -> None:
+    calls: List[int] = []
+    assert time_calls(calls.append, 10, warmup=3)["iterations"] == 10
+    assert calls == [10, 11, 12] + list(range(10))
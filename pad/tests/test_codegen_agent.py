@@ -10,3 +10,25 @@ def test_generate_code_includes_task() -> None:
     context = ContextAgent()
     code = agent.generate_code("skriv ut hei", context)
     assert "skriv ut hei" in code
+
+
+def test_generate_code_stream_joins_to_generate_code() -> None:
+    agent = CodeGenAgent()
+    context = ContextAgent()
+    chunks = list(agent.generate_code_stream("skriv ut hei", context))
+    assert len(chunks) > 1
+    assert "".join(chunks) == agent.generate_code("skriv ut hei", context)
+
+
+def test_generate_code_memo_invalidated_by_context_change() -> None:
+    agent = CodeGenAgent(memo_size=8)
+    context = ContextAgent()
+    first = agent.generate_code("hei", context)
+    assert agent.generate_code("hei", context) == first
+    assert agent.memo is not None and agent.memo.hits == 1
+    context.update_context("Nytt prosjekt")
+    assert "Nytt prosjekt" in agent.generate_code("hei", context)
+    context.update_context_from_code("x = 1")
+    assert "Seneste kodeblokk: x = 1" in agent.generate_code("hei", context)
+    agent.generate_code("hei", context, use_cache=False)
+    assert agent.memo.hits == 1
@@ -1,6 +1,9 @@
 """
 Tester for ContextAgent.
 """
+import threading
+from typing import List
+
 from pad.context_agent import ContextAgent
 
 
@@ -8,3 +11,64 @@ def test_context_update_and_get() -> None:
     agent = ContextAgent()
     agent.update_context("ny kontekst")
     assert agent.get_context() == "ny kontekst"
+
+
+def test_index_codebase_is_incremental_and_queryable(tmp_path) -> None:  # type: ignore
+    (tmp_path / "a.py").write_text("import os\n\n\ndef hent_bruker():\n    pass\n")
+    (tmp_path / "b.py").write_text("class Lager:\n    def tell(self):\n        pass\n")
+    agent = ContextAgent()
+    index_path = str(tmp_path / "index.sqlite")
+    assert agent.index_codebase(str(tmp_path), index_path)["parsed"] == 2
+    (tmp_path / "b.py").write_text("class Lager:\n    def telle(self):\n        pass\n")
+    assert agent.index_codebase(str(tmp_path), index_path)["parsed"] == 1
+    assert agent.index_codebase(str(tmp_path), index_path, ["b.py"])["parsed"] == 0
+
+    reloaded = ContextAgent()
+    assert reloaded.index_codebase(str(tmp_path), index_path)["parsed"] == 0
+    context = reloaded.get_context("bruk hent_bruker og Lager.telle")
+    assert "function hent_bruker (a.py:4)" in context
+    assert "method Lager.telle (b.py:2)" in context
+
+    # Samme rot, indeksfil og generasjon gir samme fingeravtrykk i alle prosesser
+    again = ContextAgent()
+    again.index_codebase(str(tmp_path), index_path)
+    assert again.snapshot().fingerprint == reloaded.snapshot().fingerprint
+    (tmp_path / "tom").mkdir()
+    again.index_codebase(str(tmp_path / "tom"), None)
+    again.index_codebase(str(tmp_path), index_path)
+    assert again.snapshot().fingerprint != reloaded.snapshot().fingerprint
+
+
+def test_concurrent_readers_never_see_torn_snapshots() -> None:
+    agent = ContextAgent()
+    writes_per_thread, writers = 2000, 4
+    errors: List[str] = []
+    done = threading.Event()
+
+    def write(n: int) -> None:
+        for i in range(writes_per_thread):
+            agent.update_context_from_code(f"kode {n}-{i}")
+
+    def read() -> None:
+        last_version = 0
+        while not done.is_set():
+            snap = agent.snapshot()
+            if snap.version < last_version:
+                errors.append("versjonen gikk bakover")
+            if snap.recent and snap.context != f"Seneste kodeblokk: {snap.recent[-1]}...":
+                errors.append(f"revet tilstand: {snap}")
+            last_version = snap.version
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(writers)]
+    for thread in readers + threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    done.set()
+    for thread in readers:
+        thread.join()
+
+    assert errors == []
+    assert agent.snapshot().version == writes_per_thread * writers
+    assert len(agent.code_history) == writes_per_thread * writers
@@ -0,0 +1,46 @@
+"""
+Tester for delt kontekstlager (pad.context_store).
+"""
+import multiprocessing
+import os
+from typing import Tuple
+
+from pad.context_agent import ContextAgent
+from pad.context_store import SQLiteContextStore
+
+
+def test_agents_in_different_workers_share_context(tmp_path: "os.PathLike[str]") -> None:
+    path = os.path.join(tmp_path, "context.sqlite")
+    # To agenter med hver sin tilkobling, som i to uvicorn-arbeidere
+    first = ContextAgent(store=SQLiteContextStore(path), session_id="klient-a")
+    second = ContextAgent(store=SQLiteContextStore(path), session_id="klient-a")
+    other = ContextAgent(store=SQLiteContextStore(path), session_id="klient-b")
+
+    first.update_context("Flask-prosjekt")
+    assert second.get_context() == "Flask-prosjekt"
+    second.update_context_from_code("def f():\n    return 1")
+    assert first.snapshot().recent == ("def f():\n    return 1",)
+    assert first.get_context() == second.get_context()
+    # Kodehistorikken er lokal, så bare agenten som fikk koden kan hente den fram
+    assert "return 1" in second.get_context("f")
+    assert first.snapshot().fingerprint != second.snapshot().fingerprint
+    assert first.snapshot().version == 2
+    assert other.get_context() == "Standard kontekst"
+
+
+def _append(args: Tuple[str, int]) -> None:
+    path, worker = args
+    store = SQLiteContextStore(path)
+    for i in range(20):
+        store.update("delt", lambda context, recent: (context, recent + (f"{worker}-{i}",)))
+
+
+def test_concurrent_updates_from_processes_are_not_lost(tmp_path: "os.PathLike[str]") -> None:
+    path = os.path.join(tmp_path, "context.sqlite")
+    SQLiteContextStore(path)
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        pool.map(_append, [(path, worker) for worker in range(4)])
+
+    context, version, recent = SQLiteContextStore(path).get("delt")
+    assert version == 80
+    assert len(recent) == 80
@@ -0,0 +1,121 @@
+"""
+Tester for tidsfrister gjennom pipelinen (pad.deadline).
+"""
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from pad import api
+from pad.deadline import Deadline
+from pad.mock_model_server import MockModelServer
+from pad.model_backend import HTTPModelBackend
+from pad.orchestrator import SKIPPED_FEEDBACK, OrchestratorAgent
+
+
+def test_slow_stages_are_skipped_with_partial_results(monkeypatch: pytest.MonkeyPatch) -> None:
+    orchestrator = OrchestratorAgent()
+    validate = orchestrator.qa_agent.validate_code
+
+    def slow_validate(code: str, tests: object = None, deadline: object = None,
+                      run_tests: bool = False) -> str:
+        time.sleep(0.5)
+        return validate(code)
+
+    monkeypatch.setattr(orchestrator.qa_agent, "validate_code", slow_validate)
+    try:
+        start = time.perf_counter()
+        result = orchestrator.process_request("skriv ut hei", deadline=Deadline(0.2))
+        assert time.perf_counter() - start < 0.4
+        assert "skriv ut hei" in result["code"]
+        assert result["skipped"] == ["qa"] and result["partial"]
+        # Generert kode havner i konteksten selv om QA ble hoppet over
+        assert "skriv ut hei" in orchestrator.context_agent.get_context()
+
+        result = asyncio.run(orchestrator.process_request_async("skriv ut hade",
+                                                                deadline=Deadline(0.2)))
+        assert result["skipped"] == ["qa"] and "skriv ut hade" in result["code"]
+
+        result = orchestrator.process_request("for sent", deadline=Deadline(0))
+        assert result["skipped"] == ["plan", "codegen", "qa"] and result["code"] == ""
+        assert "for sent" not in orchestrator.context_agent.get_context()
+        assert "skipped" not in orchestrator.process_request("uten frist",
+                                                             deadline=Deadline(5))
+
+        # En samtidig forespørsel uten frist arver ikke ledernes ufullstendige resultat
+        with ThreadPoolExecutor(2) as pool:
+            short = pool.submit(orchestrator.process_request, "delt", deadline=Deadline(0.2))
+            time.sleep(0.05)
+            full = pool.submit(orchestrator.process_request, "delt")
+            assert short.result()["partial"] and "partial" not in full.result()
+        assert orchestrator.singleflight.coalesced == 1
+    finally:
+        orchestrator.close()
+
+
+def test_http_backend_gives_up_when_deadline_passes() -> None:
+    with MockModelServer(latency=1.0) as server:
+        backend = HTTPModelBackend(server.url, timeout=30, retries=5, backoff=0.01)
+        try:
+            start = time.perf_counter()
+            with pytest.raises(TimeoutError):
+                backend.generate("hei", "ctx", timeout=0.2)
+            assert time.perf_counter() - start < 0.6
+            assert server.counters["requests"] <= 2
+        finally:
+            backend.close()
+        # Også når fristen går ut under siste forsøk
+        backend = HTTPModelBackend(server.url, timeout=30, retries=0)
+        try:
+            with pytest.raises(TimeoutError):
+                backend.generate("hei", "ctx", timeout=0.2)
+        finally:
+            backend.close()
+
+
+def test_api_reports_skipped_stages_and_504_without_code(
+        monkeypatch: pytest.MonkeyPatch) -> None:
+    client = TestClient(api.app)
+    codegen = api.orchestrator.codegen_agent
+    generate = codegen.generate_code
+
+    def slow(result: Callable[..., str]) -> Callable[..., str]:
+        def call(*args: Any) -> str:
+            time.sleep(0.5)
+            return result(*args)
+        return call
+
+    monkeypatch.setattr(api.orchestrator.qa_agent, "validate_code", slow(lambda *args: "OK"))
+    response = client.post("/generate", json={"prompt": "frist qa", "session_id": "frist",
+                                              "timeout": 0.2})
+    assert response.status_code == 200
+    assert response.json()["skipped"] == ["qa"] and response.json()["partial"]
+
+    def stream_feedback(prompt: str) -> str:
+        start = time.perf_counter()
+        with client.stream("POST", "/generate/stream", json={
+                "prompt": prompt, "session_id": "frist", "timeout": 0.2}) as response:
+            lines = list(response.iter_lines())
+        assert time.perf_counter() - start < 0.4
+        return json.loads(lines[lines.index("event: feedback") + 1][len("data: "):])
+
+    assert stream_feedback("frist strøm") == SKIPPED_FEEDBACK["qa"]
+    stream = codegen.generate_code_stream
+
+    def slow_stream(*args: Any) -> Iterator[str]:
+        for chunk in stream(*args):
+            time.sleep(0.5)
+            yield chunk
+
+    monkeypatch.setattr(codegen, "generate_code_stream", slow_stream)
+    assert stream_feedback("frist strømkode") == SKIPPED_FEEDBACK["codegen"]
+
+    monkeypatch.setattr(codegen, "generate_code", slow(lambda *args: generate(*args[:3])))
+    response = client.post("/generate", json={"prompt": "frist kode", "session_id": "frist",
+                                              "timeout": 0.2})
+    assert response.status_code == 504
+    assert client.post("/generate", json={"prompt": "x", "timeout": 0}).status_code == 422
@@ -0,0 +1,48 @@
+"""
+Tester for CodeHistory og begrenset kodehistorikk i ContextAgent.
+"""
+import logging
+import os
+from pathlib import Path
+
+import pytest
+
+from pad.context_agent import ContextAgent
+from pad.history import CodeHistory
+from pad.orchestrator import OrchestratorAgent
+
+
+def _rss_bytes() -> int:
+    with open("/proc/self/statm") as fh:
+        return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def test_history_spills_to_disk_and_reads_back(tmp_path: Path) -> None:
+    history = CodeHistory(max_bytes=1000, spill_path=str(tmp_path / "history.log"))
+    codes = [f"x = {i}" for i in range(100)]
+    for code in codes:
+        history.append(code)
+    assert history.memory_bytes <= 1000
+    assert history.spilled > 0
+    assert len(history) == 100
+    assert list(history) == codes
+    assert history.recent(2) == codes[-2:]
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="krever /proc")
+def test_rss_stays_flat_over_100k_requests(tmp_path: Path) -> None:
+    orchestrator = OrchestratorAgent()
+    orchestrator.context_agent = ContextAgent(
+        history_bytes=256 * 1024, history_path=str(tmp_path / "history.log"))
+    logging.disable(logging.INFO)
+    try:
+        for i in range(5000):
+            orchestrator.process_request(f"oppgave {i}")
+        before = _rss_bytes()
+        for i in range(100_000):
+            orchestrator.process_request(f"oppgave {i}")
+        growth = _rss_bytes() - before
+    finally:
+        logging.disable(logging.NOTSET)
+    assert len(orchestrator.context_agent.code_history) == 105_000
+    assert growth < 2 * 1024 * 1024
@@ -0,0 +1,51 @@
+"""
+Tester for jobbkøen (pad.jobs).
+"""
+import threading
+import time
+from typing import Dict, List
+
+import pytest
+
+from pad.jobs import Job, JobQueue, QueueFullError
+
+
+def test_priorities_backpressure_and_cancel() -> None:
+    gate = threading.Event()
+    order: List[str] = []
+
+    def run(job: Job) -> Dict[str, str]:
+        gate.wait(5)
+        order.append(job.prompt)
+        return {"code": job.prompt, "feedback": "OK"}
+
+    queue = JobQueue(run, workers=1, max_depth=3)
+    blocker = queue.submit("blokkerer")
+    while blocker.status != "running":
+        time.sleep(0.001)
+    low = queue.submit("lav", priority="low")
+    cancelled = queue.submit("avbrytes")
+    high = queue.submit("høy", priority="high")
+    with pytest.raises(QueueFullError) as excinfo:
+        queue.submit("for mye")
+    assert excinfo.value.retry_after >= 1
+    assert queue.cancel(cancelled.id)
+    assert not queue.cancel(blocker.id)
+    gate.set()
+    queue.wait(low.id, timeout=5)
+    assert low.status == "done"
+    assert order == ["blokkerer", "høy", "lav"]
+    assert high.result == {"code": "høy", "feedback": "OK"}
+    assert queue.counters["rejected"] == 1 and queue.counters["cancelled"] == 1
+    queue.close()
+
+
+def test_stale_jobs_expire_and_results_are_dropped() -> None:
+    queue = JobQueue(lambda job: {"code": "", "feedback": ""}, workers=1,
+                     max_wait=0.0, result_ttl=0.0)
+    job = queue.submit("gammel")
+    queue.wait(job.id, timeout=5)
+    assert job.status == "expired"
+    queue._last_purge = 0.0
+    assert queue.get(job.id) is None
+    queue.close()
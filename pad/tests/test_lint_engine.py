@@ -0,0 +1,22 @@
+"""
+Tester for LintEngine og LintWorkerPool.
+"""
+from pad.lint_engine import LintEngine, LintWorkerPool
+
+
+def test_check_reports_flake8_format() -> None:
+    engine = LintEngine()
+    findings = engine.check("import os\n")
+    assert findings == ["stdin:1:1: F401 'os' imported but unused"]
+
+
+def test_check_respects_noqa_and_syntax_errors() -> None:
+    engine = LintEngine()
+    assert engine.check("import os  # noqa\n") == []
+    assert "E999" in engine.check("def f(:\n")[0]
+
+
+def test_worker_pool_matches_engine() -> None:
+    code = "def f( x ):\n    return x\n"
+    with LintWorkerPool(workers=1) as pool:
+        assert pool.check(code, timeout=5) == LintEngine().check(code)
@@ -0,0 +1,28 @@
+"""
+Tester for latensmåling og Prometheus-eksport (pad.metrics).
+"""
+from pad.metrics import Histogram, MetricsRegistry
+
+
+def test_histogram_quantiles_follow_buckets() -> None:
+    histogram = Histogram(buckets=(0.001, 0.01, 0.1))
+    for _ in range(98):
+        histogram.observe(0.0005)
+    histogram.observe(0.05)
+    histogram.observe(0.05)
+    assert histogram.quantile(0.5) <= 0.001
+    assert 0.01 < histogram.quantile(0.99) <= 0.1
+    assert histogram.cumulative()[-1] == (float("inf"), 100)
+
+
+def test_disabled_registry_records_nothing() -> None:
+    registry = MetricsRegistry(enabled=False)
+    with registry.span("qa"):
+        pass
+    registry.inc("pad_requests_total")
+    assert registry.stages == {} and registry.counters == {}
+    registry.enabled = True
+    with registry.span("qa"):
+        pass
+    assert registry.stage_summary()["qa"]["count"] == 1
+    assert 'pad_stage_seconds_bucket{stage="qa",le="+Inf"} 1' in registry.render_prometheus()
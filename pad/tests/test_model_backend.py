@@ -0,0 +1,55 @@
+"""
+Tester for modell-backends (pad.model_backend) mot den lokale mock-tjeneren.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import pytest
+
+from pad.codegen_agent import CodeGenAgent
+from pad.context_agent import ContextAgent
+from pad.mock_model_server import MockModelServer
+from pad.model_backend import DemoBackend, HTTPModelBackend, ModelBackend, ModelBackendError
+
+
+def test_http_backend_matches_demo_and_retries() -> None:
+    with MockModelServer(latency=0.0, fail_first=2) as server:
+        backend = HTTPModelBackend(server.url, backoff=0.001)
+        agent = CodeGenAgent(memo_size=0, backend=backend)
+        try:
+            code = agent.generate_code("hei", ContextAgent())
+        finally:
+            agent.close()
+        assert server.counters["requests"] == 3
+    assert code == DemoBackend().generate("hei", "Standard kontekst")
+
+
+def test_concurrent_prompts_are_micro_batched_over_pooled_connections() -> None:
+    with MockModelServer(latency=0.02) as server:
+        backend = HTTPModelBackend(server.url, max_concurrency=4, batching=True,
+                                   batch_window=0.01)
+        try:
+            with ThreadPoolExecutor(32) as pool:
+                codes = list(pool.map(lambda i: backend.generate(f"oppgave {i}", "ctx"),
+                                      range(32)))
+        finally:
+            backend.close()
+        assert codes[7] == DemoBackend().generate("oppgave 7", "ctx")
+        assert server.counters["requests"] < 32
+        assert server.counters["connections"] <= 4
+
+
+def test_short_batch_reply_fails_every_prompt_instead_of_hanging() -> None:
+    class ShortBackend(HTTPModelBackend):
+        def _post(self, path: str, payload: Dict[str, Any],
+                  budget: Optional[float] = None) -> Dict[str, Any]:
+            return {"codes": ["bare én"]}
+
+    backend = ShortBackend("http://localhost:1", batching=True, batch_window=0.05)
+    try:
+        with pytest.raises(ModelBackendError):
+            backend.generate_many([("a", "ctx"), ("b", "ctx")])
+    finally:
+        backend.close()
+    with pytest.raises(TypeError):
+        ModelBackend()  # type: ignore[abstract]
@@ -1,6 +1,12 @@
 """
 Tester for OrchestratorAgent.
 """
+import asyncio
+import time
+from typing import List
+
+import pytest
+
 from pad.orchestrator import OrchestratorAgent
 
 
@@ -8,3 +14,78 @@ def test_plan_returns_input() -> None:
     orchestrator = OrchestratorAgent()
     inp = "lag en funksjon som skriver ut hei"
     assert orchestrator.plan(inp) == inp
+
+
+def test_process_request_async_matches_sync() -> None:
+    orchestrator = OrchestratorAgent()
+    try:
+        result = asyncio.run(orchestrator.process_request_async("skriv ut hei"))
+    finally:
+        orchestrator.close()
+    assert "skriv ut hei" in result["code"]
+    assert result["feedback"] == orchestrator.qa_agent.validate_code(result["code"])
+
+
+def test_identical_concurrent_requests_run_pipeline_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    orchestrator = OrchestratorAgent()
+    calls = []
+    generate = orchestrator.codegen_agent.generate_code
+
+    def slow_generate(plan: str, context_agent: object, use_cache: bool = True,
+                      deadline: object = None) -> str:
+        calls.append(plan)
+        time.sleep(0.05)
+        return generate(plan, orchestrator.context_agent)
+
+    monkeypatch.setattr(orchestrator.codegen_agent, "generate_code", slow_generate)
+
+    async def burst() -> list:
+        prompts = ["skriv  ut hei", "skriv ut hei "] * 5
+        return await asyncio.gather(*(orchestrator.process_request_async(p) for p in prompts))
+
+    try:
+        results = asyncio.run(burst())
+    finally:
+        orchestrator.close()
+    assert len(calls) == 1
+    assert all(result == results[0] for result in results)
+    assert orchestrator.singleflight.stats()["coalesced"] == 9
+
+
+def test_multi_file_request_merges_subtasks(monkeypatch: pytest.MonkeyPatch) -> None:
+    orchestrator = OrchestratorAgent()
+    plans: List[str] = []
+    plan = orchestrator.plan
+
+    def counting_plan(user_input: str, deadline: object = None) -> str:
+        plans.append(user_input)
+        return plan(user_input)
+
+    monkeypatch.setattr(orchestrator, "plan", counting_plan)
+    try:
+        result = orchestrator.process_request("models.py: modeller\napi.py: bruker models")
+        result_async = asyncio.run(orchestrator.process_request_async(
+            "models.py: modeller\napi.py: bruker models", use_cache=False))
+    finally:
+        orchestrator.close()
+    # Deloppgavene lager egne prompter; planen for hele forespørselen lages ikke
+    assert plans == []
+    assert "# --- models.py ---" in result["code"]
+    assert "api.py: bruker models (bygger på models.py)" in result["code"]
+    assert result_async["code"].startswith("# --- models.py ---\n")
+    assert "\n\n# --- api.py ---\n" in result_async["code"]
+    assert result_async["feedback"].startswith("models.py: ")
+
+
+def test_run_reports_invalid_task_graph_and_keeps_going(monkeypatch: pytest.MonkeyPatch) -> None:
+    orchestrator = OrchestratorAgent()
+    inputs = iter(["a.py: lag a (avhenger av b.py)", "skriv ut hei", "exit"])
+    feedback: List[str] = []
+    monkeypatch.setattr(orchestrator.user_agent, "get_input", lambda: next(inputs))
+    monkeypatch.setattr(orchestrator.user_agent, "provide_feedback", feedback.append)
+    try:
+        orchestrator.run()
+    finally:
+        orchestrator.close()
+    assert feedback[0] == "Ugyldig forespørsel: 'a.py' avhenger av ukjent 'b.py'"
+    assert len(feedback) == 2
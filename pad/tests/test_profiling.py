@@ -0,0 +1,72 @@
+"""
+Tester for profilering ved behov (pad.profiling og /debug-rutene).
+"""
+import threading
+import tracemalloc
+from typing import List
+
+import pytest
+from fastapi.testclient import TestClient
+
+from pad.api import app
+from pad.profiling import MemoryTracker, StackSampler, collapse
+
+
+def test_sampler_finds_busy_thread_and_tracker_finds_growth() -> None:
+    stop = threading.Event()
+
+    def spin_here() -> None:
+        while not stop.is_set():
+            sum(range(1000))
+
+    thread = threading.Thread(target=spin_here, name="travel")
+    thread.start()
+    sampler = StackSampler(interval=0.005)
+    try:
+        stacks = sampler.sample(0.3, idle=False)
+    finally:
+        stop.set()
+        thread.join()
+    busy = [line for line in collapse(stacks).splitlines() if "spin_here" in line]
+    assert busy and busy[0].startswith("travel;")
+    assert int(busy[0].rsplit(" ", 1)[1]) > sampler.samples // 2
+    with pytest.raises(ValueError):
+        sampler.sample(0)
+
+    tracker = MemoryTracker()
+    tracker.start()
+    grown: List[str] = []
+    try:
+        grown.extend("kodebit %d" % i for i in range(20000))
+        diff = tracker.diff(limit=5)
+    finally:
+        tracker.stop()
+    assert "test_profiling.py" in diff[0]
+    assert not tracemalloc.is_tracing() and not tracker.active
+
+
+def test_debug_routes_are_hidden_without_token_and_guarded(
+        monkeypatch: pytest.MonkeyPatch) -> None:
+    client = TestClient(app)
+    monkeypatch.delenv("PAD_DEBUG_TOKEN", raising=False)
+    assert client.post("/debug/profile/cpu?seconds=0.1").status_code == 404
+
+    monkeypatch.setenv("PAD_DEBUG_TOKEN", "hemmelig")
+    assert client.post("/debug/profile/cpu?seconds=0.1",
+                       headers={"X-PAD-Debug-Token": "feil"}).status_code == 403
+    headers = {"X-PAD-Debug-Token": "hemmelig"}
+    response = client.post("/debug/profile/cpu?seconds=0.1&idle=true", headers=headers)
+    assert response.status_code == 200 and int(response.headers["X-PAD-Samples"]) > 0
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in response.text.splitlines())
+    assert client.post("/debug/profile/cpu?seconds=120", headers=headers).status_code == 422
+
+    assert client.get("/debug/memory/diff", headers=headers).status_code == 409
+    assert client.post("/debug/memory/start", headers=headers).json() == {"tracing": True}
+    try:
+        client.post("/generate", json={"prompt": "voks", "session_id": "profil"})
+        response = client.get("/debug/memory/diff?limit=5&reset=true", headers=headers)
+        assert response.status_code == 200
+        assert response.text.splitlines()[-1].startswith("Totalt sporet:")
+    finally:
+        assert client.post("/debug/memory/stop", headers=headers).json() == {"tracing": False}
+    assert not tracemalloc.is_tracing()
@@ -14,3 +14,39 @@ def test_validate_code_no_print_warn() -> None:
     agent = QualityAssuranceAgent()
     result = agent.validate_code("x = 1")
     assert "Advarsel" in result
+
+
+def test_validate_code_lints_functions_in_process() -> None:
+    agent = QualityAssuranceAgent()
+    assert agent.validate_code("def f():\n    return 1\n") == "Koden er PEP8-kompatibel."
+    result = agent.validate_code("import os\n\n\ndef f():\n    return 1\n")
+    assert result.startswith("Flake8-feil:\n")
+    assert "F401" in result
+
+
+def test_validate_code_cache_invalidated_by_config_change(tmp_path) -> None:  # type: ignore
+    config = tmp_path / ".flake8"
+    config.write_text("[flake8]\nmax-line-length = 100\n")
+    agent = QualityAssuranceAgent(config_path=str(config))
+    code = "def f():\n    return '" + "x" * 85 + "'\n"
+    assert agent.validate_code(code) == agent.validate_code(code)
+    assert agent.cache is not None and agent.cache.stats()["hits"] == 1
+    config.write_text("[flake8]\nmax-line-length = 80\n")
+    assert "E501" in agent.validate_code(code)
+
+
+def test_validate_many_matches_validate_code() -> None:
+    codes = [f"def f{i}():\n    return {i}\n" for i in range(3)] + ["import os\ndef g(): pass\n"]
+    agent = QualityAssuranceAgent(cache_size=0, batch_workers=2)
+    try:
+        assert agent.validate_many(codes) == [agent.validate_code(c) for c in codes]
+    finally:
+        agent.close()
+    # Også kodebiter som valideres direkte (uten funksjon eller med syntaksfeil) caches
+    agent = QualityAssuranceAgent(batch_workers=2)
+    try:
+        direct = ["x = 1\n", "def f(:\n    pass\n", "print('a')\n"]
+        assert agent.validate_many(direct) == agent.validate_many(direct)
+        assert agent.cache is not None and agent.cache.hits == len(direct)
+    finally:
+        agent.close()
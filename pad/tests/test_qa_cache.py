@@ -0,0 +1,32 @@
+"""
+Tester for ValidationCache.
+"""
+from pathlib import Path
+
+from pad.qa_cache import ValidationCache
+
+
+def test_cache_hits_and_config_invalidation() -> None:
+    cache = ValidationCache(maxsize=2)
+    assert cache.get("kode", "cfg1") is None
+    cache.put("kode", "cfg1", "rapport")
+    assert cache.get("kode", "cfg1") == "rapport"
+    assert cache.get("kode", "cfg2") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_cache_survives_restart_on_disk(tmp_path: Path) -> None:
+    path = str(tmp_path / "qa.sqlite")
+    cache = ValidationCache(path=path)
+    cache.put("kode", "cfg", "rapport")
+    cache.close()
+    reopened = ValidationCache(path=path)
+    assert reopened.get("kode", "cfg") == "rapport"
+    assert reopened.stats()["disk_hits"] == 1
+
+    # En prosess med en annen konfigurasjon sletter ikke de andres rader
+    other = ValidationCache(path=path)
+    other.put("kode", "cfg2", "annen rapport")
+    assert reopened.get("kode", "cfg") == "rapport"
+    assert other.get("kode", "cfg") == "rapport"
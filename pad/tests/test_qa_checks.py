@@ -0,0 +1,48 @@
+"""
+Tester for AST-sjekkene (pad.qa_checks) i QualityAssuranceAgent.
+"""
+import ast
+
+import pytest
+
+from pad.qa_agent import QualityAssuranceAgent
+from pad.qa_checks import Check, CheckRunner, MissingDocstringCheck
+
+
+def test_detection_uses_ast_and_syntax_errors_skip_linters(
+        monkeypatch: pytest.MonkeyPatch) -> None:
+    agent = QualityAssuranceAgent(cache_size=0)
+    # Tidligere utløste teksten "def " og "print(" i en streng linting/print-svar
+    assert agent.validate_code("s = 'def print(x)'\n").startswith("Advarsel")
+    assert agent.validate_code("async def f():\n    return 1\n") == "Koden er PEP8-kompatibel."
+
+    def no_lint(*args: object, **kwargs: object) -> None:
+        raise AssertionError("linteren skal ikke kjøres ved syntaksfeil")
+
+    monkeypatch.setattr(agent.lint_engine, "check", no_lint)
+    report = agent.validate_code("def f(:\n    print(1)\n")
+    assert report.startswith("Flake8-feil:\n") and "E999" in report
+    # For dypt nøstet kode gir et E999-funn, ikke et unntak ut av batchen
+    deep = "def f():\n    return " + "-" * 3000 + "1\n"
+    reports = agent.validate_many([deep, "x = 1\n"])
+    assert "E999 RecursionError" in reports[0] and reports[1].startswith("Advarsel")
+
+
+def test_checks_share_one_walk_and_findings_are_merged() -> None:
+    visited = []
+
+    class CountingCheck(Check):
+        node_types = (ast.Return,)
+
+        def visit(self, node: ast.AST) -> None:
+            visited.append(node)
+
+    code = "def f():\n    return eval('1')\n\n\ndef g():  # noqa: PAD201\n    return 2\n"
+    analysis = CheckRunner([CountingCheck, MissingDocstringCheck]).run(code)
+    assert len(visited) == 2
+    assert [f[2].split()[0] for f in analysis.findings] == ["PAD201", "PAD201"]
+
+    agent = QualityAssuranceAgent(cache_size=0, checks=[MissingDocstringCheck])
+    report = agent.validate_code(code).splitlines()
+    assert report[1:] == ["stdin:1:1: PAD201 f mangler docstring"]
+    assert "PAD101" in QualityAssuranceAgent(cache_size=0).validate_code(code)
@@ -0,0 +1,50 @@
+"""
+Tester for vektorindeksen (pad.retrieval) og rangert kontekst i ContextAgent.
+"""
+from pad.context_agent import ContextAgent
+from pad.retrieval import VectorIndex
+
+
+def test_index_ranks_replaces_and_removes_entries() -> None:
+    index: VectorIndex[str] = VectorIndex()
+    index.add("a", "def hent_bruker(bruker_id):\n    return db.get(bruker_id)", "a")
+    index.add("b", "class Lager:\n    def telle(self): ...", "b")
+    index.add("c", "def lagre_bruker(bruker):\n    db.put(bruker)", "c")
+    assert [item for _, item in index.search("hentBruker", k=2)] == ["a", "c"]
+
+    index.add("a", "def slett_fil(sti): ...", "a2")
+    assert [item for _, item in index.search("hent bruker")] == ["c"]
+    for i in range(200):
+        index.add(i, f"verdi_{i} = {i}", f"v{i}")
+    for i in range(200):
+        assert index.remove(i)
+    # Fjerningene over utløser kompaktering; gjenværende treff er uendret
+    assert len(index) == 3
+    assert [item for _, item in index.search("slett fil")] == ["a2"]
+    assert index.search("verdi_7") == []
+
+
+def test_get_context_returns_relevant_snippets_within_budget() -> None:
+    agent = ContextAgent(history_bytes=2000)
+    for i in range(50):
+        agent.update_context_from_code(f"def hjelper_{i}(x):\n    return x + {i}")
+    agent.update_context_from_code("def beregn_rabatt(pris, prosent):\n    return pris * prosent")
+
+    context = agent.get_context("beregn rabatt på en pris", budget=200)
+    assert "def beregn_rabatt(pris, prosent)" in context.split("Relevante kodebiter:")[1]
+    assert "hjelper_0" not in context
+    assert len(agent.get_context("hjelper", budget=60)) <= 60 * 4
+    # Kodebiter historikken har skjøvet ut av minnet, er også ute av indeksen
+    assert agent.code_history.dropped > 0
+    assert "x + 0" not in agent.get_context("hjelper_0")
+
+
+def test_fingerprint_follows_history_contents() -> None:
+    first, second, same = ContextAgent(), ContextAgent(), ContextAgent()
+    for agent, name in ((first, "hent_bruker"), (second, "slett_fil"), (same, "hent_bruker")):
+        agent.update_context_from_code(f"def {name}(x):\n    return x")
+        agent.update_context("Prosjekt")
+    # Lik kontekst og like mange kodebiter, men get_context finner ulike kodebiter
+    assert first.get_context("hent bruker") != second.get_context("hent bruker")
+    assert first.snapshot().fingerprint != second.snapshot().fingerprint
+    assert first.snapshot().fingerprint == same.snapshot().fingerprint
@@ -0,0 +1,49 @@
+"""
+Tester for testkjøring i sandkassen (pad.sandbox).
+"""
+from pad.qa_agent import QualityAssuranceAgent
+from pad.sandbox import SandboxPool
+
+
+def test_pool_reports_outcomes_and_enforces_limits() -> None:
+    with SandboxPool(workers=1, timeout=1.0, cpu_seconds=1,
+                     memory_bytes=256 * 1024 * 1024) as pool:
+        tests = ("from solution import add\n\n\n"
+                 "def test_add():\n    assert add(1, 2) == 3\n\n\n"
+                 "def test_wrong():\n    assert add(1, 1) == 3\n")
+        result = pool.run("def add(a, b):\n    return a + b\n", tests)
+        assert result.status == "failed"
+        outcomes = [(o.name, o.passed) for o in result.outcomes]
+        assert outcomes == [("test_add", True), ("test_wrong", False)]
+        assert "AssertionError" in result.outcomes[1].message
+
+        assert pool.run("def test_spin():\n    while True:\n        pass\n").status == "timeout"
+        hang = pool.run("import time\n\n\ndef test_hang():\n    time.sleep(30)\n")
+        assert hang.status == "timeout"
+        memory = pool.run("def test_big():\n    bytearray(2 * 1024 ** 3)\n")
+        assert "MemoryError" in memory.outcomes[0].message
+        # Serveren overlever alt dette og har et rent arbeidsområde hver gang
+        clean = pool.run("import os\n\n\ndef test_clean():\n    assert sorted(os.listdir()) == "
+                         "['output.txt', 'solution.py']\n")
+        assert clean.status == "passed"
+        # async-tester kjøres til ende, ikke bare opprettes
+        result = pool.run("import asyncio\n\n\nasync def test_x():\n"
+                          "    await asyncio.sleep(0)\n    assert False\n")
+        assert result.status == "failed" and result.failed == 1
+
+
+def test_validate_code_appends_test_results() -> None:
+    agent = QualityAssuranceAgent(sandbox_workers=1)
+    try:
+        code = "def double(x):\n    return 2 * x\n"
+        report = agent.validate_code(code, tests="from solution import double\n\n\n"
+                                                 "def test_double():\n    assert double(2) == 4\n")
+        assert report == "Koden er PEP8-kompatibel.\nTester: 1 bestått, 0 feilet."
+        assert "Tester" not in agent.validate_code(code)
+        # Tester i koden selv kjøres bare når kalleren ber om det
+        leaky = code + "\n\ndef test_leak():\n    assert False, open('/etc/hostname').read()\n"
+        assert "Tester" not in agent.validate_code(leaky)
+        assert agent.validate_many([leaky, code]) == ["Koden er PEP8-kompatibel."] * 2
+        assert "1 feilet" in agent.validate_code(leaky, run_tests=True)
+    finally:
+        agent.close()
@@ -0,0 +1,41 @@
+"""
+Tester for SessionStore.
+"""
+import time
+
+import pytest
+
+from pad.context_agent import ContextAgent
+from pad.context_store import ContextStore, MemoryContextStore
+from pad.orchestrator import OrchestratorAgent
+from pad.sessions import SessionStore
+
+
+def test_sessions_are_isolated_and_lru_bounded() -> None:
+    shared = OrchestratorAgent()
+    store = SessionStore(shared.fork, max_sessions=2)
+    store.get("a").context_agent.update_context("a sin kontekst")
+    assert store.get("b").context_agent.get_context() == "Standard kontekst"
+    assert store.get("a").qa_agent is store.get("b").qa_agent
+    store.get("c")
+    stats = store.stats()
+    assert stats["live_sessions"] == 2
+    assert stats["evicted"] == 1
+    assert store.get("a").context_agent.get_context() == "Standard kontekst"
+    assert store.created == 4
+
+
+def test_sessions_expire_after_ttl() -> None:
+    contexts = MemoryContextStore()
+    shared = OrchestratorAgent()
+    store = SessionStore(
+        lambda session_id: shared.fork(ContextAgent(store=contexts, session_id=session_id)),
+        ttl=0.01, keyed=True, on_evict=lambda session_id, _: contexts.delete(session_id))
+    first = store.get("a")
+    first.context_agent.update_context("a sin kontekst")
+    time.sleep(0.02)
+    # En utløpt sesjon starter på nytt, også i det delte lageret
+    assert store.get("a") is not first
+    assert contexts.get("a") == ("Standard kontekst", 0, ())
+    with pytest.raises(TypeError):
+        ContextStore()  # type: ignore[abstract]
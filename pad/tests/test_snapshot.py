@@ -0,0 +1,72 @@
+"""
+Tester for øyeblikksbilder og varm start (pad.snapshot).
+"""
+import threading
+from pathlib import Path
+
+import pytest
+
+from pad.context_agent import ContextAgent
+from pad.snapshot import Checkpointer
+
+
+def test_snapshot_restores_context_history_and_indexes(tmp_path: Path) -> None:
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "lager.py").write_text("class Lager:\n    def telle(self):\n        pass\n")
+    agent = ContextAgent()
+    agent.index_codebase(str(tmp_path / "src"), str(tmp_path / "index.sqlite"))
+    for i in range(100):
+        agent.update_context_from_code(f"def hjelper_{i}(x):\n    return x + {i}")
+    agent.update_context_from_code("def beregn_rabatt(pris, prosent):\n    return pris * prosent")
+    path = str(tmp_path / "agent.padsnap")
+    agent.save_snapshot(path)
+
+    warm = ContextAgent()
+    warm.load_snapshot(path)
+    query = "beregn rabatt for Lager.telle"
+    assert warm.get_context(query) == agent.get_context(query)
+    assert "method Lager.telle (lager.py:2)" in warm.get_context(query)
+    assert list(warm.code_history) == list(agent.code_history)
+    assert warm.snapshot().version == agent.snapshot().version
+    # Postinglistene brukes rett fra filkartet til de endres
+    assert warm._retrieval is not None and warm._retrieval._base is not None
+    assert not warm._retrieval._base.rows.flags.writeable
+
+    warm.update_context_from_code("def beregn_moms(pris):\n    return pris * 0.25")
+    assert "beregn_moms" in warm.get_context("beregn moms")
+    assert warm.index_codebase(str(tmp_path / "src"))["parsed"] == 0
+
+    (tmp_path / "tull.padsnap").write_bytes(b"ikke et bilde")
+    with pytest.raises(ValueError):
+        ContextAgent().load_snapshot(str(tmp_path / "tull.padsnap"))
+
+
+def test_checkpointer_saves_changed_agents_while_writers_run(tmp_path: Path) -> None:
+    agent = ContextAgent()
+    path = str(tmp_path / "agent.padsnap")
+    checkpointer = Checkpointer(lambda: [(path, agent)], interval=0.01)
+    assert checkpointer.checkpoint() == 1
+    assert checkpointer.checkpoint() == 0
+
+    def write(n: int) -> None:
+        for i in range(300):
+            agent.update_context_from_code(f"x_{n}_{i} = {i}")
+
+    with checkpointer:
+        writers = [threading.Thread(target=write, args=(n,)) for n in range(3)]
+        for thread in writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+    assert checkpointer.saved > 1
+
+    warm = ContextAgent()
+    warm.load_snapshot(path)
+    assert warm.snapshot().version == 900
+    assert len(warm.code_history) == 900
+
+    # En utkastet agent slettes og lagres ikke på nytt før den er et mål igjen
+    checkpointer.targets = list
+    checkpointer.discard(path)
+    checkpointer.discard(path)
+    assert checkpointer.checkpoint() == 0 and not Path(path).exists()
@@ -0,0 +1,31 @@
+"""
+Tester for rask, lat oppstart (main.py og OrchestratorAgent).
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Budsjett for import av main og OrchestratorAgent() i en ny prosess.
+# Målt til rundt 30 ms; budsjettet gir god margin for trege CI-maskiner.
+STARTUP_BUDGET_SECONDS = 0.5
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import main
+from pad.orchestrator import OrchestratorAgent
+OrchestratorAgent()
+elapsed = time.perf_counter() - start
+heavy = [m for m in ("fastapi", "pydantic", "uvicorn", "pad.qa_agent", "pycodestyle")
+         if m in sys.modules]
+print(elapsed, ",".join(heavy))
+"""
+
+
+def test_cli_startup_is_lazy_and_within_budget() -> None:
+    output = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout.split()
+    assert output[1:] == []
+    assert float(output[0]) < STARTUP_BUDGET_SECONDS
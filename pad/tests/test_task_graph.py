@@ -0,0 +1,48 @@
+"""
+Tester for oppgavegraf og parallell utførelse (pad.task_graph).
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+import pytest
+
+from pad.task_graph import Subtask, TaskScheduler, plan_graph
+
+REQUEST = """Lag en liten app:
+- models.py: datamodeller
+- db.py: lagring (avhenger av models.py)
+- api.py: endepunkter som bruker db
+- cli.py: kommandolinje
+- docs.md: dokumentasjon
+"""
+
+
+def test_plan_graph_infers_dependencies_and_rejects_cycles() -> None:
+    graph = plan_graph(REQUEST)
+    assert [t.id for t in graph] == ["models.py", "db.py", "api.py", "cli.py", "docs.md"]
+    assert graph.get("api.py").depends_on == ("db.py",)
+    assert graph.critical_path() == ["models.py", "db.py", "api.py"]
+    assert [t.id for t in plan_graph("skriv ut hei")] == ["main"]
+    with pytest.raises(ValueError):
+        plan_graph("a.py: a (avhenger av b.py)\nb.py: b (avhenger av a.py)")
+
+
+def test_scheduler_wall_time_follows_critical_path() -> None:
+    graph = plan_graph(REQUEST)
+    finished: Dict[str, float] = {}
+
+    def work(subtask: Subtask, inputs: Dict[str, float]) -> float:
+        assert set(inputs) == set(subtask.depends_on)
+        time.sleep(0.1)
+        finished[subtask.id] = time.perf_counter()
+        return finished[subtask.id]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(8) as pool:
+        results = TaskScheduler().run(graph, work, pool)
+    elapsed = time.perf_counter() - start
+    assert list(results) == [t.id for t in graph]
+    assert finished["models.py"] < finished["db.py"] < finished["api.py"]
+    # Kritisk sti er tre deloppgaver; fem i serie ville tatt 0.5 s
+    assert elapsed < 0.45
@@ -9,11 +9,20 @@ og gjenbrukbare på tvers av ulike komponenter.
 Functions:
     format_code_block: Formaterer kode som et konsollvennlig kodeblokk
 
+Classes:
+    LRUCache: Trådsikker, størrelsesbegrenset LRU-cache med valgfri TTL
+
 Example:
     >>> from pad.utils import format_code_block
     >>> formatted = format_code_block("print('hello world')")
     >>> print(formatted)
 """
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
 
 
 def format_code_block(code: str) -> str:
@@ -44,3 +53,123 @@ def format_code_block(code: str) -> str:
         konsistens med standard utviklerverktøy og dokumentasjon.
     """
     return f"```\n{code}\n```"
+
+
+class LRUCache(Generic[V]):
+    """
+    Trådsikker LRU-cache med maksimal størrelse og valgfri levetid (TTL).
+
+    Brukes av agentene for å huske dyre resultater. Når cachen er full,
+    kastes elementet som ble brukt for lengst siden. Elementer eldre enn
+    ``ttl`` sekunder behandles som manglende.
+
+    Attributes:
+        maxsize (int): Maksimalt antall elementer
+        ttl (Optional[float]): Levetid i sekunder, eller None for ubegrenset
+        hits (int): Antall oppslag som traff
+        misses (int): Antall oppslag som bommet
+
+    Example:
+        >>> cache = LRUCache(maxsize=2)
+        >>> cache.put("a", 1)
+        >>> cache.get("a")
+        1
+        >>> cache.get("b") is None
+        True
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None,
+                 on_evict: Optional[Callable[[Hashable, V], None]] = None) -> None:
+        """
+        Args:
+            maxsize (int): Maksimalt antall elementer i cachen
+            ttl (Optional[float]): Levetid per element i sekunder
+            on_evict (Optional[Callable]): Kalles med (nøkkel, verdi) når et
+                element kastes ut på grunn av størrelse eller alder
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, count=False) is not None
+
+    def _expired(self, stamp: float, now: float) -> bool:
+        return self.ttl is not None and now - stamp > self.ttl
+
+    def get(self, key: Hashable, count: bool = True) -> Optional[V]:
+        """
+        Henter en verdi og markerer den som nylig brukt.
+
+        Args:
+            key (Hashable): Nøkkelen som slås opp
+            count (bool): Om oppslaget skal telles i hits/misses
+
+        Returns:
+            Optional[V]: Verdien, eller None hvis den mangler eller er utløpt
+        """
+        evicted = None
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and self._expired(item[0], time.monotonic()):
+                del self._data[key]
+                evicted, item = (key, item[1]), None
+            if item is None:
+                self.misses += count
+            else:
+                self._data.move_to_end(key)
+                self.hits += count
+        if evicted is not None and self.on_evict is not None:
+            self.on_evict(*evicted)
+        return None if item is None else item[1]
+
+    def put(self, key: Hashable, value: V) -> None:
+        """Lagrer en verdi og kaster ut de eldste elementene ved behov."""
+        evicted: List[Tuple[Hashable, V]] = []
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                old_key, (_, old_value) = self._data.popitem(last=False)
+                evicted.append((old_key, old_value))
+        if self.on_evict is not None:
+            for old_key, old_value in evicted:
+                self.on_evict(old_key, old_value)
+
+    def pop(self, key: Hashable) -> Optional[V]:
+        """Fjerner og returnerer en verdi uten å kalle ``on_evict``."""
+        with self._lock:
+            item = self._data.pop(key, None)
+        return None if item is None else item[1]
+
+    def purge_expired(self) -> int:
+        """Fjerner alle utløpte elementer og returnerer hvor mange det var."""
+        if self.ttl is None:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            expired = [(k, v) for k, (stamp, v) in self._data.items()
+                       if self._expired(stamp, now)]
+            for key, _ in expired:
+                del self._data[key]
+        if self.on_evict is not None:
+            for key, value in expired:
+                self.on_evict(key, value)
+        return len(expired)
+
+    def values(self) -> List[V]:
+        """Returnerer en kopi av alle lagrede verdier."""
+        with self._lock:
+            return [value for _, value in self._data.values()]
+
+    def clear(self) -> None:
+        """Tømmer cachen (tellere beholdes)."""
+        with self._lock:
+            self._data.clear()